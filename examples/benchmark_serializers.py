@@ -0,0 +1,60 @@
+"""
+Microbenchmark of the serializers and compression codecs of lithops, with the
+payload size and the encode and decode times of each option. The serializers
+and codecs whose packages are not installed are skipped, and the objects a
+serializer does not support are serialized with the default one (pickle5).
+"""
+import time
+import random
+import statistics
+
+from lithops import serializers
+
+REPEATS = 5
+
+
+def make_payloads():
+    payloads = {
+        'records': [{'id': i, 'name': f'user{i}', 'score': random.random()} for i in range(100000)],
+        'text': ' '.join(random.choice(['foo', 'bar', 'baz', 'lithops']) for _ in range(500000)),
+        'binary': bytearray(random.getrandbits(8) for _ in range(4 * 1024**2))
+    }
+    try:
+        import numpy as np
+        payloads['ndarray'] = np.random.rand(1024, 1024)
+    except ImportError:
+        pass
+    try:
+        import pyarrow as pa
+        payloads['arrow_table'] = pa.table({
+            'id': list(range(200000)),
+            'value': [random.random() for _ in range(200000)]
+        })
+    except ImportError:
+        pass
+    return payloads
+
+
+def bench(obj, serializer, compression):
+    encode_times, decode_times = [], []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        data = serializers.dumps(obj, serializer, compression, compression_threshold=0)
+        encode_times.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        serializers.loads(data)
+        decode_times.append(time.perf_counter() - start)
+    return len(data), statistics.median(encode_times) * 1000, statistics.median(decode_times) * 1000
+
+
+if __name__ == "__main__":
+    print(f"{'payload':<12} {'serializer':<12} {'compression':<12} {'size (KiB)':>12} {'encode (ms)':>12} {'decode (ms)':>12}")
+    for payload_name, obj in make_payloads().items():
+        for serializer in serializers.SERIALIZERS:
+            for compression in [None] + list(serializers.COMPRESSIONS):
+                try:
+                    size, encode_time, decode_time = bench(obj, serializer, compression)
+                except ImportError:
+                    continue
+                print(f'{payload_name:<12} {serializer:<12} {compression or "-":<12} '
+                      f'{size / 1024:>12.1f} {encode_time:>12.2f} {decode_time:>12.2f}')
@@ -0,0 +1,39 @@
+"""
+Microbenchmark of the per-call overhead of the worker handler, with the
+default fork-based execution and with the in-process fast mode
+(`worker_fast_mode`). All the calls run sequentially in a single worker of
+the localhost backend, and the overhead of each call is its worker execution
+time minus the execution time of the function.
+"""
+import lithops
+import statistics
+
+CALLS = 50
+
+
+def noop(x):
+    return x
+
+
+def run(fast_mode):
+    config = {
+        'lithops': {'backend': 'localhost', 'storage': 'localhost', 'worker_fast_mode': fast_mode},
+        'localhost': {'worker_processes': 1}
+    }
+    fexec = lithops.FunctionExecutor(config=config, log_level='WARNING')
+    futures = fexec.map(noop, range(CALLS), chunksize=CALLS)
+    fexec.get_result(futures)
+    fexec.clean()
+
+    overheads = [
+        (f.stats['worker_end_tstamp'] - f.stats['worker_start_tstamp'] - f.stats['worker_func_exec_time']) * 1000
+        for f in futures
+    ]
+    return statistics.mean(overheads), statistics.median(overheads)
+
+
+if __name__ == "__main__":
+    for fast_mode in (False, True):
+        mean, median = run(fast_mode)
+        mode = 'fast mode' if fast_mode else 'fork mode'
+        print(f'{mode}: per-call overhead mean {mean:.2f} ms - median {median:.2f} ms')
@@ -4,6 +4,7 @@ from lithops.executors import ServerlessExecutor
 from lithops.executors import StandaloneExecutor
 from lithops.retries import RetryingFunctionExecutor
 from lithops.storage import Storage
+from lithops.storage import AsyncStorage
 from lithops.version import __version__
 from lithops.wait import wait, get_result
 
@@ -14,6 +15,7 @@ __all__ = [
     'StandaloneExecutor',
     'RetryingFunctionExecutor',
     'Storage',
+    'AsyncStorage',
     'wait',
     'get_result',
     '__version__',
@@ -228,6 +228,18 @@ def extract_storage_config(config):
     s_config['monitoring_interval'] = config['lithops'].get(
         'monitoring_interval', c.LITHOPS_DEFAULT_CONFIG_KEYS['monitoring_interval']
     )
+    s_config['transfer_concurrency'] = config['lithops'].get(
+        'storage_transfer_concurrency', c.TRANSFER_CONCURRENCY
+    )
+    s_config['transfer_part_size'] = config['lithops'].get(
+        'storage_transfer_part_size', c.TRANSFER_PART_SIZE
+    )
+    s_config['cloudobjects_ttl'] = config['lithops'].get(
+        'storage_cloudobjects_ttl', c.CLOUDOBJECTS_TTL
+    )
+    for key in ('storage_cache', 'storage_cache_size', 'storage_cache_ttl'):
+        if key in config['lithops']:
+            s_config[key] = config['lithops'][key]
     backend = config['lithops']['storage']
     s_config['backend'] = backend
     s_config[backend] = config[backend] if backend in config and config[backend] else {}
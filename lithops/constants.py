@@ -42,10 +42,46 @@ JOBS_PREFIX = "lithops.jobs"
 TEMP_PREFIX = "lithops.jobs/tmp"
 LOGS_PREFIX = "lithops.logs"
 RUNTIMES_PREFIX = "lithops.runtimes"
+CLOUDOBJECTS_PREFIX = "lithops.cloudobjects"
 
 MAX_AGG_DATA_SIZE = 4  # 4MiB
 
+RANGE_READ_PART_SIZE = 8 * 1024**2  # 8MiB
+RANGE_READ_CONCURRENCY = 8
+
+TRANSFER_PART_SIZE = 8 * 1024**2  # 8MiB
+TRANSFER_CONCURRENCY = 1
+
+BULK_OPS_CONCURRENCY = 64
+
+DELETE_BATCH_SIZE = 1000
+DELETE_CONCURRENCY = 16
+
+STORAGE_CACHE_SIZE = 1024**3  # 1GiB
+STORAGE_CACHE_TTL = 0
+STORAGE_CACHE_BLOCK_SIZE = 4 * 1024**2  # 4MiB
+
+CLOUDOBJECTS_TTL = 7 * 24 * 3600  # 7 days
+
+HTTP_POOL_SIZE = 64
+HTTP_RETRIES = 5
+
 WORKER_PROCESSES_DEFAULT = 1
+WORKER_PREFETCH_SIZE = 64 * 1024**2  # 64MiB
+WORKER_LOGS_MAX_SIZE = 1024**2  # 1MiB
+
+OUTPUT_CHUNK_SIZE = 8 * 1024**2  # 8MiB
+OOB_BUFFER_MIN_SIZE = 64 * 1024  # 64KiB
+SERIALIZER_DEFAULT = 'pickle5'
+SERIALIZER_COMPRESSION_THRESHOLD = 1024**2  # 1MiB
+
+PROFILER_INTERVAL = 0.01  # seconds
+PROFILER_MAX_STACKS = 2000
+PROFILER_MAX_DEPTH = 128
+
+AUTOTUNE_TARGET_DURATION = 5  # seconds of calls run sequentially by each worker process
+AUTOTUNE_MEMORY_MARGIN = 0.8  # fraction of the runtime memory used by the worker processes
+AUTOTUNE_MIN_CPU = 0.25  # min cores per call
 
 TEMP_DIR = os.path.realpath(tempfile.gettempdir())
 USER_TEMP_DIR = 'lithops-' + os.getenv("USER", "root")
@@ -54,6 +90,7 @@ JOBS_DIR = os.path.join(LITHOPS_TEMP_DIR, 'jobs')
 LOGS_DIR = os.path.join(LITHOPS_TEMP_DIR, 'logs')
 MODULES_DIR = os.path.join(LITHOPS_TEMP_DIR, 'modules')
 CUSTOM_RUNTIME_DIR = os.path.join(LITHOPS_TEMP_DIR, 'custom-runtime')
+STORAGE_CACHE_DIR = os.path.join(LITHOPS_TEMP_DIR, 'storage-cache')
 
 RN_LOG_FILE = os.path.join(LITHOPS_TEMP_DIR, 'localhost-runner.log')
 SV_LOG_FILE = os.path.join(LITHOPS_TEMP_DIR, 'localhost-service.log')
@@ -66,6 +103,7 @@ CLEANER_LOG_FILE = os.path.join(CLEANER_DIR, 'cleaner.log')
 HOME_DIR = os.path.expanduser('~')
 CONFIG_DIR = os.path.join(HOME_DIR, '.lithops')
 CACHE_DIR = os.path.join(CONFIG_DIR, 'cache')
+AUTOTUNE_DIR = os.path.join(CACHE_DIR, 'autotune')
 CONFIG_FILE = os.path.join(CONFIG_DIR, 'config')
 CONFIG_FILE_GLOBAL = os.path.join("/etc", "lithops", "config")
 
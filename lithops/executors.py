@@ -43,6 +43,9 @@ from lithops.localhost import LocalhostHandlerV1, LocalhostHandlerV2
 from lithops.standalone import StandaloneHandler
 from lithops.serverless import ServerlessHandler
 from lithops.storage.utils import create_job_key, CloudObject
+from lithops.storage.stats import STORAGE_STATS, merge_storage_stats
+from lithops.util.profiler import merge_profiles, to_collapsed
+from lithops.job.autotune import learn_profile, memory_exceeded
 from lithops.monitor import JobMonitor
 from lithops.utils import FuturesList
 
@@ -81,6 +84,7 @@ class FunctionExecutor:
         self.executor_id = create_executor_id()
         self.futures = []
         self.cleaned_jobs = set()
+        self.autotuned_jobs = set()
         self.total_jobs = 0
         self.last_call = None
 
@@ -175,7 +179,9 @@ class FunctionExecutor:
         runtime_memory: Optional[int] = None,
         timeout: Optional[int] = None,
         include_modules: Optional[List] = [],
-        exclude_modules: Optional[List] = []
+        exclude_modules: Optional[List] = [],
+        profile: Optional[bool] = False,
+        serializer: Optional[str] = None
     ) -> ResponseFuture:
         """
         For running one function execution asynchronously.
@@ -187,6 +193,8 @@ class FunctionExecutor:
         :param timeout: Time that the function has to complete its execution before raising a timeout.
         :param include_modules: Explicitly pickle these dependencies.
         :param exclude_modules: Explicitly keep these modules from pickled dependencies.
+        :param profile: Sample the stack of the function during its execution. See `get_profile()`.
+        :param serializer: Serializer of the data and the result. Default from the ``serializer`` config key.
 
         :return: Response future.
         """
@@ -206,7 +214,9 @@ class FunctionExecutor:
                              extra_env=extra_env,
                              include_modules=include_modules,
                              exclude_modules=exclude_modules,
-                             execution_timeout=timeout)
+                             execution_timeout=timeout,
+                             profile=profile,
+                             serializer=serializer)
 
         futures = self.invoker.run_job(job)
         self.futures.extend(futures)
@@ -224,9 +234,12 @@ class FunctionExecutor:
         obj_chunk_size: Optional[int] = None,
         obj_chunk_number: Optional[int] = None,
         obj_newline: Optional[str] = '\n',
+        obj_balanced_chunks: Optional[bool] = False,
         timeout: Optional[int] = None,
         include_modules: Optional[List[str]] = [],
-        exclude_modules: Optional[List[str]] = []
+        exclude_modules: Optional[List[str]] = [],
+        profile: Optional[bool] = False,
+        serializer: Optional[str] = None
     ) -> FuturesList:
         """
         Spawn multiple function activations based on the items of an input list.
@@ -243,10 +256,14 @@ class FunctionExecutor:
                 'None' for processing the whole file in one function activation. chunk_n has prevalence over chunk_size if both parameters are set
         :param obj_newline: new line character for keeping line integrity of partitions.
                 'None' for disabling line integrity logic and get partitions of the exact same size in the functions
+        :param obj_balanced_chunks: Used with obj_chunk_number. Split the dataset in partitions of about the dataset size / obj_chunk_number
+                instead of each object in obj_chunk_number partitions. Smaller objects are grouped in shared partitions
         :param timeout: Max time per function activation (seconds)
         :param include_modules: Explicitly pickle these dependencies. All required dependencies are pickled if default empty list.
                 No one dependency is pickled if it is explicitly set to None
         :param exclude_modules: Explicitly keep these modules from pickled dependencies. It is not taken into account if you set include_modules.
+        :param profile: Sample the stack of the functions during their execution. See `get_profile()`.
+        :param serializer: Serializer of the data and the results. Default from the ``serializer`` config key.
 
         :return: A list with size `len(map_iterdata)` of futures for each job (Futures are also internally stored by Lithops).
         """
@@ -273,7 +290,10 @@ class FunctionExecutor:
             extra_args=extra_args,
             obj_chunk_size=obj_chunk_size,
             obj_chunk_number=obj_chunk_number,
-            obj_newline=obj_newline
+            obj_newline=obj_newline,
+            obj_balanced_chunks=obj_balanced_chunks,
+            profile=profile,
+            serializer=serializer
         )
 
         futures = self.invoker.run_job(job)
@@ -300,10 +320,13 @@ class FunctionExecutor:
         obj_chunk_size: Optional[int] = None,
         obj_chunk_number: Optional[int] = None,
         obj_newline: Optional[str] = '\n',
+        obj_balanced_chunks: Optional[bool] = False,
         obj_reduce_by_key: Optional[bool] = False,
         spawn_reducer: Optional[int] = 20,
         include_modules: Optional[List[str]] = [],
-        exclude_modules: Optional[List[str]] = []
+        exclude_modules: Optional[List[str]] = [],
+        profile: Optional[bool] = False,
+        serializer: Optional[str] = None
     ) -> FuturesList:
         """
         Map the map_function over the data and apply the reduce_function across all futures.
@@ -322,10 +345,14 @@ class FunctionExecutor:
         :param obj_chunk_number: Number of chunks to split each object. 'None' for processing the whole file in one function activation
         :param obj_newline: New line character for keeping line integrity of partitions.
                 'None' for disabling line integrity logic and get partitions of the exact same size in the functions
+        :param obj_balanced_chunks: Split the dataset in partitions of about the dataset size / obj_chunk_number instead of each object in obj_chunk_number
+                partitions. Smaller objects are grouped in shared partitions
         :param obj_reduce_by_key: Set one reducer per object after running the partitioner. By default there is one reducer for all the objects
         :param spawn_reducer: Percentage of done map functions before spawning the reduce function
         :param include_modules: Explicitly pickle these dependencies.
         :param exclude_modules: Explicitly keep these modules from pickled dependencies.
+        :param profile: Sample the stack of the map and reduce functions during their execution. See `get_profile()`.
+        :param serializer: Serializer of the data and the results. Default from the ``serializer`` config key.
 
         :return: A list with size `len(map_iterdata)` of futures.
         """
@@ -349,9 +376,12 @@ class FunctionExecutor:
             obj_chunk_size=obj_chunk_size,
             obj_chunk_number=obj_chunk_number,
             obj_newline=obj_newline,
+            obj_balanced_chunks=obj_balanced_chunks,
             include_modules=include_modules,
             exclude_modules=exclude_modules,
-            execution_timeout=timeout
+            execution_timeout=timeout,
+            profile=profile,
+            serializer=serializer
         )
 
         map_futures = self.invoker.run_job(map_job)
@@ -384,7 +414,9 @@ class FunctionExecutor:
             obj_reduce_by_key=obj_reduce_by_key,
             extra_env=extra_env,
             include_modules=include_modules,
-            exclude_modules=exclude_modules
+            exclude_modules=exclude_modules,
+            profile=profile,
+            serializer=serializer
         )
 
         reduce_futures = self.invoker.run_job(reduce_job)
@@ -449,6 +481,7 @@ class FunctionExecutor:
                 self.clean(clean_cloudobjects=False)
 
         except (KeyboardInterrupt, Exception) as e:
+            self._learn_profiles(futures)
             self.invoker.stop()
             self.job_monitor.remove(futures)
             [f._set_exception() for f in futures]
@@ -458,6 +491,8 @@ class FunctionExecutor:
                 self.clean(clean_cloudobjects=False, force=True)
             raise e
 
+        self._learn_profiles(futures)
+
         if download_results:
             fs_done = [f for f in futures if f.done]
             fs_notdone = [f for f in futures if not f.done]
@@ -467,6 +502,26 @@ class FunctionExecutor:
 
         return create_futures_list(fs_done, self), create_futures_list(fs_notdone, self)
 
+    def _learn_profiles(self, futures):
+        """
+        Learns the resource profile of the functions of the jobs run with
+        `autotune`, once all their calls finished or some call exceeded the
+        runtime memory
+        """
+        jobs = {}
+        for f in futures:
+            if f._autotune and f.job_key not in self.autotuned_jobs:
+                jobs.setdefault(f.job_key, []).append(f)
+
+        for job_key, job_futures in jobs.items():
+            if all(f.success or f.done for f in job_futures) or any(map(memory_exceeded, job_futures)):
+                self.autotuned_jobs.add(job_key)
+                autotune = job_futures[0]._autotune
+                try:
+                    learn_profile(job_futures, autotune['function_hash'], autotune['worker_processes'])
+                except Exception as e:
+                    logger.debug(f'ExecutorID {self.executor_id} - Unable to store the resource profile: {e}')
+
     def get_result(
         self,
         fs: Optional[Union[ResponseFuture, FuturesList, List[ResponseFuture]]] = None,
@@ -559,6 +614,63 @@ class FunctionExecutor:
         create_timeline(ftrs_to_plot, dst, figsize)
         create_histogram(ftrs_to_plot, dst, figsize)
 
+    def get_storage_stats(
+        self,
+        fs: Optional[Union[ResponseFuture, List[ResponseFuture], FuturesList]] = None
+    ) -> Dict:
+        """
+        Retrieves the stats of the storage operations, by backend and operation.
+        The 'host' entry contains the operations made by this process, and the
+        'workers' entry aggregates the operations made by the finished calls,
+        whose stats are downloaded from the storage.
+
+        :param fs: list of futures. By default, all the futures of this executor.
+
+        :return: Dict with the 'host' and 'workers' stats
+        """
+        ftrs = self.futures if not fs else fs
+
+        if isinstance(ftrs, ResponseFuture):
+            ftrs = [ftrs]
+
+        call_ids = [(f.executor_id, f.job_id, f.call_id) for f in ftrs if f.stats.get('worker_storage_requests')]
+        worker_stats = self.internal_storage.get_calls_storage_stats(call_ids) if call_ids else []
+
+        return {
+            'host': STORAGE_STATS.get(),
+            'workers': merge_storage_stats(stats for stats in worker_stats if stats is not None)
+        }
+
+    def get_profile(
+        self,
+        fs: Optional[Union[ResponseFuture, List[ResponseFuture], FuturesList]] = None,
+        output_file: Optional[str] = None
+    ) -> Dict[str, int]:
+        """
+        Downloads and merges the profiles of the finished calls run with `profile=True`.
+        The profile counts the samples of each stack of the functions, and it can
+        be written in the collapsed stacks format used by flame graph tools.
+
+        :param fs: list of futures. By default, all the futures of this executor.
+        :param output_file: Path of a file where the profile is written in the collapsed stacks format
+
+        :return: Dict of {stack: samples}, with the frames of each stack separated by ';'
+        """
+        ftrs = self.futures if not fs else fs
+
+        if isinstance(ftrs, ResponseFuture):
+            ftrs = [ftrs]
+
+        call_ids = [(f.executor_id, f.job_id, f.call_id) for f in ftrs if 'worker_func_profile_stacks' in f.stats]
+        profiles = self.internal_storage.get_calls_profile(call_ids) if call_ids else []
+        profile = merge_profiles(p for p in profiles if p is not None)
+
+        if output_file:
+            with open(output_file, 'w') as f:
+                f.write(to_collapsed(profile))
+
+        return profile
+
     def clean(
         self,
         fs: Optional[Union[ResponseFuture, List[ResponseFuture]]] = None,
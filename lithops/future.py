@@ -16,26 +16,114 @@
 # limitations under the License.
 #
 
+import io
 import os
 import sys
 import time
-import zlib
-import base64
+import queue
+import atexit
 import pickle
 import logging
+import threading
 import traceback
 from six import reraise
+from concurrent.futures import ThreadPoolExecutor
 
+from lithops import serializers
 from lithops.storage import InternalStorage
 from lithops.storage.utils import (
     check_storage_path,
     get_storage_path,
-    create_job_key
+    create_output_chunk_key
 )
 from lithops.constants import FN_LOG_FILE, LOGS_DIR
+from lithops.utils import is_lithops_worker
 
 logger = logging.getLogger(__name__)
 
+LOG_SINK = None
+
+
+class LogSink(threading.Thread):
+    """
+    Downloads the logs of the finished calls and appends them to the local
+    log files in a background thread, out of the wait loop
+    """
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.queue = queue.Queue()
+
+    def add(self, future, internal_storage):
+        self.queue.put((future, internal_storage))
+
+    def run(self):
+        while True:
+            future, internal_storage = self.queue.get()
+            try:
+                future._write_logs(internal_storage)
+            except Exception as e:
+                logger.debug(f'Could not write the logs of call {future.job_key}/{future.call_id}: {e}')
+            finally:
+                self.queue.task_done()
+
+    def flush(self, timeout=10):
+        """
+        Waits until the pending logs are written, or the timeout expires
+        """
+        end = time.time() + timeout
+        while self.queue.unfinished_tasks and time.time() < end:
+            time.sleep(0.05)
+
+
+def get_log_sink():
+    global LOG_SINK
+
+    if LOG_SINK is None:
+        LOG_SINK = LogSink()
+        LOG_SINK.start()
+        atexit.register(LOG_SINK.flush)
+    return LOG_SINK
+
+
+class StreamedResult:
+    """
+    Result of a generator function. Iterating over it downloads the output
+    chunks of the call one by one, prefetching the next chunk while the
+    items of the current one are consumed. It can be iterated several times.
+    """
+
+    def __init__(self, executor_id, job_id, call_id, chunks, storage_config):
+        self.executor_id = executor_id
+        self.job_id = job_id
+        self.call_id = call_id
+        self.chunks = chunks
+        self._storage_config = storage_config
+
+    def __iter__(self):
+        if not self.chunks:
+            return
+        internal_storage = InternalStorage(self._storage_config)
+
+        def get_chunk(chunk):
+            chunk_key = create_output_chunk_key(self.executor_id, self.job_id, self.call_id, chunk)
+            return internal_storage.get_data(chunk_key)
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            next_chunk = executor.submit(get_chunk, 0)
+            for chunk in range(self.chunks):
+                data = next_chunk.result()
+                if chunk + 1 < self.chunks:
+                    next_chunk = executor.submit(get_chunk, chunk + 1)
+                size = len(data)
+                buffer = io.BytesIO(data)
+                del data
+                while buffer.tell() < size:
+                    yield pickle.load(buffer)
+
+    def __repr__(self):
+        return f'<StreamedResult {self.executor_id}/{self.job_id}/{self.call_id} - Chunks: {self.chunks}>'
+
 
 class ResponseFuture:
     """
@@ -61,9 +149,9 @@ class ResponseFuture:
         self.execution_timeout = job.execution_timeout
         self.runtime_name = job.runtime_name
         self.runtime_memory = job.runtime_memory
+        self._autotune = getattr(job, 'autotune', None)
         self.activation_id = None
         self.stats = {}
-        self.logs = None
 
         self._storage_config = storage_config
         self._produce_output = True
@@ -75,6 +163,7 @@ class ResponseFuture:
         self._traceback = None
         self._call_status = None
         self._call_output = None
+        self._logs = None
         self._host_status_done_tstamp = None
         self._status_query_count = 0
         self._output_query_count = 0
@@ -129,6 +218,48 @@ class ResponseFuture:
     def futures(self):
         return self._new_futures is not None
 
+    @property
+    def logs(self):
+        """
+        Logs of the call. They are downloaded the first time they are accessed
+        """
+        if self._logs is None:
+            self._logs = self.get_logs()
+        return self._logs
+
+    def get_logs(self, internal_storage=None):
+        """
+        Downloads the logs of the call.
+
+        :param internal_storage: Storage handler. Default None.
+
+        :return: The logs, or None if the call is not finished or its logs were not uploaded.
+        """
+        if self._logs is not None:
+            return self._logs
+        if not self._call_status or not self._call_status.get('worker_logs_size'):
+            return None
+        if internal_storage is None:
+            internal_storage = InternalStorage(self._storage_config)
+        self._logs = internal_storage.get_call_logs(self.executor_id, self.job_id, self.call_id)
+        return self._logs
+
+    def _write_logs(self, internal_storage=None):
+        """
+        Appends the logs of the call to the log file of the job and the functions log file
+        """
+        logs = self.get_logs(internal_storage)
+        if not logs:
+            return
+        log_file = os.path.join(LOGS_DIR, self.job_key + '.log')
+        header = "Activation: '{}' ({})\n[\n".format(self.runtime_name, self.activation_id)
+        tail = ']\n\n'
+        output = logs.replace('\r', '').replace('\n', '\n    ', logs.count('\n') - 1)
+        with open(log_file, 'a') as lf:
+            lf.write(header + '    ' + output + tail)
+        with open(FN_LOG_FILE, 'a') as lf:
+            lf.write(header + '    ' + output + tail)
+
     def _set_invoked(self):
         """ Set the future as invoked"""
         self._state = ResponseFuture.State.Invoked
@@ -207,17 +338,8 @@ class ResponseFuture:
         self.stats['host_status_query_count'] = self._status_query_count
         self.activation_id = self._call_status['activation_id']
 
-        if 'logs' in self._call_status:
-            self.logs = zlib.decompress(base64.b64decode(self._call_status['logs'].encode())).decode()
-            job_key = create_job_key(self.executor_id, self.job_id)
-            log_file = os.path.join(LOGS_DIR, job_key + '.log')
-            header = "Activation: '{}' ({})\n[\n".format(self.runtime_name, self.activation_id)
-            tail = ']\n\n'
-            output = self.logs.replace('\r', '').replace('\n', '\n    ', self.logs.count('\n') - 1)
-            with open(log_file, 'a') as lf:
-                lf.write(header + '    ' + output + tail)
-            with open(FN_LOG_FILE, 'a') as lf:
-                lf.write(header + '    ' + output + tail)
+        if self._call_status.get('worker_logs_size') and not is_lithops_worker():
+            get_log_sink().add(self, internal_storage)
 
         for key in self._call_status:
             if any(key.startswith(ss) for ss in ['func', 'host', 'worker']):
@@ -233,7 +355,7 @@ class ResponseFuture:
 
         if self._call_status['exception']:
             self._set_state(ResponseFuture.State.Error)
-            self._exception = pickle.loads(eval(self._call_status['exc_info']))
+            self._exception = pickle.loads(self._call_status['exc_info'])
 
             if not self._call_status.get('exc_pickle_fail', False):
                 fn_exctype = self._exception[0]
@@ -273,14 +395,19 @@ class ResponseFuture:
                 return None
 
         if 'new_futures' in self._call_status and not self._new_futures:
-            new_futures = pickle.loads(eval(self._call_status['new_futures']))
+            new_futures = pickle.loads(self._call_status['new_futures'])
             self._new_futures = [new_futures] if type(new_futures) is ResponseFuture else new_futures
 
+        elif 'func_result_chunks' in self._call_status:
+            self._call_output = StreamedResult(self.executor_id, self.job_id, self.call_id,
+                                               int(self._call_status['func_result_chunks']),
+                                               self._storage_config)
+
         elif self._call_status['func_result_size'] == 0:
             self._produce_output = False
 
         if 'result' in self._call_status:
-            self._call_output = pickle.loads(eval(self._call_status['result']))
+            self._call_output = serializers.loads(self._call_status['result'])
             self.stats['host_result_done_tstamp'] = time.time()
             self.stats['host_result_query_count'] = 0
             logger.debug(
@@ -344,12 +471,16 @@ class ResponseFuture:
                     self._set_state(ResponseFuture.State.Error)
                     return None
 
-            self._call_output = pickle.loads(call_output)
-
-            self.stats['host_result_done_tstamp'] = time.time()
-            self.stats['host_result_query_count'] = self._output_query_count
-            logger.debug(f'ExecutorID {self.executor_id} | JobID {self.job_id} - Got output '
-                         f'from call {self.call_id} - Activation ID: {self.activation_id}')
+            self._set_call_output(call_output)
 
         self._set_state(ResponseFuture.State.Done)
         return self._call_output
+
+    def _set_call_output(self, call_output):
+        """Sets the serialized output downloaded from storage"""
+        self._call_output = serializers.loads(call_output)
+
+        self.stats['host_result_done_tstamp'] = time.time()
+        self.stats['host_result_query_count'] = self._output_query_count
+        logger.debug(f'ExecutorID {self.executor_id} | JobID {self.job_id} - Got output '
+                     f'from call {self.call_id} - Activation ID: {self.activation_id}')
@@ -167,7 +167,9 @@ class Invoker:
             'lithops_version': __version__,
             'runtime_name': job.runtime_name,
             'runtime_memory': job.runtime_memory,
-            'worker_processes': job.worker_processes
+            'worker_processes': job.worker_processes,
+            'profile': job.profile,
+            'serializer': job.serializer
         }
 
         return payload
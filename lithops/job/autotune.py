@@ -0,0 +1,146 @@
+#
+# (C) Copyright Cloudlab URV 2021
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import os
+import json
+import math
+import logging
+import statistics
+
+from lithops.constants import AUTOTUNE_DIR, AUTOTUNE_TARGET_DURATION, \
+    AUTOTUNE_MEMORY_MARGIN, AUTOTUNE_MIN_CPU
+
+logger = logging.getLogger(__name__)
+
+
+def load_profile(function_hash):
+    """
+    Loads the resource profile learned from previous runs of a function
+
+    :param function_hash: hash of the serialized function
+
+    :return: profile dictionary, or None if the function was not run before
+    """
+    profile_path = os.path.join(AUTOTUNE_DIR, f'{function_hash}.json')
+    try:
+        with open(profile_path, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def save_profile(function_hash, profile):
+    """
+    Stores the resource profile of a function in the local cache
+    """
+    os.makedirs(AUTOTUNE_DIR, exist_ok=True)
+    profile_path = os.path.join(AUTOTUNE_DIR, f'{function_hash}.json')
+    tmp_path = f'{profile_path}.{os.getpid()}'
+    with open(tmp_path, 'w') as f:
+        json.dump(profile, f)
+    os.replace(tmp_path, profile_path)
+
+
+def tune(profile, runtime_memory, total_calls, max_workers, execution_timeout):
+    """
+    Chooses the worker processes of each worker and the chunksize of each
+    invocation from the resource profile of the function. The worker
+    processes are bounded by the peak memory of the calls within the
+    runtime memory, and by their CPU usage within the cores of the worker.
+    Each worker process runs calls for about AUTOTUNE_TARGET_DURATION
+    seconds, unless that leaves workers idle.
+
+    :param profile: resource profile of the function
+    :param runtime_memory: memory of the workers in MB
+    :param total_calls: number of calls of the job
+    :param max_workers: max number of concurrent workers
+    :param execution_timeout: max execution time of the workers in seconds
+
+    :return: (worker_processes, chunksize) tuple
+    """
+    memory_limit = runtime_memory * 1024**2 * AUTOTUNE_MEMORY_MARGIN
+    memory_processes = int(memory_limit // max(profile['peak_memory'], 1))
+
+    # The number of cores of the workers usually grows with their memory
+    cores = max(1, profile['cores'] * runtime_memory / profile['runtime_memory'])
+    cpu_processes = int(cores / max(profile['cpu'], AUTOTUNE_MIN_CPU))
+
+    worker_processes = min(memory_processes, cpu_processes, profile.get('max_worker_processes', math.inf))
+    worker_processes = max(1, min(worker_processes, total_calls))
+
+    exec_time = max(profile['exec_time'], 0.001)
+    calls_per_process = max(1, min(int(AUTOTUNE_TARGET_DURATION / exec_time),
+                                   int(execution_timeout / 2 / exec_time)))
+    busy_workers_chunksize = max(worker_processes, math.ceil(total_calls / max_workers))
+    chunksize = min(worker_processes * calls_per_process, busy_workers_chunksize)
+
+    return worker_processes, chunksize
+
+
+def learn_profile(futures, function_hash, worker_processes):
+    """
+    Updates the resource profile of a function with the stats of the
+    finished calls of a job: the peak memory of each worker process, the
+    mean execution time and the mean cores used by each call. If some call
+    exceeded the runtime memory, the worker processes of the next runs are
+    halved. Once a run at the halved worker processes finishes without
+    exceeding the memory, the limit is raised by one process, and it is
+    removed after a run with more worker processes than the limit.
+
+    :param futures: futures of the job
+    :param function_hash: hash of the serialized function
+    :param worker_processes: worker processes of the job
+
+    :return: updated profile dictionary, or None if no call finished
+    """
+    profile = load_profile(function_hash) or {}
+    stats = [f.stats for f in futures if 'worker_peak_memory_end' in f.stats]
+    # The peak memory of the calls whose peak covers the whole worker process
+    # is only an upper bound, so it is only used if no call has its own peak
+    call_peaks = [s['worker_peak_memory_end'] for s in stats if not s.get('worker_peak_memory_process')]
+    peaks = call_peaks or [s['worker_peak_memory_end'] for s in stats]
+
+    max_worker_processes = profile.get('max_worker_processes')
+    if any(memory_exceeded(f) for f in futures):
+        profile['max_worker_processes'] = max(1, worker_processes // 2)
+    elif stats and max_worker_processes is not None:
+        if worker_processes > max_worker_processes:
+            del profile['max_worker_processes']
+        elif worker_processes == max_worker_processes:
+            profile['max_worker_processes'] = max_worker_processes + 1
+
+    if stats:
+        cpu_usages = [s['worker_func_cpu_usage'] for s in stats if s.get('worker_func_cpu_usage')]
+        profile.update({
+            'calls': len(stats),
+            'runtime_memory': futures[0].runtime_memory,
+            'peak_memory': max(peaks),
+            'exec_time': statistics.mean(s['worker_func_exec_time'] for s in stats),
+            'cpu': statistics.mean(sum(u) / 100 / worker_processes for u in cpu_usages) if cpu_usages else 1,
+            'cores': max(len(u) for u in cpu_usages) if cpu_usages else 1
+        })
+    elif 'peak_memory' not in profile:
+        return None
+
+    save_profile(function_hash, profile)
+    return profile
+
+
+def memory_exceeded(future):
+    """
+    Returns True if the call of a future was killed for exceeding the runtime memory
+    """
+    return future.error and future._exception[0] is MemoryError
@@ -29,8 +29,10 @@ from lithops.job.partitioner import create_partitions
 from lithops.storage.utils import create_func_key, create_data_key, \
     create_job_key, func_key_suffix
 from lithops.job.serialize import SerializeIndependent, create_module_data
+from lithops.job.autotune import load_profile, tune
+from lithops.serializers import get_serializer, get_compression
 from lithops.constants import MAX_AGG_DATA_SIZE, LOCALHOST, \
-    SERVERLESS, STANDALONE, CUSTOM_RUNTIME_DIR
+    SERVERLESS, STANDALONE, CUSTOM_RUNTIME_DIR, SERIALIZER_DEFAULT, SERIALIZER_COMPRESSION_THRESHOLD
 
 
 logger = logging.getLogger(__name__)
@@ -56,7 +58,10 @@ def create_map_job(
     extra_args=None,
     obj_chunk_size=None,
     obj_newline='\n',
-    obj_chunk_number=None
+    obj_chunk_number=None,
+    obj_balanced_chunks=False,
+    profile=False,
+    serializer=None
 ):
     """
     Wrapper to create a map job. It integrates COS logic to process objects.
@@ -73,7 +78,8 @@ def create_map_job(
                      'from object storage flow'.format(executor_id, job_id))
         map_iterdata, ppo = create_partitions(
             config, internal_storage, map_iterdata,
-            obj_chunk_size, obj_chunk_number, obj_newline
+            obj_chunk_size, obj_chunk_number, obj_newline,
+            obj_balanced_chunks
         )
         host_job_meta['host_job_create_partitions_time'] = round(time.time() - create_partitions_start, 6)
     # ########
@@ -92,7 +98,9 @@ def create_map_job(
         include_modules=include_modules,
         exclude_modules=exclude_modules,
         execution_timeout=execution_timeout,
-        host_job_meta=host_job_meta
+        host_job_meta=host_job_meta,
+        profile=profile,
+        serializer=serializer
     )
 
     if ppo:
@@ -116,7 +124,9 @@ def create_reduce_job(
     include_modules,
     exclude_modules,
     execution_timeout=None,
-    extra_args=None
+    extra_args=None,
+    profile=False,
+    serializer=None
 ):
     """
     Wrapper to create a reduce job. Apply a function across all map futures.
@@ -154,7 +164,9 @@ def create_reduce_job(
         include_modules=include_modules,
         exclude_modules=exclude_modules,
         execution_timeout=execution_timeout,
-        host_job_meta=host_job_meta
+        host_job_meta=host_job_meta,
+        profile=profile,
+        serializer=serializer
     )
 
 
@@ -172,7 +184,9 @@ def _create_job(
     exclude_modules,
     execution_timeout,
     host_job_meta,
-    chunksize=None
+    chunksize=None,
+    profile=False,
+    serializer=None
 ):
     """
     Creates a new Job
@@ -197,6 +211,16 @@ def _create_job(
     job.extra_env = ext_env
     job.function_name = func.__name__ if inspect.isfunction(func) or inspect.ismethod(func) else type(func).__name__
     job.total_calls = len(iterdata)
+    job.profile = profile
+    job.serializer = {
+        'serializer': serializer or config['lithops'].get('serializer', SERIALIZER_DEFAULT),
+        'compression': config['lithops'].get('serializer_compression'),
+        'compression_threshold': config['lithops'].get('serializer_compression_threshold',
+                                                       SERIALIZER_COMPRESSION_THRESHOLD)
+    }
+    get_serializer(job.serializer['serializer'])
+    if job.serializer['compression']:
+        get_compression(job.serializer['compression'])
 
     if mode == SERVERLESS:
         job.runtime_memory = runtime_memory or config[backend]['runtime_memory']
@@ -241,8 +265,8 @@ def _create_job(
 
     logger.debug(f'ExecutorID {executor_id} | JobID {job_id} - Serializing function and data')
     job_serialize_start = time.time()
-    serializer = SerializeIndependent(runtime_meta['preinstalls'])
-    func_and_data_ser, mod_paths = serializer([func] + iterdata, inc_modules, exc_modules)
+    job_serializer = SerializeIndependent(runtime_meta['preinstalls'], job.serializer)
+    func_and_data_ser, mod_paths = job_serializer([func] + iterdata, inc_modules, exc_modules)
     data_strs = func_and_data_ser[1:]
     data_size_bytes = sum(len(x) for x in data_strs)
     module_data = create_module_data(mod_paths)
@@ -254,6 +278,20 @@ def _create_job(
     host_job_meta['func_data_size_bytes'] = data_size_bytes
     host_job_meta['func_module_size_bytes'] = func_module_size_bytes
 
+    # Tune the worker processes and the chunksize from the previous runs of the function
+    if config['lithops'].get('autotune', False) and mode == SERVERLESS:
+        function_hash = hashlib.md5(func_str).hexdigest()
+        profile = load_profile(function_hash)
+        if profile:
+            max_workers = config[backend].get('max_workers', job.total_calls)
+            job.worker_processes, tuned_chunksize = tune(
+                profile, job.runtime_memory, job.total_calls, max_workers, job.execution_timeout
+            )
+            job.chunksize = chunksize or tuned_chunksize
+            logger.debug(f'ExecutorID {executor_id} | JobID {job_id} - Tuned from {profile["calls"]} '
+                         f'previous calls - Worker processes: {job.worker_processes} - Chunksize: {job.chunksize}')
+        job.autotune = {'function_hash': function_hash, 'worker_processes': job.worker_processes}
+
     # Check data limit
     if 'data_limit' in config['lithops']:
         data_limit = config['lithops']['data_limit']
@@ -17,7 +17,6 @@
 
 import os
 import logging
-import requests
 from concurrent.futures import ThreadPoolExecutor
 
 from lithops import utils
@@ -30,13 +29,79 @@ logger = logging.getLogger(__name__)
 CHUNK_THRESHOLD = 128 * 1024  # 128KB
 
 
+def _get_balanced_chunk_size(total_size, chunk_number):
+    """
+    Returns the target partition size of a dataset of total_size bytes,
+    so that its objects are split in about chunk_number partitions.
+    """
+    if not chunk_number or not total_size:
+        return None
+    balanced_chunk_size = -(-total_size // chunk_number)
+    logger.debug(f'Balanced chunk size set to {sizeof_fmt(balanced_chunk_size)} '
+                 f'({chunk_number} chunks over {sizeof_fmt(total_size)})')
+    return balanced_chunk_size
+
+
+def _get_obj_balanced_chunk_size(obj_size, balanced_chunk_size):
+    """
+    Returns the chunk size to split an object in the number of
+    partitions closest to obj_size / balanced_chunk_size
+    """
+    obj_parts = max(1, round(obj_size / balanced_chunk_size))
+    return -(-obj_size // obj_parts)
+
+
+def _group_small_objects(partitions, parts_per_object, balanced_chunk_size):
+    """
+    Groups the objects smaller than balanced_chunk_size in shared partitions
+    of at most balanced_chunk_size bytes. The first object of a group is the
+    object of the partition, and the rest are listed in its grouped_objects
+    attribute. Each group counts as a single object in parts_per_object.
+    """
+    grouped_partitions = []
+    grouped_parts_per_object = []
+    open_groups = []  # [params, first object, group size] per distinct iterdata params
+
+    offset = 0
+    for total_parts in parts_per_object:
+        obj_partitions = partitions[offset:offset + total_parts]
+        offset += total_parts
+
+        if total_parts != 1 or obj_partitions[0]['obj'].chunk_size >= balanced_chunk_size:
+            grouped_partitions.extend(obj_partitions)
+            grouped_parts_per_object.append(total_parts)
+            continue
+
+        partition = obj_partitions[0]
+        obj = partition['obj']
+        params = {k: v for k, v in partition.items() if k != 'obj'}
+        group = next((group for group in open_groups if group[0] == params), None)
+
+        if group is not None and group[2] + obj.chunk_size <= balanced_chunk_size:
+            group[1].grouped_objects.append(obj)
+            group[2] += obj.chunk_size
+            continue
+
+        obj.grouped_objects = []
+        if group is None:
+            open_groups.append([params, obj, obj.chunk_size])
+        else:
+            group[1], group[2] = obj, obj.chunk_size
+        grouped_partitions.append(partition)
+        grouped_parts_per_object.append(1)
+
+    logger.debug(f'Grouped {len(partitions)} partitions in {len(grouped_partitions)} balanced partitions')
+    return grouped_partitions, grouped_parts_per_object
+
+
 def create_partitions(
     config,
     internal_storage,
     map_iterdata,
     obj_chunk_size,
     obj_chunk_number,
-    obj_newline
+    obj_newline,
+    obj_balanced_chunks=False
 ):
     """
     Method that returns the function that will create
@@ -68,21 +133,24 @@ def create_partitions(
         # process objects from urls.
         return _split_objects_from_urls(
             urls, obj_chunk_size,
-            obj_chunk_number, obj_newline
+            obj_chunk_number, obj_newline,
+            obj_balanced_chunks
         )
 
     elif paths:
         # process objects from localhost paths.
         return _split_objects_from_paths(
             paths, obj_chunk_size,
-            obj_chunk_number, obj_newline
+            obj_chunk_number, obj_newline,
+            obj_balanced_chunks
         )
 
     elif objects:
         # process objects from an object store.
         return _split_objects_from_object_storage(
             objects, obj_chunk_size, obj_chunk_number,
-            internal_storage, config, obj_newline
+            internal_storage, config, obj_newline,
+            obj_balanced_chunks
         )
 
 
@@ -90,7 +158,8 @@ def _split_objects_from_urls(
     map_func_args_list,
     chunk_size,
     chunk_number,
-    obj_newline
+    obj_newline,
+    balanced_chunks=False
 ):
     """
     Create partitions from a list of objects urls
@@ -105,15 +174,27 @@ def _split_objects_from_urls(
     partitions = []
     parts_per_object = []
 
-    def _split(entry):
+    def _head(entry):
+        return utils.get_http_session().head(entry['obj'])
+
+    with ThreadPoolExecutor(64) as ex:
+        urls_metadata = list(ex.map(_head, map_func_args_list))
+
+    balanced_chunk_size = None
+    if balanced_chunks:
+        total_size = sum(int(md.headers.get('content-length', 0)) for md in urls_metadata)
+        balanced_chunk_size = _get_balanced_chunk_size(total_size, chunk_number)
+
+    def _split(entry, metadata):
         obj_size = None
         object_url = entry['obj']
-        metadata = requests.head(object_url)
 
         if 'content-length' in metadata.headers:
             obj_size = int(metadata.headers['content-length'])
 
-        if chunk_number and obj_size:
+        if balanced_chunk_size and obj_size:
+            obj_chunk_size = _get_obj_balanced_chunk_size(obj_size, balanced_chunk_size)
+        elif chunk_number and obj_size:
             chunk_rest = obj_size % chunk_number
             obj_chunk_size = (obj_size // chunk_number) + \
                 round((chunk_rest / chunk_number) + 0.5)
@@ -145,7 +226,7 @@ def _split_objects_from_urls(
                 brange = (size, size + obj_chunk_size - 1)
             elif size + obj_chunk_size < obj_size:
                 # common chunk
-                brange = (size - 1 if size > 0 else 0, size + obj_chunk_size + CHUNK_THRESHOLD)
+                brange = (size - 1 if size > 0 else 0, min(size + obj_chunk_size + CHUNK_THRESHOLD, obj_size - 1))
             else:
                 # last chunk
                 brange = (size - 1, obj_size - 1)
@@ -169,8 +250,11 @@ def _split_objects_from_urls(
         partitions.extend(obj_partitions)
         parts_per_object.append(obj_total_partitions)
 
-    with ThreadPoolExecutor(64) as ex:
-        ex.map(_split, map_func_args_list)
+    for entry, metadata in zip(map_func_args_list, urls_metadata):
+        _split(entry, metadata)
+
+    if balanced_chunk_size:
+        return _group_small_objects(partitions, parts_per_object, balanced_chunk_size)
 
     return partitions, parts_per_object
 
@@ -179,7 +263,8 @@ def _split_objects_from_paths(
     map_func_args_list,
     chunk_size,
     chunk_number,
-    obj_newline
+    obj_newline,
+    balanced_chunks=False
 ):
     """
     Create partitions from a list of objects paths
@@ -216,12 +301,19 @@ def _split_objects_from_paths(
             files.add(elem['obj'])
             new_map_func_args_list.append(elem)
 
+    balanced_chunk_size = None
+    if balanced_chunks:
+        total_size = sum(os.stat(entry['obj']).st_size for entry in new_map_func_args_list)
+        balanced_chunk_size = _get_balanced_chunk_size(total_size, chunk_number)
+
     def _split(entry):
         path = entry['obj']
         file_stats = os.stat(entry['obj'])
         obj_size = int(file_stats.st_size)
 
-        if chunk_number and obj_size:
+        if balanced_chunk_size and obj_size:
+            obj_chunk_size = _get_obj_balanced_chunk_size(obj_size, balanced_chunk_size)
+        elif chunk_number and obj_size:
             chunk_rest = obj_size % chunk_number
             obj_chunk_size = (obj_size // chunk_number) + \
                 round((chunk_rest / chunk_number) + 0.5)
@@ -250,7 +342,7 @@ def _split_objects_from_paths(
                 brange = (size, size + obj_chunk_size - 1)
             elif size + obj_chunk_size < obj_size:
                 # common chunk
-                brange = (size - 1 if size > 0 else 0, size + obj_chunk_size + CHUNK_THRESHOLD)
+                brange = (size - 1 if size > 0 else 0, min(size + obj_chunk_size + CHUNK_THRESHOLD, obj_size - 1))
             else:
                 # last chunk
                 brange = (size - 1, obj_size - 1)
@@ -277,6 +369,9 @@ def _split_objects_from_paths(
     with ThreadPoolExecutor(64) as ex:
         ex.map(_split, new_map_func_args_list)
 
+    if balanced_chunk_size:
+        return _group_small_objects(partitions, parts_per_object, balanced_chunk_size)
+
     return partitions, parts_per_object
 
 
@@ -286,7 +381,8 @@ def _split_objects_from_object_storage(
     chunk_number,
     internal_storage,
     config,
-    obj_newline
+    obj_newline,
+    balanced_chunks=False
 ):
     """
     Create partitions from a list of buckets or object keys
@@ -322,13 +418,16 @@ def _split_objects_from_object_storage(
         storage = Storage(config=config, backend=sb)
     partitions = []
     parts_per_object = []
+    balanced_chunk_size = None
 
     def _split(bucket, key, entry, obj_size):
         if key.endswith('/'):
             logger.debug(f'Discarding object "{key}" as it is a prefix folder (0.0B)')
             return
 
-        if chunk_number:
+        if balanced_chunk_size:
+            obj_chunk_size = _get_obj_balanced_chunk_size(obj_size, balanced_chunk_size)
+        elif chunk_number:
             chunk_rest = obj_size % chunk_number
             obj_chunk_size = (obj_size // chunk_number) + \
                 round((chunk_rest / chunk_number) + 0.5)
@@ -355,7 +454,7 @@ def _split_objects_from_object_storage(
                 brange = (size, size + obj_chunk_size - 1)
             elif size + obj_chunk_size < obj_size:
                 # common chunk
-                brange = (size - 1 if size > 0 else 0, size + obj_chunk_size + CHUNK_THRESHOLD)
+                brange = (size - 1 if size > 0 else 0, min(size + obj_chunk_size + CHUNK_THRESHOLD, obj_size - 1))
             else:
                 # last chunk
                 brange = (size - 1, obj_size - 1)
@@ -380,6 +479,7 @@ def _split_objects_from_object_storage(
         parts_per_object.append(obj_total_partitions)
 
     total_objects = int(0)
+    objects_to_split = []
     for elem in map_func_args_list:
         objects = []
         exclude = {'obj'}
@@ -432,10 +532,20 @@ def _split_objects_from_object_storage(
             key = dobj['Key']
             entry = {'obj': f'{sb}://{bucket}/{key}'}
             entry.update(params)
-            _split(bucket, key, entry, dobj['Size'])
+            objects_to_split.append((bucket, key, entry, dobj['Size']))
+
+    if balanced_chunks:
+        total_size = sum(obj_size for _, _, _, obj_size in objects_to_split)
+        balanced_chunk_size = _get_balanced_chunk_size(total_size, chunk_number)
+
+    for bucket, key, entry, obj_size in objects_to_split:
+        _split(bucket, key, entry, obj_size)
 
     logger.debug(f"Total objects found: {total_objects}")
     if total_objects == 0:
         raise Exception('No objects found')
 
+    if balanced_chunk_size:
+        return _group_small_objects(partitions, parts_per_object, balanced_chunk_size)
+
     return partitions, parts_per_object
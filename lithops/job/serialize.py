@@ -21,13 +21,13 @@ import glob
 import importlib
 import logging
 import inspect
-import cloudpickle
 from pathlib import Path
 from dis import Bytecode
 from functools import reduce
 from importlib import import_module
 from types import CodeType, FunctionType, ModuleType
 
+from lithops import serializers
 from lithops.libs import imp
 from lithops.libs import inspect as linspect
 from lithops.utils import bytes_to_b64str
@@ -38,8 +38,9 @@ logger = logging.getLogger(__name__)
 
 class SerializeIndependent:
 
-    def __init__(self, preinstalls):
+    def __init__(self, preinstalls, serializer=None):
         self.preinstalled_modules = preinstalls
+        self.serializer = serializer or {}
         self.preinstalled_modules.append(['lithops', True])
         self._modulemgr = None
 
@@ -53,7 +54,7 @@ class SerializeIndependent:
         mod_paths = set()
 
         for obj in list_of_objs:
-            strs.append(cloudpickle.dumps(obj))
+            strs.append(serializers.dumps(obj, **self.serializer))
 
         if include_modules is None:
             # If include_modules is explicitly set to None, no module is included
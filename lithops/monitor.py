@@ -14,7 +14,6 @@
 # limitations under the License.
 #
 
-import json
 import pika
 import logging
 import time
@@ -23,9 +22,10 @@ import pickle
 import sys
 import queue
 import threading
-import concurrent.futures as cf
 from tblib import pickling_support
 
+from lithops.serializers import loads_status
+
 pickling_support.install()
 
 logger = logging.getLogger(__name__)
@@ -250,7 +250,7 @@ class RabbitmqMonitor(Monitor):
         channel = self.connection.channel()
 
         def callback(ch, method, properties, body):
-            call_status = json.loads(body.decode("utf-8"))
+            call_status = loads_status(body)
 
             if call_status['type'] == '__init__':
                 self._tag_future_as_running(call_status)
@@ -360,32 +360,21 @@ class StorageMonitor(Monitor):
         if not fs_to_query:
             return
 
-        def get_status(f):
-            cs = self.internal_storage.get_call_status(f.executor_id, f.job_id, f.call_id)
+        call_ids = [(f.executor_id, f.job_id, f.call_id) for f in fs_to_query]
+        try:
+            calls_status = self.internal_storage.get_calls_status(call_ids, self.THREADPOOL_SIZE)
+        except Exception:
+            return
+
+        call_ids_processed = set()
+        for f, call_id, cs in zip(fs_to_query, call_ids, calls_status):
             f._status_query_count += 1
             if cs:
                 if not self._check_new_futures(cs, f):
                     f._set_ready(cs)
-                return (f.executor_id, f.job_id, f.call_id)
-            else:
-                return None
+                call_ids_processed.add(call_id)
 
-        try:
-            pool = cf.ThreadPoolExecutor(max_workers=self.THREADPOOL_SIZE)
-            call_ids_processed = set(pool.map(get_status, fs_to_query))
-            pool.shutdown()
-        except Exception:
-            pass
-
-        try:
-            call_ids_processed.remove(None)
-        except Exception:
-            pass
-
-        try:
-            self.callids_done_processed_status.update(call_ids_processed)
-        except Exception:
-            pass
+        self.callids_done_processed_status.update(call_ids_processed)
 
     def _generate_tokens(self, callids_running, callids_done):
         """
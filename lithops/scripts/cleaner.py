@@ -37,6 +37,11 @@ logging.basicConfig(stream=log_file_stream, level=logging.INFO,
                             ' [%(threadName)s] - %(funcName)s: %(message)s'))
 logger.setLevel('DEBUG')
 
+PREFIXES_CONCURRENCY = 8
+IDLE_CHECKS = 3
+IDLE_SLEEP = 0.5
+MAX_ERROR_SLEEP = 30
+
 
 def clean_executor_jobs(executor_id, executor_data):
 
@@ -56,16 +61,21 @@ def clean_executor_jobs(executor_id, executor_data):
         if not storage:
             storage = Storage(storage_config=storage_config)
 
-        for job_key in data['jobs_to_clean']:
-            prefix = '/'.join([JOBS_PREFIX, job_key]) + '/'
-            logger.debug(f"Cleaning data from {prefix}")
-            clean_bucket(storage, storage.bucket, prefix)
+        prefixes = ['/'.join([JOBS_PREFIX, job_key]) + '/' for job_key in data['jobs_to_clean']]
+        if clean_cloudobjects:
+            prefixes.extend('/'.join([TEMP_PREFIX, job_key]) + '/' for job_key in data['jobs_to_clean'])
+
+        with ThreadPoolExecutor(max_workers=max(1, min(len(prefixes), PREFIXES_CONCURRENCY))) as ex:
+            fs = []
+            for prefix in prefixes:
+                logger.debug(f"Cleaning data from {prefix}")
+                fs.append(ex.submit(clean_bucket, storage, storage.bucket, prefix))
+            # Raise the errors, so that the request file is kept and retried in the next round
+            for f in fs:
+                f.result()
 
         if clean_cloudobjects:
-            for job_key in data['jobs_to_clean']:
-                prefix = '/'.join([TEMP_PREFIX, job_key]) + '/'
-                logger.debug(f"Cleaning cloudobjects from {prefix}")
-                clean_bucket(storage, storage.bucket, prefix)
+            storage.clean_cloudobjects()
 
         if os.path.exists(file_location):
             os.remove(file_location)
@@ -81,12 +91,12 @@ def clean_cloudobjects(cloudobjects_data):
     storage_config = data['storage_config']
     storage = Storage(storage_config=storage_config)
 
+    cos_to_clean = [co for co in cos_to_clean if co.backend == storage.backend]
     for co in cos_to_clean:
-        if co.backend == storage.backend:
-            logging.info('Cleaning {}://{}/{}'.format(co.backend,
-                                                      co.bucket,
-                                                      co.key))
-            storage.delete_object(co.bucket, co.key)
+        logging.info('Cleaning {}://{}/{}'.format(co.backend,
+                                                  co.bucket,
+                                                  co.key))
+    storage.delete_cloudobjects(cos_to_clean)
 
     if os.path.exists(file_location):
         os.remove(file_location)
@@ -102,8 +112,7 @@ def clean_functions(functions_data):
     storage = Storage(storage_config=storage_config)
     prefix = '/'.join([JOBS_PREFIX, executor_id]) + '/'
     logger.info(f'Cleaning functions from {prefix}')
-    key_list = storage.list_keys(storage.bucket, prefix)
-    storage.delete_objects(storage.bucket, key_list)
+    clean_bucket(storage, storage.bucket, prefix)
 
     if os.path.exists(file_location):
         os.remove(file_location)
@@ -112,6 +121,9 @@ def clean_functions(functions_data):
 
 def clean():
 
+    idle_checks = 0
+    error_delay = IDLE_SLEEP
+
     while True:
         executor_jobs = {}
         cloudobjects = []
@@ -120,7 +132,13 @@ def clean():
         files_to_clean = os.listdir(CLEANER_DIR)
 
         if len(files_to_clean) <= 2:
-            break
+            # Wait a moment for new requests before exiting
+            if idle_checks == IDLE_CHECKS:
+                break
+            idle_checks += 1
+            time.sleep(IDLE_SLEEP)
+            continue
+        idle_checks = 0
 
         for file_name in files_to_clean:
             file_location = os.path.join(CLEANER_DIR, file_name)
@@ -143,22 +161,22 @@ def clean():
             elif 'fn_to_clean' in data:
                 functions.append({'file_location': file_location, 'data': data})
 
-        if executor_jobs:
-            with ThreadPoolExecutor(max_workers=32) as ex:
-                for executor_id in executor_jobs:
-                    ex.submit(clean_executor_jobs, executor_id, executor_jobs[executor_id])
-
-        if cloudobjects:
-            with ThreadPoolExecutor(max_workers=32) as ex:
-                for cloudobjects_data in cloudobjects:
-                    ex.submit(clean_cloudobjects, cloudobjects_data)
-
-        if functions:
-            with ThreadPoolExecutor(max_workers=32) as ex:
-                for function_data in functions:
-                    ex.submit(clean_functions, function_data)
-
-        time.sleep(5)
+        # All the executors are cleaned in parallel
+        with ThreadPoolExecutor(max_workers=32) as ex:
+            fs = [ex.submit(clean_executor_jobs, executor_id, executor_jobs[executor_id])
+                  for executor_id in executor_jobs]
+            fs.extend(ex.submit(clean_cloudobjects, cloudobjects_data) for cloudobjects_data in cloudobjects)
+            fs.extend(ex.submit(clean_functions, function_data) for function_data in functions)
+
+        errors = [f.exception() for f in fs if f.exception()]
+        if errors:
+            # The failed requests are retried in the next round
+            for e in errors:
+                logger.error(f'Error cleaning data: {e}')
+            time.sleep(error_delay)
+            error_delay = min(error_delay * 2, MAX_ERROR_SLEEP)
+        else:
+            error_delay = IDLE_SLEEP
 
 
 if __name__ == '__main__':
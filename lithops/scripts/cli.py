@@ -50,6 +50,7 @@ from lithops.constants import (
     LITHOPS_TEMP_DIR,
     RUNTIMES_PREFIX,
     JOBS_PREFIX,
+    CLOUDOBJECTS_PREFIX,
     LOCALHOST,
     SERVERLESS,
     STANDALONE,
@@ -132,6 +133,7 @@ def clean(config, backend, storage, debug, region, all):
     jobs_path = JOBS_PREFIX
     clean_bucket(storage, storage.bucket, runtimes_path, sleep=1)
     clean_bucket(storage, storage.bucket, jobs_path, sleep=1)
+    clean_bucket(storage, storage.bucket, CLOUDOBJECTS_PREFIX, sleep=1)
 
     # Clean localhost executor temp dirs
     shutil.rmtree(LITHOPS_TEMP_DIR, ignore_errors=True)
@@ -0,0 +1,464 @@
+#
+# (C) Copyright Cloudlab URV 2021
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import ast
+import zlib
+import json
+import pickle
+import struct
+import logging
+import cloudpickle
+
+from lithops.constants import OOB_BUFFER_MIN_SIZE, SERIALIZER_DEFAULT, SERIALIZER_COMPRESSION_THRESHOLD
+
+logger = logging.getLogger(__name__)
+
+# Serialized objects with out-of-band buffers are framed as:
+#   OOB_MAGIC | pickle size | number of buffers | size of each buffer | pickle | buffers
+# Plain pickles always start with the PROTO opcode, so they never match the magic.
+OOB_MAGIC = b'LTHOOB01'
+_HEADER = struct.Struct('<QI')
+_BUFFER_SIZE = struct.Struct('<Q')
+
+# Objects serialized with other serializers than pickle5, or compressed, are framed as:
+#   SERIALIZER_MAGIC | serializer name size | compression name size | serializer name | compression name | payload
+SERIALIZER_MAGIC = b'LTHSER01'
+_TAG = struct.Struct('<BB')
+
+# Call statuses are encoded as:
+#   STATUS_MAGIC | JSON size | JSON | bytes values
+# The JSON holds the fields of the status that are not bytes, and the keys and sizes of the bytes values.
+STATUS_MAGIC = b'LTHSTS01'
+_STATUS_HEADER = struct.Struct('<I')
+_LEGACY_STATUS_BYTES_KEYS = ('exc_info', 'new_futures', 'result')
+
+OOB_SUPPORTED = hasattr(pickle, 'PickleBuffer')
+
+
+def _pickle5_dumps(obj, pickler=pickle, min_buffer_size=OOB_BUFFER_MIN_SIZE):
+    """
+    Serializes an object with pickle protocol 5. The contiguous buffers of at
+    least `min_buffer_size` bytes, like the data of NumPy arrays, are not copied
+    into the pickle stream but appended after it. If there are no such buffers,
+    the result is a regular pickle.
+    """
+    if not OOB_SUPPORTED:
+        return pickler.dumps(obj)
+
+    buffers = []
+
+    def buffer_callback(pickle_buffer):
+        try:
+            buffer = pickle_buffer.raw()
+        except BufferError:
+            # Non-contiguous buffers are serialized in-band
+            return True
+        if buffer.nbytes < min_buffer_size:
+            return True
+        buffers.append(buffer)
+        return False
+
+    pickled = pickler.dumps(obj, protocol=5, buffer_callback=buffer_callback)
+    if not buffers:
+        return pickled
+
+    header = [OOB_MAGIC, _HEADER.pack(len(pickled), len(buffers))]
+    header.extend(_BUFFER_SIZE.pack(buffer.nbytes) for buffer in buffers)
+    return b''.join(header + [pickled] + buffers)
+
+
+def _parse_header(header):
+    pickle_size, num_buffers = _HEADER.unpack_from(header, len(OOB_MAGIC))
+    return pickle_size, num_buffers
+
+
+def _pickle5_loads(data):
+    """
+    Deserializes an object serialized with _pickle5_dumps(), or a regular
+    pickle. The objects are rebuilt over the out-of-band buffers without
+    copying them if `data` is writable (a bytearray), and over writable
+    copies otherwise.
+    """
+    if not OOB_SUPPORTED or bytes(data[:len(OOB_MAGIC)]) != OOB_MAGIC:
+        return pickle.loads(data)
+
+    view = memoryview(data)
+    pickle_size, num_buffers = _parse_header(view)
+    offset = len(OOB_MAGIC) + _HEADER.size
+    buffer_sizes = []
+    for _ in range(num_buffers):
+        buffer_sizes.append(_BUFFER_SIZE.unpack_from(view, offset)[0])
+        offset += _BUFFER_SIZE.size
+
+    pickled = view[offset:offset + pickle_size]
+    offset += pickle_size
+    buffers = []
+    for size in buffer_sizes:
+        buffer = view[offset:offset + size]
+        buffers.append(buffer if not view.readonly else bytearray(buffer))
+        offset += size
+
+    return pickle.loads(pickled, buffers=buffers)
+
+
+class Serializer:
+    """
+    Base class of the serializers. Serializers that only support some types
+    raise TypeError for the other objects, which are then serialized with
+    the default serializer.
+    """
+    name = None
+
+    def dumps(self, obj):
+        raise NotImplementedError
+
+    def loads(self, data):
+        raise NotImplementedError
+
+
+class Pickle5Serializer(Serializer):
+    """
+    cloudpickle with protocol 5, keeping the large buffers out-of-band
+    """
+    name = 'pickle5'
+
+    def dumps(self, obj):
+        return _pickle5_dumps(obj, pickler=cloudpickle)
+
+    def loads(self, data):
+        return _pickle5_loads(data)
+
+
+class CloudpickleSerializer(Serializer):
+    """
+    cloudpickle with its default protocol, copying all the buffers in-band
+    """
+    name = 'cloudpickle'
+
+    def dumps(self, obj):
+        return cloudpickle.dumps(obj)
+
+    def loads(self, data):
+        return pickle.loads(data)
+
+
+class MsgpackSerializer(Serializer):
+    """
+    msgpack for plain data: None, booleans, numbers, strings, bytes, lists and
+    dicts. Tuples are deserialized as lists.
+    """
+    name = 'msgpack'
+
+    def dumps(self, obj):
+        import msgpack
+        try:
+            return msgpack.packb(obj, use_bin_type=True)
+        except (OverflowError, ValueError) as e:
+            raise TypeError(str(e))
+
+    def loads(self, data):
+        import msgpack
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+
+class ArrowSerializer(Serializer):
+    """
+    Arrow IPC streams for pyarrow Tables and RecordBatches, and pandas DataFrames
+    """
+    name = 'arrow'
+    TABLE, RECORD_BATCH, DATAFRAME = b'T', b'B', b'D'
+
+    def dumps(self, obj):
+        import pyarrow as pa
+        if isinstance(obj, pa.Table):
+            kind, table = self.TABLE, obj
+        elif isinstance(obj, pa.RecordBatch):
+            kind, table = self.RECORD_BATCH, obj
+        elif type(obj).__name__ == 'DataFrame' and type(obj).__module__.startswith('pandas'):
+            kind, table = self.DATAFRAME, pa.Table.from_pandas(obj)
+        else:
+            raise TypeError(f'Arrow serializer does not support {type(obj).__name__} objects')
+
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write(table)
+        return kind + sink.getvalue().to_pybytes()
+
+    def loads(self, data):
+        import pyarrow as pa
+        view = memoryview(data)
+        kind = bytes(view[:1])
+        reader = pa.ipc.open_stream(pa.py_buffer(view[1:]))
+        if kind == self.RECORD_BATCH:
+            return reader.read_next_batch()
+        table = reader.read_all()
+        return table.to_pandas() if kind == self.DATAFRAME else table
+
+
+class Compression:
+    """
+    Base class of the compression codecs
+    """
+    name = None
+
+    def compress(self, data):
+        raise NotImplementedError
+
+    def decompress(self, data):
+        raise NotImplementedError
+
+
+class ZstdCompression(Compression):
+    name = 'zstd'
+
+    def compress(self, data):
+        import zstandard
+        return zstandard.ZstdCompressor().compress(data)
+
+    def decompress(self, data):
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress(data)
+
+
+class Lz4Compression(Compression):
+    name = 'lz4'
+
+    def compress(self, data):
+        import lz4.frame
+        return lz4.frame.compress(data)
+
+    def decompress(self, data):
+        import lz4.frame
+        return lz4.frame.decompress(data)
+
+
+class ZlibCompression(Compression):
+    name = 'zlib'
+
+    def compress(self, data):
+        return zlib.compress(data, 1)
+
+    def decompress(self, data):
+        return zlib.decompress(data)
+
+
+SERIALIZERS = {}
+COMPRESSIONS = {}
+
+
+def register_serializer(serializer):
+    """
+    Registers a serializer, an instance of a Serializer subclass, by its name.
+    Custom serializers must also be registered in the runtime of the
+    functions, for example in a module imported by them.
+
+    :param serializer: Serializer instance
+    """
+    SERIALIZERS[serializer.name] = serializer
+
+
+def register_compression(compression):
+    """
+    Registers a compression codec, an instance of a Compression subclass, by its name
+
+    :param compression: Compression instance
+    """
+    COMPRESSIONS[compression.name] = compression
+
+
+def get_serializer(name):
+    """
+    Returns a registered serializer. Raises ValueError if it does not exist.
+    """
+    if name not in SERIALIZERS:
+        raise ValueError(f"Unknown serializer '{name}'. Available serializers: {', '.join(SERIALIZERS)}")
+    return SERIALIZERS[name]
+
+
+def get_compression(name):
+    """
+    Returns a registered compression codec. Raises ValueError if it does not exist.
+    """
+    if name not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression '{name}'. Available compressions: {', '.join(COMPRESSIONS)}")
+    return COMPRESSIONS[name]
+
+
+for _serializer in (Pickle5Serializer(), CloudpickleSerializer(), MsgpackSerializer(), ArrowSerializer()):
+    register_serializer(_serializer)
+for _compression in (ZstdCompression(), Lz4Compression(), ZlibCompression()):
+    register_compression(_compression)
+
+
+def dumps(obj, serializer=SERIALIZER_DEFAULT, compression=None,
+          compression_threshold=SERIALIZER_COMPRESSION_THRESHOLD):
+    """
+    Serializes an object with a registered serializer, and compresses the result
+    if it is larger than `compression_threshold` bytes. The objects not supported
+    by the serializer are serialized with the default one.
+
+    :param obj: object to serialize
+    :param serializer: name of the serializer
+    :param compression: name of the compression codec. None to disable the compression
+    :param compression_threshold: min size in bytes of the compressed payloads
+
+    :return: serialized object
+    """
+    serializer = get_serializer(serializer or SERIALIZER_DEFAULT)
+    try:
+        payload = serializer.dumps(obj)
+    except TypeError as e:
+        if serializer.name == SERIALIZER_DEFAULT:
+            raise
+        logger.debug(f'{e} - Using the {SERIALIZER_DEFAULT} serializer')
+        serializer = get_serializer(SERIALIZER_DEFAULT)
+        payload = serializer.dumps(obj)
+
+    codec = ''
+    if compression and len(payload) >= compression_threshold:
+        codec = compression
+        payload = get_compression(compression).compress(payload)
+
+    if serializer.name == SERIALIZER_DEFAULT and not codec:
+        return payload
+
+    name = serializer.name.encode()
+    codec = codec.encode()
+    return b''.join([SERIALIZER_MAGIC, _TAG.pack(len(name), len(codec)), name, codec, payload])
+
+
+def loads(data):
+    """
+    Deserializes an object serialized with dumps(), or a regular pickle. The
+    serializer and the compression codec are read from the data.
+
+    :param data: serialized object
+
+    :return: deserialized object
+    """
+    if bytes(data[:len(SERIALIZER_MAGIC)]) != SERIALIZER_MAGIC:
+        return _pickle5_loads(data)
+
+    view = memoryview(data)
+    offset = len(SERIALIZER_MAGIC)
+    name_size, codec_size = _TAG.unpack_from(view, offset)
+    offset += _TAG.size
+    name = bytes(view[offset:offset + name_size]).decode()
+    offset += name_size
+    codec = bytes(view[offset:offset + codec_size]).decode()
+    offset += codec_size
+
+    payload = view[offset:]
+    if codec:
+        payload = get_compression(codec).decompress(payload)
+    return get_serializer(name).loads(payload)
+
+
+def _readinto(stream, view):
+    """
+    Fills a memoryview with the data of a stream
+    """
+    total = 0
+    while total < len(view):
+        if hasattr(stream, 'readinto'):
+            size = stream.readinto(view[total:])
+        else:
+            chunk = stream.read(len(view) - total)
+            size = len(chunk)
+            view[total:total + size] = chunk
+        if not size:
+            raise EOFError(f'Stream ended after {total} of {len(view)} bytes')
+        total += size
+
+
+def read_stream(stream):
+    """
+    Reads a serialized object from a stream. Objects with out-of-band buffers
+    are read with readinto() into a single preallocated bytearray, which
+    loads() uses without copying the buffers.
+
+    :param stream: file-like object
+
+    :return: serialized object, as a bytearray or as bytes
+    """
+    magic = stream.read(len(OOB_MAGIC))
+    if magic != OOB_MAGIC:
+        return magic + stream.read()
+
+    header = bytearray(len(OOB_MAGIC) + _HEADER.size)
+    header[:len(OOB_MAGIC)] = magic
+    _readinto(stream, memoryview(header)[len(OOB_MAGIC):])
+    pickle_size, num_buffers = _parse_header(header)
+
+    sizes = bytearray(num_buffers * _BUFFER_SIZE.size)
+    _readinto(stream, memoryview(sizes))
+    buffers_size = sum(size for size, in _BUFFER_SIZE.iter_unpack(sizes))
+
+    data = bytearray(len(header) + len(sizes) + pickle_size + buffers_size)
+    data[:len(header)] = header
+    data[len(header):len(header) + len(sizes)] = sizes
+    _readinto(stream, memoryview(data)[len(header) + len(sizes):])
+    return data
+
+
+def dumps_status(status):
+    """
+    Encodes a call status. The bytes values, like small results and
+    exceptions, are appended as raw bytes after the JSON of the other fields.
+
+    :param status: call status dictionary
+
+    :return: encoded status
+    """
+    fields = {}
+    binary = []
+    for key, value in status.items():
+        if isinstance(value, (bytes, bytearray)):
+            binary.append((key, value))
+        else:
+            fields[key] = value
+    fields['__binary__'] = [[key, len(value)] for key, value in binary]
+    header = json.dumps(fields, separators=(',', ':')).encode()
+    return b''.join([STATUS_MAGIC, _STATUS_HEADER.pack(len(header)), header] + [value for _, value in binary])
+
+
+def loads_status(data):
+    """
+    Decodes a call status encoded with dumps_status(), or a JSON call status
+
+    :param data: encoded status
+
+    :return: call status dictionary
+    """
+    data = bytes(data)
+    if not data.startswith(STATUS_MAGIC):
+        # The JSON statuses of previous versions kept the pickled
+        # values as the repr of their bytes
+        status = json.loads(data)
+        for key in _LEGACY_STATUS_BYTES_KEYS:
+            if isinstance(status.get(key), str):
+                status[key] = ast.literal_eval(status[key])
+        return status
+
+    offset = len(STATUS_MAGIC)
+    header_size, = _STATUS_HEADER.unpack_from(data, offset)
+    offset += _STATUS_HEADER.size
+    status = json.loads(data[offset:offset + header_size])
+    offset += header_size
+    for key, size in status.pop('__binary__'):
+        status[key] = data[offset:offset + size]
+        offset += size
+    return status
@@ -1,7 +1,9 @@
 from .storage import InternalStorage
 from .storage import Storage
+from .async_storage import AsyncStorage
 
 __all__ = [
     'InternalStorage',
-    'Storage'
+    'Storage',
+    'AsyncStorage'
 ]
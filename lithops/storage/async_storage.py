@@ -0,0 +1,233 @@
+#
+# (C) Copyright Cloudlab URV 2020
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import asyncio
+import logging
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Union, Tuple, Dict, TextIO, BinaryIO, Any
+
+from lithops.constants import BULK_OPS_CONCURRENCY
+from lithops.storage.storage import Storage
+from lithops.storage import utils
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncStorage:
+    """
+    An AsyncStorage object exposes the Storage API as coroutines. The
+    calls run in a thread pool over a regular Storage instance.
+    """
+
+    def __init__(self, config=None, backend=None, storage_config=None,
+                 max_workers=BULK_OPS_CONCURRENCY):
+        """ Creates an AsyncStorage instance
+
+        :param config: lithops configuration dict
+        :param backend: storage backend name
+        :param storage_config: storage configuration dict
+        :param max_workers: Max number of threads that run the calls
+
+        :return: AsyncStorage instance.
+        """
+        self.storage = Storage(config=config, backend=backend, storage_config=storage_config)
+        self.config = self.storage.config
+        self.backend = self.storage.backend
+        self.bucket = self.storage.bucket
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    async def _run(self, method, *args, **kwargs):
+        """
+        Runs a synchronous Storage method in the thread pool
+        """
+        # get_running_loop() requires Python 3.7
+        loop = asyncio.get_event_loop()
+        func = functools.partial(getattr(self.storage, method), *args, **kwargs)
+        return await loop.run_in_executor(self._executor, func)
+
+    async def put_object(self, bucket: str, key: str,
+                         body: Union[str, bytes, TextIO, BinaryIO]):
+        """
+        Adds an object to a bucket of the storage backend.
+
+        :param bucket: Name of the bucket
+        :param key: Key of the object
+        :param body: Object data
+        """
+        return await self._run('put_object', bucket, key, body)
+
+    async def get_object(self,
+                         bucket: str,
+                         key: str,
+                         stream: Optional[bool] = False,
+                         extra_get_args: Optional[Dict] = {}) -> Union[bytes, BinaryIO]:
+        """
+        Retrieves objects from the storage backend.
+
+        :param bucket: Name of the bucket
+        :param key: Key of the object
+        :param stream: Get the object data or a file-like object
+        :param extra_get_args: Extra get arguments to be passed to the underlying backend implementation (dict).
+
+        :return: Object, as a binary array or as a file-like stream if parameter `stream` is enabled
+        """
+        return await self._run('get_object', bucket, key, stream, extra_get_args)
+
+    async def head_object(self, bucket: str, key: str) -> Dict:
+        """
+        Retrieves metadata from an object without returning the object itself.
+
+        :param bucket: Name of the bucket
+        :param key: Key of the object
+
+        :return: Object metadata
+        """
+        return await self._run('head_object', bucket, key)
+
+    async def delete_object(self, bucket: str, key: str):
+        """
+        Removes objects from the storage backend.
+
+        :param bucket: Name of the bucket
+        :param key: Key of the object
+        """
+        return await self._run('delete_object', bucket, key)
+
+    async def delete_objects(self, bucket: str, key_list: List[str]):
+        """
+        Removes multiple objects from the storage backend.
+
+        :param bucket: Name of the bucket
+        :param key_list: List of object keys
+        """
+        return await self._run('delete_objects', bucket, key_list)
+
+    async def list_objects(self,
+                           bucket: str,
+                           prefix: Optional[str] = None,
+                           match_pattern: Optional[str] = None) -> List[Dict]:
+        """
+        Returns all of the object keys in a bucket. For each object, the list contains the name
+        of the object (key) and the size.
+
+        :param bucket: Name of the bucket
+        :param prefix: Key prefix for filtering
+
+        :return: List of dicts containing the object key and size in bytes
+        """
+        return await self._run('list_objects', bucket, prefix, match_pattern)
+
+    async def list_keys(self, bucket: str, prefix: Optional[str] = None) -> List[str]:
+        """
+        Returns all of the object keys in a bucket.
+
+        :param bucket: Name of the bucket
+        :param prefix: Key prefix for filtering
+
+        :return: List of object keys
+        """
+        return await self._run('list_keys', bucket, prefix)
+
+    async def get_objects(self,
+                          bucket: str,
+                          keys: List[str],
+                          extra_get_args: Optional[List[Dict]] = None,
+                          missing_ok: Optional[bool] = False) -> List[bytes]:
+        """
+        Retrieves multiple objects from the storage backend.
+
+        :param bucket: Name of the bucket
+        :param keys: List of object keys
+        :param extra_get_args: List with the extra get arguments of each key
+        :param missing_ok: Return None for the keys that do not exist instead of raising StorageNoSuchKeyError
+
+        :return: List of objects data in the same order than `keys`
+        """
+        return await self._run('get_objects', bucket, keys, extra_get_args, True, missing_ok)
+
+    async def put_objects(self,
+                          bucket: str,
+                          objects: Union[Dict[str, Any], List[Tuple[str, Any]]]):
+        """
+        Adds multiple objects to a bucket of the storage backend.
+
+        :param bucket: Name of the bucket
+        :param objects: Dict of {key: body}, or list of (key, body) tuples
+        """
+        return await self._run('put_objects', bucket, objects)
+
+    async def head_objects(self,
+                           bucket: str,
+                           keys: List[str],
+                           missing_ok: Optional[bool] = False) -> List[Dict]:
+        """
+        Retrieves the metadata of multiple objects.
+
+        :param bucket: Name of the bucket
+        :param keys: List of object keys
+        :param missing_ok: Return None for the keys that do not exist instead of raising StorageNoSuchKeyError
+
+        :return: List of objects metadata in the same order than `keys`
+        """
+        return await self._run('head_objects', bucket, keys, True, missing_ok)
+
+    async def put_cloudobject(self,
+                              body: Union[str, bytes, TextIO, BinaryIO],
+                              bucket: Optional[str] = None,
+                              key: Optional[str] = None,
+                              content_addressed: Optional[bool] = False) -> utils.CloudObject:
+        """
+        Put a CloudObject into storage.
+
+        :param body: Data content, can be a string or byte array or a text/bytes file-like object
+        :param bucket: Destination bucket
+        :param key: Destination key
+        :param content_addressed: Derive the key from a hash of the body, and skip the upload if the object already exists
+
+        :return: CloudObject instance
+        """
+        loop = asyncio.get_event_loop()
+        func = functools.partial(self.storage.put_cloudobject, body, bucket, key, content_addressed)
+        return await loop.run_in_executor(self._executor, func)
+
+    async def get_cloudobject(self,
+                              cloudobject: utils.CloudObject,
+                              stream: Optional[bool] = False) -> Union[bytes, BinaryIO]:
+        """
+        Get a CloudObject's content from storage.
+
+        :param cloudobject: CloudObject instance
+        :param stream: Get the object data or a file-like object
+
+        :return: Cloud object content
+        """
+        if cloudobject.backend != self.backend:
+            raise Exception("CloudObject: Invalid Storage backend")
+        return await self.get_object(cloudobject.bucket, cloudobject.key, stream=stream)
+
+    async def close(self):
+        """
+        Releases the thread pool
+        """
+        self._executor.shutdown(wait=False)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
@@ -201,6 +201,40 @@ class IBMCloudObjectStorageBackend:
                 retries += 1
         return data
 
+    def create_multipart_upload(self, bucket_name, key):
+        """
+        Starts a multipart upload.
+        :return: upload id
+        """
+        res = self.cos_client.create_multipart_upload(Bucket=bucket_name, Key=key)
+        return res['UploadId']
+
+    def upload_part(self, bucket_name, key, upload_id, part_number, data):
+        """
+        Uploads one part of a multipart upload. All parts except the last one must be >= 5MiB.
+        :return: part info to pass to complete_multipart_upload()
+        """
+        res = self.cos_client.upload_part(
+            Bucket=bucket_name, Key=key, UploadId=upload_id,
+            PartNumber=part_number, Body=data
+        )
+        return {'PartNumber': part_number, 'ETag': res['ETag']}
+
+    def complete_multipart_upload(self, bucket_name, key, upload_id, parts):
+        """
+        Completes a multipart upload.
+        """
+        self.cos_client.complete_multipart_upload(
+            Bucket=bucket_name, Key=key, UploadId=upload_id,
+            MultipartUpload={'Parts': parts}
+        )
+
+    def abort_multipart_upload(self, bucket_name, key, upload_id):
+        """
+        Aborts a multipart upload and removes the uploaded parts.
+        """
+        self.cos_client.abort_multipart_upload(Bucket=bucket_name, Key=key, UploadId=upload_id)
+
     def upload_file(self, file_name, bucket, key=None, extra_args={}, config=None):
         """Upload a file to an S3 bucket
 
@@ -338,17 +372,23 @@ class IBMCloudObjectStorageBackend:
         :return: List of keys in bucket that match the given prefix.
         :rtype: list of str
         """
+        return [key for page in self.list_keys_pages(bucket_name, prefix) for key in page]
+
+    def list_keys_pages(self, bucket_name, prefix=None):
+        """
+        Yield the keys for the given prefix, one list per listing page.
+        :param bucket_name: Name of the bucket.
+        :param prefix: Prefix to filter object names.
+        :return: Generator of lists of keys that match the given prefix.
+        """
         try:
             prefix = '' if prefix is None else prefix
             paginator = self.cos_client.get_paginator('list_objects_v2')
             page_iterator = paginator.paginate(Bucket=bucket_name, Prefix=prefix)
 
-            key_list = []
             for page in page_iterator:
                 if 'Contents' in page:
-                    for item in page['Contents']:
-                        key_list.append(item['Key'])
-            return key_list
+                    yield [item['Key'] for item in page['Contents']]
         except ibm_botocore.exceptions.ClientError as e:
             if e.response['Error']['Code'] == '404':
                 raise StorageNoSuchKeyError(bucket_name, prefix)
@@ -16,9 +16,10 @@
 
 import os
 import io
-import glob
+import uuid
 import shutil
 import logging
+from lithops.utils import is_unix_system, MmapStreamingBody
 from lithops.storage.utils import StorageNoSuchKeyError
 from lithops.constants import LITHOPS_TEMP_DIR
 from lithops.constants import STORAGE_CLI_MSG
@@ -26,6 +27,9 @@ from lithops.constants import STORAGE_CLI_MSG
 
 logger = logging.getLogger(__name__)
 
+# Temporary files must be in the same filesystem as the buckets to be atomically renamed
+STORAGE_TMP_DIR = os.path.join(LITHOPS_TEMP_DIR, 'localhost-storage-tmp')
+
 
 class LocalhostStorageBackend:
     """
@@ -72,15 +76,64 @@ class LocalhostStorageBackend:
         file_path = os.path.join(LITHOPS_TEMP_DIR, bucket_name, key)
         os.makedirs(os.path.dirname(file_path), exist_ok=True)
 
-        if data_type == bytes:
-            with open(file_path, "wb") as f:
-                f.write(data)
-        elif hasattr(data, 'read'):
-            with open(file_path, "wb") as f:
-                shutil.copyfileobj(data, f, 1024 * 1024)
-        else:
-            with open(file_path, "w") as f:
-                f.write(data)
+        # Write to a temporary file and rename it, so that readers that
+        # memory-mapped the previous version of the object are not affected
+        os.makedirs(STORAGE_TMP_DIR, exist_ok=True)
+        tmp_file_path = os.path.join(STORAGE_TMP_DIR, uuid.uuid4().hex)
+        try:
+            if data_type == bytes:
+                with open(tmp_file_path, "wb") as f:
+                    f.write(data)
+            elif hasattr(data, 'read'):
+                with open(tmp_file_path, "wb") as f:
+                    shutil.copyfileobj(data, f, 1024 * 1024)
+            else:
+                with open(tmp_file_path, "w") as f:
+                    f.write(data)
+            os.replace(tmp_file_path, file_path)
+        finally:
+            if os.path.exists(tmp_file_path):
+                os.remove(tmp_file_path)
+
+    def create_multipart_upload(self, bucket_name, key):
+        """
+        Starts a multipart upload. Parts are written to a temporary
+        directory until the upload is completed.
+        :return: upload id
+        """
+        upload_id = uuid.uuid4().hex
+        os.makedirs(os.path.join(STORAGE_TMP_DIR, upload_id))
+        return upload_id
+
+    def upload_part(self, bucket_name, key, upload_id, part_number, data):
+        """
+        Uploads one part of a multipart upload.
+        :return: part info to pass to complete_multipart_upload()
+        """
+        part_path = os.path.join(STORAGE_TMP_DIR, upload_id, str(part_number))
+        with open(part_path, 'wb') as f:
+            f.write(data)
+        return part_path
+
+    def complete_multipart_upload(self, bucket_name, key, upload_id, parts):
+        """
+        Concatenates the uploaded parts into the final object
+        """
+        file_path = os.path.join(LITHOPS_TEMP_DIR, bucket_name, key)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        tmp_file_path = os.path.join(STORAGE_TMP_DIR, upload_id, 'object')
+        with open(tmp_file_path, 'wb') as out:
+            for part_path in parts:
+                with open(part_path, 'rb') as part:
+                    shutil.copyfileobj(part, out, 1024 * 1024)
+        os.replace(tmp_file_path, file_path)
+        self.abort_multipart_upload(bucket_name, key, upload_id)
+
+    def abort_multipart_upload(self, bucket_name, key, upload_id):
+        """
+        Removes the uploaded parts
+        """
+        shutil.rmtree(os.path.join(STORAGE_TMP_DIR, upload_id), ignore_errors=True)
 
     def get_object(self, bucket_name, key, stream=False, extra_get_args={}):
         """
@@ -90,21 +143,20 @@ class LocalhostStorageBackend:
         :return: Data of the object
         :rtype: str/bytes
         """
-        buffer = None
+        file_path = os.path.join(LITHOPS_TEMP_DIR, bucket_name, key)
+        first_byte, last_byte = 0, None
+        if 'Range' in extra_get_args:
+            byte_range = extra_get_args['Range'].replace('bytes=', '')
+            first_byte, last_byte = map(int, byte_range.split('-'))
+
         try:
-            file_path = os.path.join(LITHOPS_TEMP_DIR, bucket_name, key)
+            if stream and is_unix_system():
+                return MmapStreamingBody(file_path, first_byte, last_byte)
+
             with open(file_path, "rb") as f:
-                if 'Range' in extra_get_args:
-                    byte_range = extra_get_args['Range'].replace('bytes=', '')
-                    first_byte, last_byte = map(int, byte_range.split('-'))
-                    f.seek(first_byte)
-                    buffer = io.BytesIO(f.read(last_byte - first_byte + 1))
-                else:
-                    buffer = io.BytesIO(f.read())
-            if stream:
-                return buffer
-            else:
-                return buffer.read()
+                f.seek(first_byte)
+                data = f.read() if last_byte is None else f.read(last_byte - first_byte + 1)
+            return io.BytesIO(data) if stream else data
         except Exception:
             raise StorageNoSuchKeyError(os.path.join(LITHOPS_TEMP_DIR, bucket_name), key)
 
@@ -164,8 +216,10 @@ class LocalhostStorageBackend:
         file_path = os.path.join(LITHOPS_TEMP_DIR, bucket_name, key)
         if os.path.isfile(file_path):
             # Imitate the COS/S3 response
+            file_stats = os.stat(file_path)
             return {
-                'content-length': str(os.stat(file_path).st_size)
+                'content-length': str(file_stats.st_size),
+                'etag': f'"{file_stats.st_mtime_ns:x}-{file_stats.st_size:x}"'
             }
 
         raise StorageNoSuchKeyError(os.path.join(LITHOPS_TEMP_DIR, bucket_name), key)
@@ -199,12 +253,48 @@ class LocalhostStorageBackend:
         :param bucket: bucket name
         :param key_list: list of keys
         """
+        base_dir = os.path.join(LITHOPS_TEMP_DIR, bucket_name, '')
         dirs = set()
         for key in key_list:
-            file_dir = os.path.dirname(key)
-            dirs.add(file_dir)
-            # dirs.add("/".join(file_dir.split("/", 2)[:2]))
-            self.delete_object(bucket_name, key)
+            file_path = os.path.join(base_dir, key)
+            try:
+                os.remove(file_path)
+            except OSError:
+                pass
+            dirs.add(os.path.dirname(file_path))
+        self._remove_empty_dirs(base_dir, dirs)
+
+    def delete_prefix(self, bucket_name, prefix):
+        """
+        Delete all the objects of a prefix. Prefixes ending with '/'
+        are deleted as a whole directory tree.
+        :param bucket: bucket name
+        :param prefix: prefix of the keys
+        """
+        base_dir = os.path.join(LITHOPS_TEMP_DIR, bucket_name, '')
+        prefix_dir = os.path.join(base_dir, prefix)
+        if prefix.endswith('/') and os.path.isdir(prefix_dir):
+            shutil.rmtree(prefix_dir, ignore_errors=True)
+            self._remove_empty_dirs(base_dir, {os.path.dirname(prefix_dir.rstrip('/'))})
+        else:
+            self.delete_objects(bucket_name, [key for key, _ in self._scan(bucket_name, prefix)])
+
+    def _remove_empty_dirs(self, base_dir, dirs):
+        """
+        Removes the empty directories and their empty parents, deepest first,
+        but not the bucket itself
+        """
+        parents = set()
+        for dir_path in dirs:
+            while dir_path.startswith(base_dir) and len(dir_path) > len(base_dir):
+                parents.add(dir_path)
+                dir_path = os.path.dirname(dir_path)
+
+        for dir_path in sorted(parents, key=len, reverse=True):
+            try:
+                os.rmdir(dir_path)
+            except OSError:
+                pass
 
     def head_bucket(self, bucket_name):
         """
@@ -225,15 +315,10 @@ class LocalhostStorageBackend:
         :return: List of objects in bucket that match the given prefix.
         :rtype: list of str
         """
-        obj_list = []
-        base_dir = os.path.join(LITHOPS_TEMP_DIR, bucket_name, '')
-
-        for key in self.list_keys(bucket_name, prefix):
-            file_name = os.path.join(base_dir, key)
-            size = os.stat(file_name).st_size
-            obj_list.append({'Key': key, 'Size': size})
-
-        return obj_list
+        return [
+            {'Key': key, 'Size': entry.stat().st_size}
+            for key, entry in self._scan(bucket_name, prefix)
+        ]
 
     def list_keys(self, bucket_name, prefix=None):
         """
@@ -243,23 +328,29 @@ class LocalhostStorageBackend:
         :return: List of keys in bucket that match the given prefix.
         :rtype: list of str
         """
-        key_list = []
-        base_dir = os.path.join(LITHOPS_TEMP_DIR, bucket_name, '')
-
-        if prefix:
-            if prefix.endswith('/'):
-                roots = [os.path.join(base_dir, prefix, '**')]
-            else:
-                roots = [
-                    os.path.join(base_dir, prefix + '*'),
-                    os.path.join(base_dir, prefix + '*', '**'),
-                ]
-        else:
-            roots = [os.path.join(base_dir, '**')]
-
-        for root in roots:
-            for file_name in glob.glob(root, recursive=True):
-                if os.path.isfile(file_name):
-                    key_list.append(file_name.replace(base_dir, '').replace('\\', '/'))
+        return [key for key, _ in self._scan(bucket_name, prefix)]
 
-        return key_list
+    def _scan(self, bucket_name, prefix=None):
+        """
+        Yields the (key, DirEntry) of the files that match the prefix. Only the
+        directory of the prefix and its matching subdirectories are walked.
+        """
+        prefix = prefix or ''
+        key_dir, _, name_prefix = prefix.rpartition('/')
+        key_dir = key_dir + '/' if key_dir else ''
+        scan_dir = os.path.join(LITHOPS_TEMP_DIR, bucket_name, key_dir)
+
+        def walk(dir_path, dir_key, name_prefix=''):
+            try:
+                entries = list(os.scandir(dir_path))
+            except (FileNotFoundError, NotADirectoryError):
+                return
+            for entry in entries:
+                if not entry.name.startswith(name_prefix):
+                    continue
+                if entry.is_dir():
+                    yield from walk(entry.path, dir_key + entry.name + '/')
+                elif entry.is_file():
+                    yield dir_key + entry.name, entry
+
+        yield from walk(scan_dir, key_dir, name_prefix)
@@ -17,15 +17,84 @@
 import os
 import io
 import copy
+import json
+import uuid
 import redis
 import shutil
 import logging
+import collections
 from lithops.storage.utils import StorageNoSuchKeyError
 from lithops.constants import STORAGE_CLI_MSG
 
 
 logger = logging.getLogger(__name__)
 
+CHUNK_SIZE = 4 * 1024**2  # 4MiB
+STREAM_WINDOW = 1024**2  # 1MiB
+CHUNKS_PER_PIPELINE = 4
+CHUNKS_SUFFIX = '.__lithops_chunks__'
+MANIFEST_HEADER = b'\x00lithops.chunked.object\x00'
+MANIFEST_MAX_SIZE = 512
+
+# Adds each member to its parent dir set, from the lowest to the highest
+# level, and stops as soon as a member already exists, since then the
+# higher dirs already exist
+DIR_INDEX_SCRIPT = """
+for i = 1, #KEYS do
+    if redis.call('SADD', KEYS[i], ARGV[i]) == 0 then
+        return i
+    end
+end
+return 0
+"""
+
+
+class RedisStreamingBody(io.RawIOBase):
+    """
+    Read-only stream over a list of (redis_key, first_byte, last_byte) parts.
+    Each part is read in windows of STREAM_WINDOW bytes with GETRANGE. If
+    last_byte is None, the part is read until the end of the value. Otherwise,
+    a part shorter than expected raises StorageNoSuchKeyError, as the object
+    was deleted or overwritten while it was read.
+    """
+    def __init__(self, client, parts, data=b'', bucket=None, key=None):
+        self._client = client
+        self._parts = collections.deque(parts)
+        self._data = data
+        self._bucket = bucket
+        self._key = key
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        if self._data:
+            n = min(len(b), len(self._data))
+            b[:n] = self._data[:n]
+            self._data = self._data[n:]
+            return n
+
+        while self._parts and len(b):
+            redis_key, first_byte, last_byte = self._parts[0]
+            window_last = first_byte + min(len(b), STREAM_WINDOW) - 1
+            if last_byte is not None:
+                window_last = min(window_last, last_byte)
+            if window_last < first_byte:
+                self._parts.popleft()
+                continue
+            data = self._client.getrange(redis_key, first_byte, window_last)
+            if len(data) < window_last - first_byte + 1 and last_byte is not None:
+                raise StorageNoSuchKeyError(self._bucket, self._key)
+            if len(data) < window_last - first_byte + 1 or window_last == last_byte:
+                self._parts.popleft()
+            else:
+                self._parts[0] = (redis_key, window_last + 1, last_byte)
+            if data:
+                b[:len(data)] = data
+                return len(data)
+
+        return 0
+
 
 class RedisBackend:
     def __init__(self, config):
@@ -33,11 +102,16 @@ class RedisBackend:
         self.config = config
         self.user_agent = self.config['user_agent']
         self.host = self.config['host']
+        self.chunk_size = self.config.get('chunk_size', CHUNK_SIZE)
 
         redis_config = copy.deepcopy(config)
         redis_config.pop('storage_bucket')
         redis_config.pop('user_agent')
+        redis_config.pop('chunk_size', None)
+        for key in [k for k in redis_config if k.startswith('storage_cache')]:
+            redis_config.pop(key)
         self._client = redis.Redis(**redis_config)
+        self._dir_index = self._client.register_script(DIR_INDEX_SCRIPT)
 
         msg = STORAGE_CLI_MSG.format('Redis')
         logger.info(f"{msg} - Host: {self.host}")
@@ -48,35 +122,188 @@ class RedisBackend:
     def put_object(self, bucket_name, key, data):
         """
         Put an object in Redis. Override the object if the key already exists.
+        Objects larger than chunk_size are split in several keys.
         :param bucket_name: bucket name
         :param key: key of the object.
         :param data: data of the object
-        :type data: str/bytes
+        :type data: str/bytes/file-like object
         :return: None
         """
-        if not isinstance(data, (str, bytes, bytearray)):
-            raise TypeError(type(data), 'valid types: {}'.format((str, bytes, bytearray)))
+        if isinstance(data, str):
+            data = data.encode()
+
+        if hasattr(data, 'read'):
+            first_chunk = self._read_chunk(data)
+            second_chunk = self._read_chunk(data) if len(first_chunk) == self.chunk_size else b''
+            if second_chunk:
+                def chunks():
+                    yield first_chunk
+                    yield second_chunk
+                    chunk = self._read_chunk(data)
+                    while chunk:
+                        yield chunk
+                        chunk = self._read_chunk(data)
+                return self._put_chunked(bucket_name, key, chunks())
+            data = first_chunk
+
+        elif not isinstance(data, (bytes, bytearray, memoryview)):
+            raise TypeError(type(data), 'valid types: {}'.format((str, bytes, bytearray, 'file-like object')))
+
+        elif len(data) > self.chunk_size:
+            view = memoryview(data)
+            chunks = (view[i:i + self.chunk_size] for i in range(0, len(data), self.chunk_size))
+            return self._put_chunked(bucket_name, key, chunks)
+
+        self._set_values(bucket_name, [(key, data)])
+
+    def put_objects(self, bucket_name, objects):
+        """
+        Put multiple objects in Redis. Small objects are written
+        with a single MSET in one pipeline.
+        :param bucket_name: bucket name
+        :param objects: list of (key, data) tuples
+        :return: None
+        """
+        small_objects = []
+        for key, data in objects:
+            if isinstance(data, str):
+                data = data.encode()
+            if isinstance(data, (bytes, bytearray)) and len(data) <= self.chunk_size:
+                small_objects.append((key, data))
+            else:
+                self.put_object(bucket_name, key, data)
 
+        if small_objects:
+            self._set_values(bucket_name, small_objects)
+
+    def _read_chunk(self, data_stream):
+        """
+        Reads chunk_size bytes from a file-like object, or less at the end of the stream
+        """
+        buffer = []
+        size = 0
+        while size < self.chunk_size:
+            data = data_stream.read(self.chunk_size - size)
+            if not data:
+                break
+            if isinstance(data, str):
+                data = data.encode()
+            buffer.append(data)
+            size += len(data)
+        return b''.join(buffer)
+
+    def _chunk_key(self, redis_key, chunk_id, index):
+        """
+        Chunks are stored next to the key of their object, so that
+        deleting the prefix of the object also deletes its chunks
+        """
+        return f'{redis_key}{CHUNKS_SUFFIX}/{chunk_id}/{index}'
+
+    def _put_chunked(self, bucket_name, key, chunks):
+        """
+        Writes the chunks in new keys, and then the manifest of the object.
+        At most CHUNKS_PER_PIPELINE chunks are kept in memory.
+        """
         redis_key = self._format_key(bucket_name, key)
-        components = redis_key.split('/')
+        chunk_id = uuid.uuid4().hex
+        size = 0
+        pipeline = self._client.pipeline(False)
+        for index, chunk in enumerate(chunks):
+            pipeline.set(self._chunk_key(redis_key, chunk_id, index), bytes(chunk))
+            size += len(chunk)
+            if (index + 1) % CHUNKS_PER_PIPELINE == 0:
+                pipeline.execute()
+        pipeline.execute()
+
+        manifest = {'id': chunk_id, 'size': size, 'chunk_size': self.chunk_size}
+        logger.debug(f'PUT Object {key} - Size: {size} - Chunks: {-(-size // self.chunk_size)}')
+        self._set_values(bucket_name, [(key, MANIFEST_HEADER + json.dumps(manifest).encode())])
+
+    def _set_values(self, bucket_name, objects):
+        """
+        Sets the values of the keys and updates the dir index in one pipeline.
+        The chunks of the overwritten chunked objects are deleted afterwards.
+        """
+        redis_keys = [self._format_key(bucket_name, key) for key, _ in objects]
 
-        # NOTE: could use a lua script and add from the lowest
-        # to the highest dir and stop when SADD returns 0 since
-        # then we can assume higher dirs already exist
         pipeline = self._client.pipeline(False)
+        for redis_key in redis_keys:
+            pipeline.getrange(redis_key, 0, MANIFEST_MAX_SIZE - 1)
+        pipeline.mset({redis_key: data for redis_key, (_, data) in zip(redis_keys, objects)})
+        for redis_key in redis_keys:
+            dirs, members = self._dir_index_entries(redis_key)
+            self._dir_index(keys=dirs, args=members, client=pipeline)
+        results = pipeline.execute()
 
-        # create parent dirs
-        for i in range(1, len(components) - 1):
-            loc = '/'.join(components[:i]) + '/'
-            pipeline.sadd(loc, components[i] + '/')
+        self._delete_chunks(redis_keys, results[:len(redis_keys)])
 
-        # add file to lowest dir
-        loc = '/'.join(components[:-1]) + '/'
-        pipeline.sadd(loc, components[-1])
+    def _dir_index_entries(self, redis_key):
+        """
+        Returns the dir keys and members of a key, from the lowest level to the highest
+        """
+        components = redis_key.split('/')
+        dirs = ['/'.join(components[:-1]) + '/']
+        members = [components[-1]]
+        for i in range(len(components) - 2, 0, -1):
+            dirs.append('/'.join(components[:i]) + '/')
+            members.append(components[i] + '/')
+        return dirs, members
+
+    def _get_manifest(self, header):
+        if header and header.startswith(MANIFEST_HEADER):
+            return json.loads(header[len(MANIFEST_HEADER):])
+        return None
+
+    def _delete_chunks(self, redis_keys, headers):
+        """
+        Deletes the chunks of the objects whose values started with the given headers
+        """
+        chunk_keys = []
+        for redis_key, header in zip(redis_keys, headers):
+            manifest = self._get_manifest(header)
+            if manifest:
+                total_chunks = -(-manifest['size'] // manifest['chunk_size'])
+                chunk_keys.extend(self._chunk_key(redis_key, manifest['id'], i) for i in range(total_chunks))
+        for i in range(0, len(chunk_keys), 1000):
+            self._client.delete(*chunk_keys[i:i + 1000])
+
+    def _chunk_parts(self, redis_key, manifest, first_byte, last_byte):
+        """
+        Returns the (chunk_key, first_byte, last_byte) parts that contain the given byte range
+        """
+        chunk_size = manifest['chunk_size']
+        parts = []
+        for index in range(first_byte // chunk_size, last_byte // chunk_size + 1):
+            chunk_first = index * chunk_size
+            parts.append((
+                self._chunk_key(redis_key, manifest['id'], index),
+                max(first_byte, chunk_first) - chunk_first,
+                min(last_byte, chunk_first + chunk_size - 1) - chunk_first
+            ))
+        return parts
+
+    def _read_parts(self, bucket_name, key, parts):
+        """
+        Reads the given parts in a single round trip. Raises StorageNoSuchKeyError
+        if a chunk was deleted, as the object was overwritten while it was read.
+        """
+        pipeline = self._client.pipeline(False)
+        for chunk_key, first_byte, last_byte in parts:
+            pipeline.getrange(chunk_key, first_byte, last_byte)
+        data = b''.join(pipeline.execute())
+        if len(data) < sum(last_byte - first_byte + 1 for _, first_byte, last_byte in parts):
+            raise StorageNoSuchKeyError(bucket_name, key)
+        return data
 
-        # set actual key
-        pipeline.set(redis_key, data)
-        pipeline.execute()
+    def _absolute_range(self, bytes_range, size):
+        """
+        Converts a 'L-H', 'L-' or '-N' byte range into absolute first and last bytes
+        """
+        first, last = bytes_range.split('-', 1)
+        if not first:
+            return max(size - int(last), 0), size - 1
+        last_byte = min(int(last), size - 1) if last else size - 1
+        return int(first), last_byte
 
     def get_object(self, bucket_name, key, stream=False, extra_get_args={}):
         """
@@ -87,26 +314,80 @@ class RedisBackend:
         :return: Data of the object
         :rtype: str/bytes
         """
-
         redis_key = self._format_key(bucket_name, key)
-        try:
-            if 'Range' in extra_get_args:  # expected format: Range='bytes=L-H'
-                bytes_range = extra_get_args.pop('Range')[6:]
-                start, end = self._parse_range(bytes_range)
-                data = self._client.getrange(redis_key, start, end)
-            else:
-                data = self._client.get(redis_key)
 
+        if 'Range' not in extra_get_args and not stream:
+            data = self._client.get(redis_key)
+            if data is None:
+                raise StorageNoSuchKeyError(bucket_name, key)
+            manifest = self._get_manifest(data[:MANIFEST_MAX_SIZE])
+            if manifest:
+                data = self._read_parts(bucket_name, key, self._chunk_parts(redis_key, manifest, 0, manifest['size'] - 1))
+            return data
+
+        # Get the object size and header, and in case of plain values also
+        # the requested range, in a single round trip
+        bytes_range = extra_get_args.get('Range', 'bytes=0-')[6:]  # expected format: Range='bytes=L-H'
+        pipeline = self._client.pipeline(False)
+        pipeline.exists(redis_key)
+        pipeline.strlen(redis_key)
+        pipeline.getrange(redis_key, 0, (STREAM_WINDOW if stream else MANIFEST_MAX_SIZE) - 1)
+        first, _, last = bytes_range.partition('-')
+        if not stream and first and last:
+            pipeline.getrange(redis_key, int(first), int(last))
+        try:
+            exists, size, header, *data = pipeline.execute()
         except redis.exceptions.ResponseError:
             raise StorageNoSuchKeyError(bucket_name, key)
 
-        if data is None:
+        if not exists:
             raise StorageNoSuchKeyError(bucket_name, key)
 
-        if stream:
-            return io.BytesIO(data)
-        else:
-            return data
+        manifest = self._get_manifest(header[:MANIFEST_MAX_SIZE])
+        if manifest:
+            size = manifest['size']
+        first_byte, last_byte = self._absolute_range(bytes_range, size)
+
+        if manifest:
+            parts = self._chunk_parts(redis_key, manifest, first_byte, last_byte) if first_byte <= last_byte else []
+            if not stream:
+                return self._read_parts(bucket_name, key, parts)
+            return io.BufferedReader(RedisStreamingBody(self._client, parts, bucket=bucket_name, key=key), STREAM_WINDOW)
+
+        if data:
+            return data[0]
+
+        if first_byte == 0 and last_byte < len(header):
+            data = header[:last_byte + 1]
+            return io.BytesIO(data) if stream else data
+
+        if not stream:
+            return self._client.getrange(redis_key, first_byte, last_byte)
+
+        parts = [(redis_key, max(first_byte, len(header)), last_byte)]
+        data = header[first_byte:last_byte + 1]
+        return io.BufferedReader(RedisStreamingBody(self._client, parts, data, bucket_name, key), STREAM_WINDOW)
+
+    def get_objects(self, bucket_name, keys):
+        """
+        Get multiple objects from Redis with a single MGET.
+        :param bucket_name: bucket name
+        :param keys: list of keys
+        :return: List with the data of each object, or None if it does not exist
+        """
+        if not keys:
+            return []
+        redis_keys = [self._format_key(bucket_name, key) for key in keys]
+        results = self._client.mget(redis_keys)
+        for i, data in enumerate(results):
+            manifest = self._get_manifest(data[:MANIFEST_MAX_SIZE] if data else None)
+            if manifest:
+                parts = self._chunk_parts(redis_keys[i], manifest, 0, manifest['size'] - 1)
+                try:
+                    results[i] = self._read_parts(bucket_name, keys[i], parts)
+                except StorageNoSuchKeyError:
+                    results[i] = None
+        return results
 
     def upload_file(self, file_name, bucket, key=None, extra_args={}, config=None):
         """Upload a file
@@ -163,14 +444,29 @@ class RedisBackend:
         :return: Data of the object
         :rtype: dict
         """
-        redis_key = self._format_key(bucket_name, key)
-        try:
-            meta = self._client.debug_object(redis_key)
-        except redis.exceptions.ResponseError:
+        size = self._get_sizes([self._format_key(bucket_name, key)])[0]
+        if size is None:
             raise StorageNoSuchKeyError(bucket_name, key)
 
-        meta['content-length'] = meta['serializedlength'] - 1
-        return meta
+        return {'content-length': str(size)}
+
+    def _get_sizes(self, redis_keys):
+        """
+        Returns the size of each object, or None if it does not exist
+        """
+        pipeline = self._client.pipeline(False)
+        for redis_key in redis_keys:
+            pipeline.exists(redis_key)
+            pipeline.strlen(redis_key)
+            pipeline.getrange(redis_key, 0, MANIFEST_MAX_SIZE - 1)
+        results = pipeline.execute()
+
+        sizes = []
+        for i in range(0, len(results), 3):
+            exists, size, header = results[i:i + 3]
+            manifest = self._get_manifest(header)
+            sizes.append((manifest['size'] if manifest else size) if exists else None)
+        return sizes
 
     def delete_object(self, bucket_name, key):
         """
@@ -187,8 +483,12 @@ class RedisBackend:
         :param key_list: list of keys
         """
         redis_key_list = [self._format_key(bucket_name, k) for k in key_list]
+        if not redis_key_list:
+            return
 
         pipeline = self._client.pipeline(False)
+        for redis_key in redis_key_list:
+            pipeline.getrange(redis_key, 0, MANIFEST_MAX_SIZE - 1)
         pipeline.delete(*redis_key_list)
 
         for full_path in redis_key_list:
@@ -196,7 +496,41 @@ class RedisBackend:
             pdir = '/'.join(components[:-1]) + '/'
             pipeline.srem(pdir, components[-1])
 
-        pipeline.execute()
+        results = pipeline.execute()
+        self._delete_chunks(redis_key_list, results[:len(redis_key_list)])
+
+    def delete_prefix(self, bucket_name, prefix):
+        """
+        Deletes all the keys of a prefix with SCAN, including the chunks
+        of the chunked objects and the chunks left by interrupted puts.
+        :param bucket_name: bucket name
+        :param prefix: prefix of the keys
+        :return: number of deleted objects
+        """
+        redis_prefix = self._format_key(bucket_name, prefix)
+        pattern = ''.join('\\' + c if c in '*?[]\\' else c for c in redis_prefix) + '*'
+
+        total_objects = 0
+        batch = []
+        for redis_key in self._client.scan_iter(match=pattern, count=1000):
+            redis_key = redis_key.decode()
+            batch.append(redis_key)
+            if not redis_key.endswith('/') and CHUNKS_SUFFIX + '/' not in redis_key:
+                total_objects += 1
+            if len(batch) == 1000:
+                self._client.delete(*batch)
+                batch = []
+        if batch:
+            self._client.delete(*batch)
+
+        # Remove the deleted keys and dirs from the parent dir of the prefix
+        components = redis_prefix.split('/')
+        pdir = '/'.join(components[:-1]) + '/'
+        members = [m for m in self._client.smembers(pdir) if m.decode().startswith(components[-1])]
+        if members:
+            self._client.srem(pdir, *members)
+
+        return total_objects
 
     def head_bucket(self, bucket_name):
         """
@@ -216,10 +550,9 @@ class RedisBackend:
         :return: List of objects in bucket that match the given prefix.
         :rtype: list of dict
         """
-        pipeline = self._client.pipeline(False)
-        for key in self.list_keys(bucket_name, prefix):
-            pipeline.get(self._format_key(bucket_name, key))
-        return pipeline.execute()
+        keys = self.list_keys(bucket_name, prefix)
+        sizes = self._get_sizes([self._format_key(bucket_name, key) for key in keys])
+        return [{'Key': key, 'Size': size} for key, size in zip(keys, sizes) if size is not None]
 
     def list_keys(self, bucket_name, prefix=None):
         """
@@ -262,23 +595,3 @@ class RedisBackend:
 
     def _format_key(self, bucket, key):
         return '/'.join([bucket, key])
-
-    def _parse_range(self, bytes_range):
-        if '--' in bytes_range:
-            bytes_range = bytes_range.replace('--', '-')
-            sign = -1
-        else:
-            sign = 1
-
-        if '-' in bytes_range:
-            bytes_range = bytes_range.split('-')
-            if bytes_range[0] == '':
-                end = int(bytes_range[1]) * -1
-                start = end
-            else:
-                start = int(bytes_range[0])
-                end = int(bytes_range[1]) * sign
-        else:
-            start = end = int(bytes_range)
-
-        return start, end
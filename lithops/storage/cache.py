@@ -0,0 +1,235 @@
+#
+# (C) Copyright Cloudlab URV 2020
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import os
+import io
+import json
+import time
+import uuid
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class CachedStreamingBody(io.RawIOBase):
+    """
+    Read-only stream over the byte range [first_byte, last_byte] of a cached
+    object, that reads its blocks one by one as they are consumed
+    """
+    def __init__(self, cache, bucket, key, meta, first_byte, last_byte):
+        self._cache = cache
+        self._bucket = bucket
+        self._key = key
+        self._meta = meta
+        self._pos = first_byte
+        self._last_byte = last_byte
+        self._data = b''
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        if not self._data:
+            if self._pos > self._last_byte:
+                return 0
+            block = self._pos // self._cache.block_size
+            block_first = block * self._cache.block_size
+            data = self._cache._get_block(self._bucket, self._key, self._meta, block)
+            self._data = data[self._pos - block_first:self._last_byte - block_first + 1]
+            self._pos = block_first + len(data)
+            if not self._data:
+                return 0
+        n = min(len(b), len(self._data))
+        b[:n] = self._data[:n]
+        self._data = self._data[n:]
+        return n
+
+
+class StorageCache:
+    """
+    Read-through cache of storage objects on the local disk.
+
+    Objects are stored in blocks of block_size bytes, so that ranged reads
+    only download and keep the blocks they need. Blocks are keyed by backend,
+    bucket, key and ETag, and the ETag of an object is validated with a HEAD
+    request at most every `ttl` seconds. The objects of the backends that do
+    not return an ETag or Last-Modified header are not cached. The cache directory can be shared by
+    all the processes of the same machine: files are written atomically and
+    the least recently used blocks are evicted when the cache exceeds max_size.
+    """
+
+    def __init__(self, storage_handler, backend, cache_dir, max_size, ttl, block_size):
+        self.storage_handler = storage_handler
+        self.backend = backend
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.ttl = ttl
+        self.block_size = block_size
+
+        self.meta_dir = os.path.join(cache_dir, 'meta')
+        self.blocks_dir = os.path.join(cache_dir, 'blocks')
+        self.tmp_dir = os.path.join(cache_dir, 'tmp')
+        for path in (self.meta_dir, self.blocks_dir, self.tmp_dir):
+            os.makedirs(path, exist_ok=True)
+
+        self._written = max_size
+        self._lock = threading.Lock()
+
+    def _hash(self, *args):
+        return hashlib.sha1('/'.join(args).encode()).hexdigest()
+
+    def _write_file(self, path, data):
+        tmp_path = os.path.join(self.tmp_dir, uuid.uuid4().hex)
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _get_object_meta(self, bucket, key):
+        """
+        Returns the ETag and size of an object, validating the
+        cached values with a HEAD request once they expire. Returns
+        None if the backend does not return an ETag or Last-Modified
+        header, since then an overwrite can not be detected.
+        """
+        meta_path = os.path.join(self.meta_dir, self._hash(self.backend, bucket, key))
+        try:
+            if time.time() - os.path.getmtime(meta_path) < self.ttl:
+                with open(meta_path, 'r') as f:
+                    return json.load(f)
+        except (OSError, ValueError):
+            pass
+
+        headers = self.storage_handler.head_object(bucket, key)
+        headers = {k.lower(): v for k, v in headers.items()}
+        etag = headers.get('etag') or headers.get('last-modified')
+        if not etag:
+            return None
+        meta = {'etag': str(etag).strip('"'), 'size': int(headers['content-length'])}
+        self._write_file(meta_path, json.dumps(meta).encode())
+
+        return meta
+
+    def _get_block(self, bucket, key, meta, block):
+        """
+        Returns the data of a block, downloading it if it is not in the cache
+        """
+        block_dir = os.path.join(self.blocks_dir, self._hash(self.backend, bucket, key, meta['etag']))
+        block_path = os.path.join(block_dir, str(block))
+        try:
+            with open(block_path, 'rb') as f:
+                data = f.read()
+            os.utime(block_path)
+            return data
+        except FileNotFoundError:
+            pass
+
+        first_byte = block * self.block_size
+        last_byte = min(first_byte + self.block_size, meta['size']) - 1
+        extra_get_args = {'Range': f'bytes={first_byte}-{last_byte}'}
+        data = self.storage_handler.get_object(bucket, key, extra_get_args=extra_get_args)
+
+        os.makedirs(block_dir, exist_ok=True)
+        self._write_file(block_path, data)
+        self._evict(len(data))
+
+        return data
+
+    def _evict(self, written):
+        """
+        Removes the least recently used blocks when the cache is full.
+        The cache directory is only scanned after writing 10% of its size.
+        """
+        with self._lock:
+            self._written += written
+            if self._written < self.max_size // 10:
+                return
+            self._written = 0
+
+        blocks = []
+        total_size = 0
+        for block_dir in os.scandir(self.blocks_dir):
+            try:
+                for entry in os.scandir(block_dir.path):
+                    stat = entry.stat()
+                    blocks.append((stat.st_mtime, stat.st_size, entry.path))
+                    total_size += stat.st_size
+            except OSError:
+                continue
+
+        if total_size <= self.max_size:
+            return
+
+        logger.debug(f'Storage cache full ({total_size}B) - Evicting blocks')
+        for _, size, path in sorted(blocks):
+            try:
+                os.remove(path)
+                os.rmdir(os.path.dirname(path))
+            except OSError:
+                pass
+            total_size -= size
+            if total_size <= self.max_size:
+                break
+
+    def get_object(self, bucket, key, stream=False, extra_get_args={}):
+        """
+        Gets an object, or a byte range of it, through the cache
+        """
+        meta = self._get_object_meta(bucket, key)
+        if meta is None:
+            return self.storage_handler.get_object(bucket, key, stream, extra_get_args)
+
+        first_byte, last_byte = 0, meta['size'] - 1
+        if 'Range' in extra_get_args:
+            byte_range = extra_get_args['Range'].replace('bytes=', '')
+            first, last = byte_range.split('-')
+            if not first:
+                # Suffix range with the last N bytes
+                first_byte = max(meta['size'] - int(last), 0)
+            else:
+                first_byte = int(first)
+                last_byte = min(int(last), last_byte) if last else last_byte
+
+        if stream:
+            return io.BufferedReader(CachedStreamingBody(self, bucket, key, meta, first_byte, last_byte),
+                                     self.block_size)
+
+        chunks = []
+        for block in range(first_byte // self.block_size, last_byte // self.block_size + 1):
+            data = self._get_block(bucket, key, meta, block)
+            block_first = block * self.block_size
+            chunks.append(data[max(first_byte - block_first, 0):last_byte - block_first + 1])
+        return b''.join(chunks)
+
+    def invalidate_prefix(self, bucket, prefix):
+        """
+        Forces the validation of all the cached objects of a prefix in the next read.
+        The metadata files are named after a hash of the object, so the keys of the
+        prefix are listed from the storage backend.
+        """
+        for key in self.storage_handler.list_keys(bucket, prefix):
+            self.invalidate(bucket, key)
+
+    def invalidate(self, bucket, key):
+        """
+        Forces the validation of the object in the next read
+        """
+        meta_path = os.path.join(self.meta_dir, self._hash(self.backend, bucket, key))
+        try:
+            os.remove(meta_path)
+        except FileNotFoundError:
+            pass
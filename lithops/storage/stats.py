@@ -0,0 +1,271 @@
+#
+# (C) Copyright Cloudlab URV 2020
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import time
+import copy
+import bisect
+import functools
+import threading
+
+from lithops.storage.utils import StorageNoSuchKeyError
+
+# Upper bounds in milliseconds of the latency histogram buckets. The last
+# bucket counts the operations slower than the last bound.
+LATENCY_BUCKETS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000]
+
+# Backend operations that are recorded
+INSTRUMENTED_OPS = {
+    'put_object', 'get_object', 'head_object', 'delete_object', 'delete_objects',
+    'list_objects', 'list_keys', 'head_bucket', 'create_bucket', 'upload_file',
+    'download_file', 'get_objects', 'put_objects', 'create_multipart_upload',
+    'upload_part', 'complete_multipart_upload', 'abort_multipart_upload', 'delete_prefix'
+}
+
+
+class StorageStats:
+    """
+    Thread-safe counters of the storage operations of a process, labelled by
+    backend and operation. For each label it keeps the number of operations,
+    errors, missing keys and retries, the transferred bytes, and a latency
+    histogram.
+    """
+
+    def __init__(self):
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _get_op_stats(self, backend, op):
+        if backend not in self._stats:
+            self._stats[backend] = {}
+        if op not in self._stats[backend]:
+            self._stats[backend][op] = {
+                'count': 0, 'errors': 0, 'not_found': 0, 'retries': 0, 'bytes': 0, 'time': 0.0,
+                'min_time': None, 'max_time': 0.0,
+                'histogram': [0] * (len(LATENCY_BUCKETS) + 1)
+            }
+        return self._stats[backend][op]
+
+    def record(self, backend, op, latency, nbytes=0, error=False, not_found=False):
+        """
+        Records an operation and its latency in seconds
+        """
+        bucket = bisect.bisect_left(LATENCY_BUCKETS, latency * 1000)
+        with self._lock:
+            op_stats = self._get_op_stats(backend, op)
+            op_stats['count'] += 1
+            op_stats['errors'] += int(error)
+            op_stats['not_found'] += int(not_found)
+            op_stats['bytes'] += nbytes
+            op_stats['time'] += latency
+            op_stats['max_time'] = max(op_stats['max_time'], latency)
+            op_stats['min_time'] = latency if op_stats['min_time'] is None else min(op_stats['min_time'], latency)
+            op_stats['histogram'][bucket] += 1
+
+    def record_retry(self, backend, op):
+        """
+        Records a retry of an operation
+        """
+        with self._lock:
+            self._get_op_stats(backend, op)['retries'] += 1
+
+    def get(self, backend=None):
+        """
+        Returns a copy of the stats of all the backends, or only of one backend
+        """
+        with self._lock:
+            if backend:
+                return copy.deepcopy(self._stats.get(backend, {}))
+            return copy.deepcopy(self._stats)
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+
+
+STORAGE_STATS = StorageStats()
+
+# StorageStats of the call run by each thread, in which its storage
+# operations are also recorded
+_call_stats = threading.local()
+
+
+def set_call_stats(stats):
+    """
+    Sets the StorageStats where the storage operations of the current
+    thread are also recorded, apart from STORAGE_STATS
+
+    :param stats: StorageStats of the call, or None
+
+    :return: the previous StorageStats of the thread
+    """
+    previous = getattr(_call_stats, 'stats', None)
+    _call_stats.stats = stats
+    return previous
+
+
+def bind_call_stats(func):
+    """
+    Wraps a function submitted to a thread pool, so that its storage
+    operations are recorded in the StorageStats of the submitting thread
+    """
+    stats = getattr(_call_stats, 'stats', None)
+    if stats is None:
+        return func
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        previous = set_call_stats(stats)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            set_call_stats(previous)
+
+    return wrapper
+
+
+def record(backend, op, latency, nbytes=0, error=False, not_found=False):
+    """
+    Records an operation in STORAGE_STATS and in the stats of the call of the current thread
+    """
+    STORAGE_STATS.record(backend, op, latency, nbytes, error, not_found)
+    stats = getattr(_call_stats, 'stats', None)
+    if stats is not None:
+        stats.record(backend, op, latency, nbytes, error, not_found)
+
+
+def record_retry(backend, op):
+    """
+    Records a retry in STORAGE_STATS and in the stats of the call of the current thread
+    """
+    STORAGE_STATS.record_retry(backend, op)
+    stats = getattr(_call_stats, 'stats', None)
+    if stats is not None:
+        stats.record_retry(backend, op)
+
+
+def summarize_storage_stats(stats):
+    """
+    Returns the total requests, errors, transferred bytes and latency of a
+    stats dict, as returned by StorageStats.get()
+    """
+    summary = {'requests': 0, 'errors': 0, 'bytes': 0, 'time': 0.0}
+    for ops in stats.values():
+        for op_stats in ops.values():
+            summary['requests'] += op_stats['count']
+            summary['errors'] += op_stats['errors']
+            summary['bytes'] += op_stats['bytes']
+            summary['time'] += op_stats['time']
+    return summary
+
+
+def merge_storage_stats(stats_list):
+    """
+    Merges several stats dicts, as returned by StorageStats.get(), into one
+    """
+    merged = {}
+    for stats in stats_list:
+        for backend, ops in stats.items():
+            for op, op_stats in ops.items():
+                if op not in merged.setdefault(backend, {}):
+                    merged[backend][op] = copy.deepcopy(op_stats)
+                    continue
+                m = merged[backend][op]
+                for key in ('count', 'errors', 'not_found', 'retries', 'bytes', 'time'):
+                    m[key] += op_stats[key]
+                m['max_time'] = max(m['max_time'], op_stats['max_time'])
+                if op_stats['min_time'] is not None:
+                    m['min_time'] = op_stats['min_time'] if m['min_time'] is None \
+                        else min(m['min_time'], op_stats['min_time'])
+                m['histogram'] = [a + b for a, b in zip(m['histogram'], op_stats['histogram'])]
+    return merged
+
+
+# Position of the data argument of the operations that upload data
+DATA_ARGS = {'put_object': (2, 'data'), 'upload_part': (4, 'data'), 'put_objects': (1, 'objects')}
+
+
+def _data_size(data):
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return len(data)
+    if isinstance(data, str):
+        return len(data.encode())
+    if isinstance(data, dict):
+        return sum(_data_size(item) for item in data.values())
+    if isinstance(data, list):
+        return sum(_data_size(item[1] if isinstance(item, tuple) else item) for item in data)
+    return 0
+
+
+class InstrumentedStorageBackend:
+    """
+    Wraps a storage backend instance, recording the latency, errors and
+    transferred bytes of its operations in STORAGE_STATS, and in the stats
+    of the call of the current thread. Streams returned
+    by get_object(stream=True) are not counted in the transferred bytes.
+    """
+
+    def __init__(self, storage_handler, backend):
+        self._storage_handler = storage_handler
+        self._backend = backend
+
+    def __getattr__(self, name):
+        if name in ('_storage_handler', '_backend'):
+            raise AttributeError(name)
+        attr = getattr(self._storage_handler, name)
+        if name == 'list_keys_pages':
+            return functools.wraps(attr)(functools.partial(self._list_keys_pages, attr))
+        if name not in INSTRUMENTED_OPS or not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        def instrumented_op(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = attr(*args, **kwargs)
+            except StorageNoSuchKeyError:
+                record(self._backend, name, time.perf_counter() - start, not_found=True)
+                raise
+            except Exception:
+                record(self._backend, name, time.perf_counter() - start, error=True)
+                raise
+            if name in DATA_ARGS:
+                position, kwarg = DATA_ARGS[name]
+                nbytes = _data_size(args[position] if len(args) > position else kwargs.get(kwarg))
+            elif name in ('get_object', 'get_objects'):
+                nbytes = _data_size(result)
+            else:
+                nbytes = 0
+            record(self._backend, name, time.perf_counter() - start, nbytes)
+            return result
+
+        return instrumented_op
+
+    def _list_keys_pages(self, list_keys_pages, *args, **kwargs):
+        """
+        Records the request of each listing page
+        """
+        pages = list_keys_pages(*args, **kwargs)
+        while True:
+            start = time.perf_counter()
+            try:
+                page = next(pages)
+            except StopIteration:
+                return
+            except Exception:
+                record(self._backend, 'list_keys_pages', time.perf_counter() - start, error=True)
+                raise
+            record(self._backend, 'list_keys_pages', time.perf_counter() - start)
+            yield page
@@ -17,14 +17,26 @@
 
 import os
 import json
+import zlib
+import pickle
+import time
+import hashlib
+import shutil
 import logging
 import itertools
+import threading
 import importlib
-from typing import Optional, List, Union, Tuple, Dict, TextIO, BinaryIO, Any
-
-from lithops.constants import CACHE_DIR, RUNTIMES_PREFIX, JOBS_PREFIX, TEMP_PREFIX
-from lithops.utils import is_lithops_worker
+from concurrent.futures import ThreadPoolExecutor, wait, as_completed, FIRST_COMPLETED
+from typing import Optional, List, Union, Tuple, Dict, TextIO, BinaryIO, Any, Iterator
+
+from lithops.constants import CACHE_DIR, RUNTIMES_PREFIX, JOBS_PREFIX, TEMP_PREFIX, CLOUDOBJECTS_PREFIX, CLOUDOBJECTS_TTL, \
+    TRANSFER_CONCURRENCY, TRANSFER_PART_SIZE, BULK_OPS_CONCURRENCY, STORAGE_CACHE_DIR, STORAGE_CACHE_SIZE, \
+    STORAGE_CACHE_TTL, STORAGE_CACHE_BLOCK_SIZE, DELETE_BATCH_SIZE, DELETE_CONCURRENCY
+from lithops import serializers
+from lithops.utils import is_lithops_worker, ParallelRangeStreamingBody
 from lithops.storage import utils
+from lithops.storage.cache import StorageCache
+from lithops.storage.stats import STORAGE_STATS, InstrumentedStorageBackend, bind_call_stats
 from lithops.config import extract_storage_config, default_storage_config
 
 logger = logging.getLogger(__name__)
@@ -32,6 +44,30 @@ logger = logging.getLogger(__name__)
 
 RUNTIME_META_CACHE = {}
 COBJECTS_INDEX = itertools.count()
+COBJECTS_UPLOADED = set()
+
+STORAGE_HANDLERS = {}
+STORAGE_HANDLERS_LOCK = threading.Lock()
+VALIDATED_BUCKETS = set()
+
+
+def get_storage_handler(backend, backend_config):
+    """
+    Returns a storage backend handler shared by all the Storage instances
+    of this process created with the same backend configuration
+    """
+    handler_key = (os.getpid(), backend, json.dumps(backend_config, sort_keys=True, default=str))
+
+    with STORAGE_HANDLERS_LOCK:
+        if handler_key not in STORAGE_HANDLERS:
+            module_location = f'lithops.storage.backends.{backend}'
+            sb_module = importlib.import_module(module_location)
+            StorageBackend = getattr(sb_module, 'StorageBackend')
+            STORAGE_HANDLERS[handler_key] = InstrumentedStorageBackend(StorageBackend(backend_config), backend)
+        else:
+            logger.debug(f'Reusing {backend} storage client')
+
+    return handler_key, STORAGE_HANDLERS[handler_key]
 
 
 class Storage:
@@ -60,10 +96,9 @@ class Storage:
         self.backend = self.config['backend']
 
         try:
-            module_location = f'lithops.storage.backends.{self.backend}'
-            sb_module = importlib.import_module(module_location)
-            StorageBackend = getattr(sb_module, 'StorageBackend')
-            self.storage_handler = StorageBackend(self.config[self.backend])
+            self.handler_key, self.storage_handler = get_storage_handler(
+                self.backend, self.config[self.backend]
+            )
         except Exception as e:
             logger.error("An exception was produced trying to create the "
                          f"'{self.backend}' storage backend")
@@ -72,6 +107,122 @@ class Storage:
         bucket = self.config[self.backend].get('storage_bucket')
         self.bucket = bucket or self.storage_handler.generate_bucket_name()
 
+        self.transfer_concurrency = self.config.get('transfer_concurrency', TRANSFER_CONCURRENCY)
+        self.transfer_part_size = self.config.get('transfer_part_size', TRANSFER_PART_SIZE)
+        self.cloudobjects_ttl = self.config.get('cloudobjects_ttl', CLOUDOBJECTS_TTL)
+
+        # Backend section keys take precedence over the lithops section ones
+        cache_config = {k: v for k, v in self.config.items() if k.startswith('storage_cache')}
+        cache_config.update({k: v for k, v in self.config[self.backend].items() if k.startswith('storage_cache')})
+        self.cache = None
+        if cache_config.get('storage_cache'):
+            self.cache = StorageCache(
+                self.storage_handler, self.backend,
+                cache_dir=STORAGE_CACHE_DIR,
+                max_size=cache_config.get('storage_cache_size', STORAGE_CACHE_SIZE),
+                ttl=cache_config.get('storage_cache_ttl', STORAGE_CACHE_TTL),
+                block_size=STORAGE_CACHE_BLOCK_SIZE
+            )
+
+    def _job_key(self, key):
+        """
+        Job status, output and stats objects are small and read only once,
+        unlike the user objects and the cloudobjects
+        """
+        return key.startswith(JOBS_PREFIX) and not key.startswith(TEMP_PREFIX)
+
+    def _cacheable(self, key):
+        return self.cache is not None and not self._job_key(key)
+
+    def _parallel_transfers(self):
+        return self.transfer_concurrency > 1
+
+    def _multipart_supported(self):
+        return self._parallel_transfers() and \
+            hasattr(self.storage_handler, 'create_multipart_upload')
+
+    def _iter_parts(self, body):
+        """
+        Yields the body in parts of transfer_part_size bytes
+        """
+        part_size = self.transfer_part_size
+        if isinstance(body, str):
+            body = body.encode()
+        if isinstance(body, (bytes, bytearray, memoryview)):
+            for i in range(0, len(body), part_size):
+                yield bytes(body[i:i + part_size])
+            return
+        while True:
+            data = body.read(part_size)
+            if not data:
+                return
+            yield data.encode() if isinstance(data, str) else data
+
+    def _multipart_upload(self, bucket, key, parts):
+        """
+        Uploads the parts concurrently. At most transfer_concurrency
+        parts are kept in memory at the same time
+        """
+        upload_id = self.storage_handler.create_multipart_upload(bucket, key)
+        try:
+            futures = []
+            with ThreadPoolExecutor(max_workers=self.transfer_concurrency) as pool:
+                for part_number, data in enumerate(parts, start=1):
+                    pending = [f for f in futures if not f.done()]
+                    if len(pending) >= self.transfer_concurrency:
+                        wait(pending, return_when=FIRST_COMPLETED)
+                    futures.append(pool.submit(
+                        bind_call_stats(self.storage_handler.upload_part),
+                        bucket, key, upload_id, part_number, data
+                    ))
+            uploaded_parts = [f.result() for f in futures]
+            self.storage_handler.complete_multipart_upload(bucket, key, upload_id, uploaded_parts)
+        except Exception as e:
+            self.storage_handler.abort_multipart_upload(bucket, key, upload_id)
+            raise e
+
+    def _bulk_map(self, func, keys, args_list, ordered, missing_ok, max_workers=None):
+        """
+        Applies func(key, args) to every key with a thread pool. Returns the
+        results in order, or yields (key, result) tuples as they complete
+        """
+        def call(key, args):
+            try:
+                return func(key, args)
+            except utils.StorageNoSuchKeyError:
+                if missing_ok:
+                    return None
+                raise
+
+        call = bind_call_stats(call)
+        max_workers = max(1, min(len(keys), max_workers or BULK_OPS_CONCURRENCY))
+
+        def completed():
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                futures = {pool.submit(call, key, args): key for key, args in zip(keys, args_list)}
+                for future in as_completed(futures):
+                    yield futures[future], future.result()
+
+        if not ordered:
+            return completed()
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            return list(pool.map(call, keys, args_list))
+
+    def _parallel_get(self, bucket, key, obj_size):
+        """
+        Returns a file-like object that downloads the object with
+        concurrent range requests
+        """
+        def fetch_range(first_byte, last_byte):
+            extra_get_args = {'Range': f'bytes={first_byte}-{last_byte}'}
+            return self.storage_handler.get_object(bucket, key, extra_get_args=extra_get_args)
+
+        return ParallelRangeStreamingBody(
+            bind_call_stats(fetch_range), 0, obj_size - 1,
+            self.transfer_part_size, self.transfer_concurrency
+        )
+
     def get_client(self) -> object:
         """
         Retrieves the underlying storage client.
@@ -80,6 +231,18 @@ class Storage:
         """
         return self.storage_handler.get_client()
 
+    def get_stats(self) -> Dict:
+        """
+        Retrieves the stats of the operations made to this storage backend by
+        all the Storage instances of this process. For each operation it contains
+        the number of requests, errors, missing keys and retries, the transferred
+        bytes, the total, min and max latency in seconds, and a latency histogram
+        with the buckets of lithops.storage.stats.LATENCY_BUCKETS (in ms).
+
+        :return: Dict of stats by operation
+        """
+        return STORAGE_STATS.get(self.backend)
+
     def get_storage_config(self) -> Dict:
         """
         Retrieves the configuration of this storage handler.
@@ -106,6 +269,17 @@ class Storage:
         :param key: Key of the object
         :param body: Object data
         """
+        if self._cacheable(key):
+            self.cache.invalidate(bucket, key)
+
+        if self._multipart_supported():
+            parts = self._iter_parts(body)
+            first_part = next(parts, b'')
+            if len(first_part) == self.transfer_part_size:
+                return self._multipart_upload(bucket, key, itertools.chain([first_part], parts))
+            if hasattr(body, 'read'):
+                body = first_part
+
         return self.storage_handler.put_object(bucket, key, body)
 
     def get_object(self,
@@ -127,9 +301,111 @@ class Storage:
 
         :return: Object, as a binary array or as a file-like stream if parameter `stream` is enabled
         """
+        if self._cacheable(key):
+            return self.cache.get_object(bucket, key, stream, extra_get_args)
+
+        if stream and self._parallel_transfers() and 'Range' not in extra_get_args \
+           and not self._job_key(key):
+            # The size of the object is needed to split it in ranges
+            obj_size = int(self.head_object(bucket, key)['content-length'])
+            if obj_size > self.transfer_part_size:
+                return self._parallel_get(bucket, key, obj_size)
+
         return self.storage_handler.get_object(
             bucket, key, stream, extra_get_args)
 
+    def get_objects(self,
+                    bucket: str,
+                    keys: List[str],
+                    extra_get_args: Optional[List[Dict]] = None,
+                    ordered: Optional[bool] = True,
+                    missing_ok: Optional[bool] = False,
+                    max_workers: Optional[int] = None
+                    ) -> Union[List[bytes], Iterator[Tuple[str, bytes]]]:
+        """
+        Retrieves multiple objects from the storage backend, using the native bulk operation
+        of the backend when available, or concurrent requests otherwise.
+
+        :param bucket: Name of the bucket
+        :param keys: List of object keys
+        :param extra_get_args: List with the extra get arguments of each key. For example, to read different
+            byte-ranges of the same object: ``keys=['obj', 'obj'], extra_get_args=[{'Range': 'bytes=0-99'}, {'Range': 'bytes=100-199'}]``.
+        :param ordered: Return the objects in the same order than `keys`. If False, return an iterator of
+            (key, data) tuples as the objects are downloaded
+        :param missing_ok: Return None for the keys that do not exist instead of raising StorageNoSuchKeyError
+        :param max_workers: Max number of concurrent requests. Default 64
+
+        :return: List of objects data, or an iterator of (key, data) tuples if `ordered` is False
+        """
+        keys = list(keys)
+        args_list = extra_get_args or [{}] * len(keys)
+
+        if not extra_get_args and hasattr(self.storage_handler, 'get_objects') \
+           and not any(map(self._cacheable, keys)):
+            results = self.storage_handler.get_objects(bucket, keys)
+            if not missing_ok:
+                for key, data in zip(keys, results):
+                    if data is None:
+                        raise utils.StorageNoSuchKeyError(bucket, key)
+            return results if ordered else iter(zip(keys, results))
+
+        def get_object(key, args):
+            return self.get_object(bucket, key, extra_get_args=args)
+
+        return self._bulk_map(get_object, keys, args_list, ordered, missing_ok, max_workers)
+
+    def put_objects(self,
+                    bucket: str,
+                    objects: Union[Dict[str, Any], List[Tuple[str, Any]]],
+                    max_workers: Optional[int] = None):
+        """
+        Adds multiple objects to a bucket of the storage backend, using the native bulk operation
+        of the backend when available, or concurrent requests otherwise.
+
+        :param bucket: Name of the bucket
+        :param objects: Dict of {key: body}, or list of (key, body) tuples
+        :param max_workers: Max number of concurrent requests. Default 64
+        """
+        objects = list(objects.items() if isinstance(objects, dict) else objects)
+
+        if hasattr(self.storage_handler, 'put_objects') and not self._parallel_transfers():
+            for key, _ in objects:
+                if self._cacheable(key):
+                    self.cache.invalidate(bucket, key)
+            return self.storage_handler.put_objects(bucket, objects)
+
+        def put_object(key, body):
+            return self.put_object(bucket, key, body)
+
+        keys, bodies = zip(*objects) if objects else ((), ())
+        self._bulk_map(put_object, keys, bodies, True, False, max_workers)
+
+    def head_objects(self,
+                     bucket: str,
+                     keys: List[str],
+                     ordered: Optional[bool] = True,
+                     missing_ok: Optional[bool] = False,
+                     max_workers: Optional[int] = None
+                     ) -> Union[List[Dict], Iterator[Tuple[str, Dict]]]:
+        """
+        Retrieves the metadata of multiple objects with concurrent HEAD requests.
+
+        :param bucket: Name of the bucket
+        :param keys: List of object keys
+        :param ordered: Return the metadata in the same order than `keys`. If False, return an iterator of
+            (key, metadata) tuples as the requests complete
+        :param missing_ok: Return None for the keys that do not exist instead of raising StorageNoSuchKeyError
+        :param max_workers: Max number of concurrent requests. Default 64
+
+        :return: List of objects metadata, or an iterator of (key, metadata) tuples if `ordered` is False
+        """
+        keys = list(keys)
+
+        def head_object(key, _):
+            return self.storage_handler.head_object(bucket, key)
+
+        return self._bulk_map(head_object, keys, [None] * len(keys), ordered, missing_ok, max_workers)
+
     def upload_file(self,
                     file_name: str,
                     bucket: str,
@@ -148,6 +424,20 @@ class Storage:
         :param extra_args: Extra get arguments to be passed to the underlying backend implementation (dict).
         :param config: The transfer configuration to be used when performing the transfer (boto3.s3.transfer.TransferConfig).
         """
+        key = key or os.path.basename(file_name)
+        if self._cacheable(key):
+            self.cache.invalidate(bucket, key)
+
+        if self._multipart_supported() and not config and not extra_args \
+           and os.path.getsize(file_name) > self.transfer_part_size:
+            try:
+                with open(file_name, 'rb') as in_file:
+                    self._multipart_upload(bucket, key, self._iter_parts(in_file))
+            except Exception as e:
+                logger.error(e)
+                return False
+            return True
+
         return self.storage_handler.upload_file(file_name, bucket, key, extra_args, config)
 
     def download_file(self,
@@ -170,6 +460,22 @@ class Storage:
 
         :return: Object, as a binary array or as a file-like stream if parameter `stream` is enabled
         """
+        if self._parallel_transfers() and not config and not extra_args:
+            file_name = file_name or key
+            try:
+                obj_size = int(self.head_object(bucket, key)['content-length'])
+                if obj_size > self.transfer_part_size:
+                    dirname = os.path.dirname(file_name)
+                    if dirname:
+                        os.makedirs(dirname, exist_ok=True)
+                    with self._parallel_get(bucket, key, obj_size) as data_stream, \
+                         open(file_name, 'wb') as out:
+                        shutil.copyfileobj(data_stream, out, self.transfer_part_size)
+                    return True
+            except Exception as e:
+                logger.error(e)
+                return False
+
         return self.storage_handler.download_file(bucket, key, file_name, extra_args, config)
 
     def head_object(self, bucket: str, key: str) -> Dict:
@@ -191,6 +497,9 @@ class Storage:
         :param bucket: Name of the bucket
         :param key: Key of the object
         """
+        if self._cacheable(key):
+            self.cache.invalidate(bucket, key)
+        COBJECTS_UPLOADED.discard((self.handler_key, bucket, key))
         return self.storage_handler.delete_object(bucket, key)
 
     def delete_objects(self, bucket: str, key_list: List[str]):
@@ -202,6 +511,9 @@ class Storage:
         :param bucket: Name of the bucket
         :param key_list: List of object keys
         """
+        for key in filter(self._cacheable, key_list):
+            self.cache.invalidate(bucket, key)
+        COBJECTS_UPLOADED.difference_update((self.handler_key, bucket, key) for key in key_list)
         return self.storage_handler.delete_objects(bucket, key_list)
 
     def head_bucket(self, bucket: str) -> Dict:
@@ -245,32 +557,145 @@ class Storage:
         """
         return self.storage_handler.list_keys(bucket, prefix)
 
+    def list_keys_pages(self, bucket: str, prefix: Optional[str] = None) -> Iterator[List[str]]:
+        """
+        Similar to list_keys(), but it yields the keys as soon as each listing page
+        is received. Backends without paginated listings yield a single page.
+
+        :param bucket: Name of the bucket
+        :param prefix: Key prefix for filtering
+
+        :return: Generator of lists of object keys
+        """
+        if hasattr(self.storage_handler, 'list_keys_pages'):
+            yield from self.storage_handler.list_keys_pages(bucket, prefix)
+        else:
+            yield self.storage_handler.list_keys(bucket, prefix)
+
+    def delete_prefix(self, bucket: str, prefix: str):
+        """
+        Removes all the objects of a prefix from the storage backend. The keys are
+        streamed from the listing into concurrent batched deletes, or the whole prefix
+        is removed at once in the backends that support it.
+
+        :param bucket: Name of the bucket
+        :param prefix: Key prefix of the objects to delete
+
+        :return: Number of deleted objects, or None if the backend deleted the prefix at once
+        """
+        if hasattr(self.storage_handler, 'delete_prefix'):
+            if self._cacheable(prefix):
+                self.cache.invalidate_prefix(bucket, prefix)
+            return self.storage_handler.delete_prefix(bucket, prefix)
+
+        total_objects = 0
+        with ThreadPoolExecutor(max_workers=DELETE_CONCURRENCY) as executor:
+            fs = set()
+            for page in self.list_keys_pages(bucket, prefix):
+                for i in range(0, len(page), DELETE_BATCH_SIZE):
+                    if len(fs) >= DELETE_CONCURRENCY:
+                        done, fs = wait(fs, return_when=FIRST_COMPLETED)
+                        [f.result() for f in done]
+                    fs.add(executor.submit(bind_call_stats(self.delete_objects), bucket, page[i:i + DELETE_BATCH_SIZE]))
+                total_objects += len(page)
+            [f.result() for f in fs]
+
+        return total_objects
+
     def put_cloudobject(self,
                         body: Union[str,
                                     bytes,
                                     TextIO,
                                     BinaryIO],
                         bucket: Optional[str] = None,
-                        key: Optional[str] = None) -> utils.CloudObject:
+                        key: Optional[str] = None,
+                        content_addressed: Optional[bool] = False) -> utils.CloudObject:
         """
         Put a CloudObject into storage.
 
         :param body: Data content, can be a string or byte array or a text/bytes file-like object
         :param bucket: Destination bucket
         :param key: Destination key
+        :param content_addressed: Derive the key from a hash of the body, and skip the upload if the object already exists
 
         :return: CloudObject instance
         """
+        if content_addressed:
+            return self._put_content_addressed_cloudobject(body, bucket or self.bucket)
+
         prefix = os.environ.get('__LITHOPS_SESSION_ID', '')
         coid = hex(next(COBJECTS_INDEX))[2:]
         coname = 'cloudobject_{}'.format(coid)
         name = '/'.join([prefix, coname]) if prefix else coname
         key = key or '/'.join([TEMP_PREFIX, name])
         bucket = bucket or self.bucket
-        self.storage_handler.put_object(bucket, key, body)
+        self.put_object(bucket, key, body)
+
+        return utils.CloudObject(self.backend, bucket, key)
+
+    def _put_content_addressed_cloudobject(self, body, bucket):
+        """
+        Uploads a cloudobject under CLOUDOBJECTS_PREFIX/<window>/<hash>, where
+        window is the current period of cloudobjects_ttl seconds. The same body
+        uploaded in the same period gets the same key, so the upload is skipped
+        if this process already uploaded it, or if a HEAD request finds it.
+        """
+        if isinstance(body, str):
+            body = body.encode()
+
+        if isinstance(body, (bytes, bytearray, memoryview)):
+            digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+        elif body.seekable():
+            hasher = hashlib.blake2b(digest_size=16)
+            start = body.tell()
+            for data in iter(lambda: body.read(self.transfer_part_size), b''):
+                hasher.update(data.encode() if isinstance(data, str) else data)
+            body.seek(start)
+            digest = hasher.hexdigest()
+        else:
+            body = body.read()
+            body = body.encode() if isinstance(body, str) else body
+            digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+
+        window = int(time.time() // self.cloudobjects_ttl)
+        key = '/'.join([CLOUDOBJECTS_PREFIX, str(window), digest])
+        uploaded_key = (self.handler_key, bucket, key)
+
+        if uploaded_key not in COBJECTS_UPLOADED:
+            try:
+                self.head_object(bucket, key)
+                logger.debug(f'Cloudobject {key} already exists - Skipping upload')
+            except utils.StorageNoSuchKeyError:
+                self.put_object(bucket, key, body)
+            COBJECTS_UPLOADED.add(uploaded_key)
 
         return utils.CloudObject(self.backend, bucket, key)
 
+    def clean_cloudobjects(self, bucket: Optional[str] = None) -> int:
+        """
+        Deletes the expired content-addressed cloudobjects. An object is kept
+        at least `cloudobjects_ttl` seconds after its last upload.
+
+        :param bucket: Name of the bucket
+
+        :return: Number of deleted objects
+        """
+        bucket = bucket or self.bucket
+        current_window = int(time.time() // self.cloudobjects_ttl)
+        prefix = CLOUDOBJECTS_PREFIX + '/'
+
+        expired_keys = []
+        for key in self.list_keys(bucket, prefix):
+            window = key[len(prefix):].split('/', 1)[0]
+            if not window.isdigit() or int(window) < current_window - 1:
+                expired_keys.append(key)
+
+        if expired_keys:
+            logger.debug(f'Deleting {len(expired_keys)} expired cloudobjects')
+            self.delete_objects(bucket, expired_keys)
+
+        return len(expired_keys)
+
     def get_cloudobject(self,
                         cloudobject: utils.CloudObject,
                         stream: Optional[bool] = False) -> Union[str,
@@ -288,7 +713,7 @@ class Storage:
         if cloudobject.backend == self.backend:
             bucket = cloudobject.bucket
             key = cloudobject.key
-            return self.storage_handler.get_object(bucket, key, stream=stream)
+            return self.get_object(bucket, key, stream=stream)
         else:
             raise Exception("CloudObject: Invalid Storage backend")
 
@@ -301,7 +726,7 @@ class Storage:
         if cloudobject.backend == self.backend:
             bucket = cloudobject.bucket
             key = cloudobject.key
-            return self.storage_handler.delete_object(bucket, key)
+            return self.delete_object(bucket, key)
         else:
             raise Exception("CloudObject: Invalid Storage backend")
 
@@ -322,8 +747,7 @@ class Storage:
         for backend in cobjs:
             if backend == self.backend:
                 for bucket in cobjs[backend]:
-                    self.storage_handler.delete_objects(
-                        bucket, cobjs[backend][co.bucket])
+                    self.delete_objects(bucket, cobjs[backend][bucket])
             else:
                 raise Exception("CloudObject: Invalid Storage backend")
 
@@ -349,7 +773,11 @@ class InternalStorage:
                 f"'storage_bucket' is mandatory under '{self.backend}'"
                 " section of the configuration")
 
-        self.storage.create_bucket(self.bucket)
+        # The bucket is only checked once per process and storage client
+        bucket_key = (self.storage.handler_key, self.bucket)
+        if bucket_key not in VALIDATED_BUCKETS:
+            self.storage.create_bucket(self.bucket)
+            VALIDATED_BUCKETS.add(bucket_key)
 
     def get_client(self):
         """
@@ -358,6 +786,13 @@ class InternalStorage:
         """
         return self.storage.get_client()
 
+    def get_stats(self):
+        """
+        Retrieves the stats of the operations made to this storage backend.
+        :return: dict of stats by operation
+        """
+        return self.storage.get_stats()
+
     def get_storage_config(self):
         """
         Retrieves the configuration of this storage handler.
@@ -392,6 +827,23 @@ class InternalStorage:
         return self.storage.get_object(
             self.bucket, key, stream, extra_get_args)
 
+    def put_data_batch(self, data_objects):
+        """
+        Put multiple data objects into storage.
+        :param data_objects: dict of {key: data}
+        :return: None
+        """
+        return self.storage.put_objects(self.bucket, data_objects)
+
+    def get_data_batch(self, keys, ordered=True):
+        """
+        Get multiple data objects from storage.
+        :param keys: list of data keys
+        :param ordered: return the data in the same order than keys, or (key, data) tuples as they are downloaded
+        :return: data contents
+        """
+        return self.storage.get_objects(self.bucket, keys, ordered=ordered)
+
     def get_func(self, key):
         """
         Get serialized function from storage.
@@ -439,10 +891,68 @@ class InternalStorage:
         status_key = utils.create_status_key(executor_id, job_id, call_id)
         try:
             data = self.storage.get_object(self.bucket, status_key)
-            return json.loads(data.decode('ascii'))
+            return serializers.loads_status(data)
         except utils.StorageNoSuchKeyError:
             return None
 
+    def get_call_logs(self, executor_id, job_id, call_id):
+        """
+        Get the logs of a call.
+        :param executor_id: executor ID of the call
+        :param call_id: call ID of the call
+        :return: The logs of the call, or None if they were not uploaded
+        """
+        logs_key = utils.create_logs_key(executor_id, job_id, call_id)
+        try:
+            data = self.storage.get_object(self.bucket, logs_key)
+            return zlib.decompress(data).decode(errors='replace')
+        except utils.StorageNoSuchKeyError:
+            return None
+
+    def get_calls_storage_stats(self, call_ids, max_workers=None):
+        """
+        Get the storage stats of multiple calls.
+        :param call_ids: list of (executor_id, job_id, call_id) tuples
+        :param max_workers: max number of concurrent requests
+        :return: A list with the storage stats of each call, or None if they were not uploaded
+        """
+        stats_keys = [utils.create_storage_stats_key(*call_id) for call_id in call_ids]
+        data_list = self.storage.get_objects(self.bucket, stats_keys, missing_ok=True, max_workers=max_workers)
+        return [pickle.loads(data) if data is not None else None for data in data_list]
+
+    def get_calls_profile(self, call_ids, max_workers=None):
+        """
+        Get the profiles of multiple calls.
+        :param call_ids: list of (executor_id, job_id, call_id) tuples
+        :param max_workers: max number of concurrent requests
+        :return: A list with the profile of each call, or None if it was not uploaded
+        """
+        profile_keys = [utils.create_profile_key(*call_id) for call_id in call_ids]
+        data_list = self.storage.get_objects(self.bucket, profile_keys, missing_ok=True, max_workers=max_workers)
+        return [pickle.loads(data) if data is not None else None for data in data_list]
+
+    def get_calls_status(self, call_ids, max_workers=None):
+        """
+        Get the status of multiple calls.
+        :param call_ids: list of (executor_id, job_id, call_id) tuples
+        :param max_workers: max number of concurrent requests
+        :return: A list with the status dictionary of each call, or None if no updated status
+        """
+        status_keys = [utils.create_status_key(*call_id) for call_id in call_ids]
+        data_list = self.storage.get_objects(self.bucket, status_keys, missing_ok=True, max_workers=max_workers)
+        return [serializers.loads_status(data) if data is not None else None for data in data_list]
+
+    def get_calls_output(self, call_ids, max_workers=None):
+        """
+        Get the output of multiple calls.
+        :param call_ids: list of (executor_id, job_id, call_id) tuples
+        :param max_workers: max number of concurrent requests
+        :return: A list with the output of each call, or None if not available
+        """
+        output_keys = [utils.create_output_key(*call_id) for call_id in call_ids]
+        return self.storage._bulk_map(lambda key, args: self._read_output(key), output_keys,
+                                      [{}] * len(output_keys), True, True, max_workers)
+
     def get_call_output(self, executor_id, job_id, call_id):
         """
         Get the output of a call.
@@ -452,10 +962,22 @@ class InternalStorage:
         """
         output_key = utils.create_output_key(executor_id, job_id, call_id)
         try:
-            return self.storage.get_object(self.bucket, output_key)
+            return self._read_output(output_key)
         except utils.StorageNoSuchKeyError:
             return None
 
+    def _read_output(self, output_key):
+        """
+        Reads a call output as a stream, so that the out-of-band buffers
+        of the serialized result are read into a single bytearray
+        """
+        stream = self.storage.get_object(self.bucket, output_key, stream=True)
+        try:
+            return serializers.read_stream(stream)
+        finally:
+            if hasattr(stream, 'close'):
+                stream.close()
+
     def get_runtime_meta(self, key):
         """
         Get the metadata given a runtime name.
@@ -28,9 +28,14 @@ func_key_suffix = "func.pickle"
 agg_data_key_suffix = "aggdata.pickle"
 data_key_suffix = "data.pickle"
 output_key_suffix = "output.pickle"
-status_key_suffix = "status.json"
+status_key_suffix = "status.bin"
+logs_key_suffix = "logs.zlib"
+storage_stats_key_suffix = "storage_stats.pickle"
+profile_key_suffix = "profile.pickle"
 init_key_suffix = ".init"
 
+BATCH_BYTES = 8 * 1024**2  # 8MiB
+
 
 class StorageNoSuchKeyError(Exception):
     def __init__(self, bucket, key):
@@ -44,7 +49,70 @@ class StorageConfigMismatchError(Exception):
         super(StorageConfigMismatchError, self).__init__(msg)
 
 
-class CloudObject:
+class PartitionIterMixin:
+    """
+    Batched record iteration over the data_stream that Lithops attaches
+    to the object in data processing functions
+    """
+
+    def iter_batches(self, batch_bytes=BATCH_BYTES, offsets=False):
+        """
+        Yields blocks of about batch_bytes that only contain whole rows.
+
+        :param batch_bytes: Number of bytes to read from the stream on each iteration
+        :param offsets: Also yield a numpy array with the start position of each row in the block
+
+        :return: Generator of bytes blocks, or of (block, offsets) tuples if `offsets` is enabled
+        """
+        newline = (getattr(self, 'newline', None) or '\n').encode()
+        stream = self.data_stream
+        remainder = b''
+
+        if offsets:
+            import numpy as np
+
+            def with_offsets(block):
+                row_ends = np.flatnonzero(np.frombuffer(block, dtype=np.uint8) == newline[-1])
+                row_starts = np.concatenate(([0], row_ends + 1))
+                return block, row_starts[row_starts < len(block)]
+
+        while True:
+            chunk = stream.read(batch_bytes)
+            if not chunk:
+                break
+            last_row_end = chunk.rfind(newline)
+            if last_row_end == -1:
+                remainder += chunk
+                continue
+            block = remainder + chunk[:last_row_end + 1] if remainder else chunk[:last_row_end + 1]
+            remainder = chunk[last_row_end + 1:]
+            yield with_offsets(block) if offsets else block
+
+        if remainder:
+            yield with_offsets(remainder) if offsets else remainder
+
+    def iter_lines(self, batch_bytes=BATCH_BYTES, keepends=False):
+        """
+        Yields lists with all the rows contained in blocks of about batch_bytes.
+
+        :param batch_bytes: Number of bytes to read from the stream on each iteration
+        :param keepends: Keep the newline character at the end of each row
+
+        :return: Generator of lists of rows (bytes)
+        """
+        newline = (getattr(self, 'newline', None) or '\n').encode()
+        for block in self.iter_batches(batch_bytes):
+            rows = block.split(newline)
+            last_row = rows.pop()
+            if keepends:
+                rows = [row + newline for row in rows]
+            if last_row:
+                # The last row of the stream may not end with a newline
+                rows.append(last_row)
+            yield rows
+
+
+class CloudObject(PartitionIterMixin):
     def __init__(self, backend, bucket, key):
         self.backend = backend
         self.bucket = bucket
@@ -55,7 +123,7 @@ class CloudObject:
         return f'<CloudObject at {path}>'
 
 
-class CloudObjectUrl:
+class CloudObjectUrl(PartitionIterMixin):
     def __init__(self, url):
         self.url = url
 
@@ -63,7 +131,7 @@ class CloudObjectUrl:
         return f'<CloudObject at {self.url}>'
 
 
-class CloudObjectLocal:
+class CloudObjectLocal(PartitionIterMixin):
     def __init__(self, path):
         self.path = path
         self.bucket = os.path.dirname(path)
@@ -73,24 +141,38 @@ class CloudObjectLocal:
         return f'<CloudObject at {self.path}>'
 
 
-def clean_bucket(storage, bucket, prefix, sleep=5):
+def clean_bucket(storage, bucket, prefix, sleep=5, retries=10):
     """
     Deletes all the files from COS. These files include the function,
     the data serialization and the function invocation results.
+    The prefix is listed again after deleting it, in case some objects were
+    not listed yet, waiting an exponential backoff of at most `sleep` seconds.
     """
+    from lithops.storage.stats import record_retry
+
     msg = f"Deleting objects from bucket '{bucket}'"
     msg = msg + f" and prefix '{prefix}'" if prefix else msg
     logger.info(msg)
-    total_objects = 0
-    objects_to_delete = storage.list_keys(bucket, prefix)
-
-    while objects_to_delete:
-        total_objects = total_objects + len(objects_to_delete)
-        storage.delete_objects(bucket, objects_to_delete)
-        time.sleep(sleep)
-        objects_to_delete = storage.list_keys(bucket, prefix)
-
-    logger.info(f'Finished deleting objects, total found: {total_objects}')
+    total_objects = storage.delete_prefix(bucket, prefix)
+
+    delay = min(0.1, sleep)
+    attempt = 0
+    while storage.list_keys(bucket, prefix):
+        if attempt == retries:
+            logger.warning(f"Objects remaining in bucket '{bucket}' and prefix '{prefix}' after {retries} retries")
+            break
+        attempt += 1
+        time.sleep(delay)
+        delay = min(delay * 2, sleep)
+        record_retry(storage.backend, 'delete_prefix')
+        deleted_objects = storage.delete_prefix(bucket, prefix)
+        if total_objects is not None:
+            total_objects += deleted_objects or 0
+
+    if total_objects is None:
+        logger.info('Finished deleting objects')
+    else:
+        logger.info(f'Finished deleting objects, total found: {total_objects}')
 
 
 def create_job_key(executor_id, job_id):
@@ -138,6 +220,18 @@ def create_output_key(executor_id, job_id, call_id):
     return '/'.join([JOBS_PREFIX, job_key, call_id, output_key_suffix])
 
 
+def create_output_chunk_key(executor_id, job_id, call_id, chunk):
+    """
+    Create the key of a chunk of a streamed output
+    :param executor_id: Executor's ID
+    :param job_id: Job's ID
+    :param call_id: call's ID
+    :param chunk: chunk number
+    :return: output chunk key
+    """
+    return f'{create_output_key(executor_id, job_id, call_id)}.{chunk}'
+
+
 def create_status_key(executor_id, job_id, call_id):
     """
     Create status key
@@ -151,6 +245,42 @@ def create_status_key(executor_id, job_id, call_id):
     return '/'.join([JOBS_PREFIX, job_key, call_id, status_key_suffix])
 
 
+def create_logs_key(executor_id, job_id, call_id):
+    """
+    Create logs key
+    :param executor_id: Executor's ID
+    :param job_id: Job's ID
+    :param call_id: call's ID
+    :return: logs key
+    """
+    job_key = create_job_key(executor_id, job_id)
+    return '/'.join([JOBS_PREFIX, job_key, call_id, logs_key_suffix])
+
+
+def create_storage_stats_key(executor_id, job_id, call_id):
+    """
+    Create storage stats key
+    :param executor_id: Executor's ID
+    :param job_id: Job's ID
+    :param call_id: call's ID
+    :return: storage stats key
+    """
+    job_key = create_job_key(executor_id, job_id)
+    return '/'.join([JOBS_PREFIX, job_key, call_id, storage_stats_key_suffix])
+
+
+def create_profile_key(executor_id, job_id, call_id):
+    """
+    Create profile key
+    :param executor_id: Executor's ID
+    :param job_id: Job's ID
+    :param call_id: call's ID
+    :return: profile key
+    """
+    job_key = create_job_key(executor_id, job_id)
+    return '/'.join([JOBS_PREFIX, job_key, call_id, profile_key_suffix])
+
+
 def create_init_key(executor_id, job_id, call_id, act_id):
     """
     Create init key
@@ -1,3 +1,5 @@
+import os
+import signal
 import lithops
 import time
 import pickle
@@ -98,6 +100,15 @@ def my_map_function_obj(obj, id):
     return counter
 
 
+def my_map_function_iter_lines(obj):
+    """returns the number of rows and words of the partition read in batches."""
+    rows = words = 0
+    for lines in obj.iter_lines(batch_bytes=1000):
+        rows += len(lines)
+        words += sum(len(line.split()) for line in lines)
+    return rows, words
+
+
 def my_map_function_url(id, obj):
     print('I am processing the object from {}'.format(obj.url))
     print('Function id: {}'.format(id))
@@ -177,3 +188,49 @@ class SideEffect:
 
 def passthrough_function(x):
     return x.result
+
+
+def sleep_function(x):
+    time.sleep(x)
+    return x
+
+
+def failing_function(x):
+    raise ValueError(f'Failed with {x}')
+
+
+def killed_function(x):
+    """kills its own process, like the system does when it runs out of memory"""
+    if x:
+        os.kill(os.getpid(), signal.SIGKILL)
+    return x
+
+
+def chatty_function(lines):
+    for i in range(lines):
+        print(f'Log line {i}')
+    return lines
+
+
+def generator_function(n, size=0):
+    for i in range(n):
+        yield (i, b'x' * size)
+
+
+def iterator_function(n):
+    return iter([i * 2 for i in range(n)])
+
+
+class LargeBuffer:
+    """Exposes its data as a pickle buffer, like NumPy arrays"""
+    def __init__(self, data):
+        self.data = data
+
+    def __reduce_ex__(self, protocol):
+        if protocol >= 5:
+            return type(self), (pickle.PickleBuffer(self.data),)
+        return type(self), (bytes(self.data),)
+
+
+def double_buffer_function(buffer):
+    return LargeBuffer(bytearray(buffer.data) * 2)
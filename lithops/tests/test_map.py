@@ -14,9 +14,26 @@
 # limitations under the License.
 #
 
+import copy
+import json
+import pickle
 import pytest
 import lithops
+from lithops import serializers
+from lithops.future import StreamedResult
+from lithops.job import autotune
+from lithops.config import extract_storage_config
+from lithops.tests.conftest import TESTS_PREFIX
 from lithops.tests.functions import (
+    chatty_function,
+    double_buffer_function,
+    LargeBuffer,
+    generator_function,
+    iterator_function,
+    my_map_function_iter_lines,
+    sleep_function,
+    failing_function,
+    killed_function,
     simple_map_function,
     hello_world,
     lithops_inside_lithops_map_function,
@@ -118,3 +135,195 @@ class TestMap:
         fexec.wait()
         result = fexec.get_result()
         assert result == [1, 2, 3, 1, 2, 3]
+
+    def test_fast_mode(self):
+        config = copy.deepcopy(pytest.lithops_config)
+        config['lithops']['worker_fast_mode'] = True
+        fexec = lithops.FunctionExecutor(config=config)
+
+        futures = fexec.map(simple_map_function, [(1, 1), (2, 2), (3, 3), (4, 4)], chunksize=2)
+        assert fexec.get_result(futures) == [2, 4, 6, 8]
+
+        futures = fexec.map(failing_function, [1])
+        with pytest.raises(ValueError):
+            fexec.get_result(futures)
+
+        futures = fexec.map(sleep_function, [0, 5], timeout=1)
+        fexec.wait(futures, throw_except=False)
+        assert futures[0].result() == 0
+        assert futures[1].error
+
+    def test_worker_processes(self):
+        config = copy.deepcopy(pytest.lithops_config)
+        backend = config['lithops']['backend']
+        config.setdefault(backend, {})['worker_processes'] = 2
+        if backend == 'localhost':
+            config['localhost']['version'] = 1
+        fexec = lithops.FunctionExecutor(config=config)
+
+        iterdata = [(i, i) for i in range(8)]
+        futures = fexec.map(simple_map_function, iterdata, chunksize=4)
+        assert fexec.get_result(futures) == [2 * i for i in range(8)]
+
+        futures = fexec.map(simple_map_function, iterdata[:4], chunksize=4)
+        assert fexec.get_result(futures) == [2 * i for i in range(4)]
+
+        # A killed worker process reports the error of its call, and is replaced
+        futures = fexec.map(killed_function, [0, 1, 0, 0], chunksize=4)
+        fexec.wait(futures, throw_except=False)
+        assert [f.error for f in futures] == [False, True, False, False]
+        assert fexec.get_result([futures[0], futures[2], futures[3]]) == [0, 0, 0]
+
+    def test_prefetch(self):
+        storage = lithops.Storage(storage_config=extract_storage_config(pytest.lithops_config))
+        key = TESTS_PREFIX + '/prefetch.txt'
+        storage.put_object(storage.bucket, key, ''.join(f'word{i} foo bar\n' for i in range(200)))
+
+        config = copy.deepcopy(pytest.lithops_config)
+        config['lithops']['worker_prefetch_calls'] = 2
+        config['lithops']['worker_prefetch_size'] = 100
+        backend = config['lithops']['backend']
+        if backend == 'localhost':
+            config['localhost']['version'] = 1
+        fexec = lithops.FunctionExecutor(config=config)
+
+        data = f'{storage.backend}://{storage.bucket}/{key}'
+        futures = fexec.map(my_map_function_iter_lines, data, obj_chunk_size=1000, chunksize=10)
+        results = fexec.get_result(futures)
+        storage.delete_object(storage.bucket, key)
+
+        assert sum(rows for rows, _ in results) == 200
+        assert sum(words for _, words in results) == 600
+        assert any(f.stats.get('worker_func_prefetched_bytes') for f in futures)
+
+    def test_profile(self, tmp_path):
+        fexec = lithops.FunctionExecutor(config=pytest.lithops_config)
+        futures = fexec.map(sleep_function, [0.5, 0.5], profile=True)
+        assert fexec.get_result(futures) == [0.5, 0.5]
+        assert all(f.stats['worker_func_profile_stacks'] >= 1 for f in futures)
+
+        output_file = tmp_path / 'profile.txt'
+        profile = fexec.get_profile(futures, output_file=str(output_file))
+        stack = 'lithops.tests.functions.sleep_function'
+        call_profiles = [fexec.get_profile(f) for f in futures]
+        assert profile[stack] == sum(p[stack] for p in call_profiles)
+        assert profile[stack] >= 2 * 40
+        assert f'{stack} {profile[stack]}' in output_file.read_text().splitlines()
+
+    def test_logs(self):
+        config = copy.deepcopy(pytest.lithops_config)
+        config['lithops']['worker_logs_max_size'] = 4096
+        fexec = lithops.FunctionExecutor(config=config)
+
+        futures = fexec.map(chatty_function, [10, 1000])
+        assert fexec.get_result(futures) == [10, 1000]
+        assert all('logs' not in f._call_status for f in futures)
+        assert 'Log line 9' in futures[0].logs
+        assert 'bytes truncated' not in futures[0].logs
+        assert 'Log line 0' in futures[1].logs and 'Log line 999' in futures[1].logs
+        assert 'bytes truncated' in futures[1].logs
+        assert len(futures[1].logs) < 4096 + 100
+
+        config['lithops']['worker_logs_sampling'] = 0
+        fexec = lithops.FunctionExecutor(config=config)
+        futures = fexec.map(chatty_function, [10])
+        fexec.get_result(futures)
+        assert futures[0].logs is None
+
+        futures = fexec.map(failing_function, [1])
+        fexec.wait(futures, throw_except=False)
+        assert 'ValueError' in futures[0].logs
+
+    def test_streamed_result(self):
+        fexec = lithops.FunctionExecutor(config=pytest.lithops_config)
+        futures = fexec.map(generator_function, [(10,), (0,), (20, 1024**2)])
+        small, empty, large = fexec.get_result(futures)
+
+        assert isinstance(small, StreamedResult)
+        assert [i for i, _ in small] == list(range(10))
+        assert list(empty) == []
+        assert futures[2].stats['func_result_chunks'] == 3
+        assert all(i == n and len(data) == 1024**2 for n, (i, data) in enumerate(large))
+        assert sum(1 for _ in large) == 20
+
+        # Other iterators are returned as a single result
+        future = fexec.call_async(iterator_function, 10)
+        result = future.result()
+        assert not isinstance(result, StreamedResult)
+        assert list(result) == [i * 2 for i in range(10)]
+
+    def test_out_of_band_buffers(self):
+        fexec = lithops.FunctionExecutor(config=pytest.lithops_config)
+        sizes = [1024, 1024**2]
+        fexec.map(double_buffer_function, [LargeBuffer(bytearray(b'x' * size)) for size in sizes])
+        results = fexec.get_result()
+
+        assert [bytes(result.data) for result in results] == [b'x' * size * 2 for size in sizes]
+        fexec.clean()
+
+    def test_serializer(self):
+        config = copy.deepcopy(pytest.lithops_config)
+        config['lithops']['serializer_compression'] = 'zlib'
+        config['lithops']['serializer_compression_threshold'] = 0
+        fexec = lithops.FunctionExecutor(config=config)
+
+        fexec.map(simple_map_function, [(1, 2), (3, 4)], serializer='cloudpickle')
+        assert fexec.get_result() == [3, 7]
+
+        fexec.map(double_buffer_function, [LargeBuffer(bytearray(b'x' * 1024**2))])
+        assert bytes(fexec.get_result()[0].data) == b'x' * 1024**2 * 2
+
+        with pytest.raises(ValueError):
+            fexec.map(simple_map_function, [(1, 2)], serializer='unknown')
+        fexec.clean()
+
+    def test_binary_status(self):
+        fexec = lithops.FunctionExecutor(config=pytest.lithops_config)
+        futures = fexec.map(simple_map_function, [(1, 2), (3, 4)])
+        assert fexec.get_result(futures) == [3, 7]
+        assert all(isinstance(f._call_status['result'], bytes) for f in futures)
+
+        future = fexec.call_async(failing_function, (1,))
+        fexec.wait([future], throw_except=False)
+        assert isinstance(future._call_status['exc_info'], bytes)
+        assert future.error and future._exception[0] is ValueError
+
+        # The JSON statuses of previous versions are still decoded
+        legacy_status = dict(future._call_status, exc_info=str(future._call_status['exc_info']),
+                             result=str(pickle.dumps(3)))
+        status = serializers.loads_status(json.dumps(legacy_status).encode())
+        assert pickle.loads(status['exc_info'])[0] is ValueError
+        assert pickle.loads(status['result']) == 3
+
+    def test_autotune(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(autotune, 'AUTOTUNE_DIR', str(tmp_path))
+        fexec = lithops.FunctionExecutor(config=pytest.lithops_config)
+        futures = fexec.map(sleep_function, [0.1] * 4)
+        fexec.get_result(futures)
+        for f in futures:
+            f.runtime_memory = 1024
+
+        profile = autotune.learn_profile(futures, 'hash', 1)
+        assert profile == autotune.load_profile('hash')
+        assert profile['calls'] == 4 and profile['peak_memory'] > 0
+        assert profile['exec_time'] >= 0.1
+
+        worker_processes, chunksize = autotune.tune(profile, 1024, 1000, 10, 600)
+        assert worker_processes >= 1
+        assert worker_processes * profile['peak_memory'] <= 1024**3
+        assert worker_processes <= chunksize <= worker_processes * 50
+        assert autotune.tune(profile, 1024, 1000, 1000, 600)[1] == worker_processes
+
+        profile['max_worker_processes'] = 1
+        assert autotune.tune(profile, 1024, 1000, 10, 600)[0] == 1
+
+        # The limit is relaxed after the runs that do not exceed the memory
+        autotune.save_profile('hash', profile)
+        assert autotune.learn_profile(futures, 'hash', 1)['max_worker_processes'] == 2
+        assert autotune.learn_profile(futures, 'hash', 1)['max_worker_processes'] == 2
+        assert 'max_worker_processes' not in autotune.learn_profile(futures, 'hash', 4)
+
+        # The peak memory of a whole worker process is only used without call peaks
+        futures[0].stats['worker_peak_memory_process'] = True
+        futures[0].stats['worker_peak_memory_end'] = 100 * 1024**3
+        assert autotune.learn_profile(futures, 'hash', 1)['peak_memory'] < 100 * 1024**3
@@ -0,0 +1,136 @@
+#
+# (C) Copyright Cloudlab URV 2020
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import pytest
+import logging
+from io import BytesIO
+from lithops.storage.utils import StorageNoSuchKeyError
+
+fakeredis = pytest.importorskip('fakeredis')
+redis_backend = pytest.importorskip('lithops.storage.backends.redis.redis')
+
+logger = logging.getLogger(__name__)
+
+BUCKET = 'lithops-test'
+CHUNK_SIZE = 1000
+
+
+class TestRedisBackend:
+
+    @pytest.fixture(autouse=True)
+    def setup_backend(self, monkeypatch):
+        server = fakeredis.FakeServer()
+        monkeypatch.setattr(redis_backend.redis, 'Redis', lambda **kwargs: fakeredis.FakeRedis(server=server))
+        self.backend = redis_backend.RedisBackend({
+            'host': 'localhost', 'user_agent': 'lithops-test',
+            'storage_bucket': BUCKET, 'chunk_size': CHUNK_SIZE
+        })
+        self.client = self.backend.get_client()
+        self.data = bytes(i % 251 for i in range(3500))
+
+    def chunk_keys(self):
+        return [k for k in self.client.keys('*') if redis_backend.CHUNKS_SUFFIX.encode() in k]
+
+    def test_chunked_put_get(self):
+        logger.info('Testing chunked objects in the Redis backend')
+        self.backend.put_object(BUCKET, 'data/bytes', self.data)
+        self.backend.put_object(BUCKET, 'data/stream', BytesIO(self.data))
+        self.backend.put_object(BUCKET, 'data/small', b'small')
+
+        assert len(self.chunk_keys()) == 2 * 4
+        assert self.backend.get_object(BUCKET, 'data/bytes') == self.data
+        assert self.backend.get_object(BUCKET, 'data/stream') == self.data
+        assert self.backend.get_objects(BUCKET, ['data/bytes', 'data/small', 'data/missing']) == \
+            [self.data, b'small', None]
+        assert self.backend.head_object(BUCKET, 'data/bytes')['content-length'] == str(len(self.data))
+
+        # Overwriting a chunked object deletes its previous chunks
+        self.backend.put_object(BUCKET, 'data/bytes', b'small')
+        assert len(self.chunk_keys()) == 4
+        assert self.backend.get_object(BUCKET, 'data/bytes') == b'small'
+
+        with pytest.raises(StorageNoSuchKeyError):
+            self.backend.get_object(BUCKET, 'data/missing')
+
+    def test_range_get_and_stream(self):
+        logger.info('Testing range reads and streams over chunked objects')
+        self.backend.put_object(BUCKET, 'data/bytes', self.data)
+
+        for first, last in [(0, 9), (995, 1004), (1500, 3499), (3490, 5000)]:
+            range_args = {'Range': f'bytes={first}-{last}'}
+            assert self.backend.get_object(BUCKET, 'data/bytes', extra_get_args=range_args) == \
+                self.data[first:last + 1]
+        assert self.backend.get_object(BUCKET, 'data/bytes', extra_get_args={'Range': 'bytes=3000-'}) == \
+            self.data[3000:]
+        assert self.backend.get_object(BUCKET, 'data/bytes', extra_get_args={'Range': 'bytes=-10'}) == \
+            self.data[-10:]
+
+        assert self.backend.get_object(BUCKET, 'data/bytes', stream=True).read() == self.data
+        stream = self.backend.get_object(BUCKET, 'data/bytes', stream=True,
+                                         extra_get_args={'Range': 'bytes=900-2100'})
+        assert stream.read() == self.data[900:2101]
+
+    def test_stream_short_read(self):
+        logger.info('Testing streams of objects overwritten while they are read')
+        self.backend.put_object(BUCKET, 'data/bytes', self.data)
+        stream = self.backend.get_object(BUCKET, 'data/bytes', stream=True)
+        assert stream.read(CHUNK_SIZE) == self.data[:CHUNK_SIZE]
+
+        # Overwriting the object deletes the chunks that were not read yet
+        self.backend.put_object(BUCKET, 'data/bytes', b'small')
+        with pytest.raises(StorageNoSuchKeyError):
+            stream.read()
+
+        # Plain values are read past the first window with GETRANGE
+        plain_key = self.backend._format_key(BUCKET, 'data/plain')
+        self.client.set(plain_key, b'x' * (2 * redis_backend.STREAM_WINDOW))
+        stream = self.backend.get_object(BUCKET, 'data/plain', stream=True)
+        self.client.set(plain_key, b'x' * 100)
+        with pytest.raises(StorageNoSuchKeyError):
+            stream.read()
+
+    def test_list_and_delete(self):
+        logger.info('Testing list and delete of chunked objects')
+        self.backend.put_object(BUCKET, 'data/a/bytes', self.data)
+        self.backend.put_object(BUCKET, 'data/a/small', b'small')
+        self.backend.put_object(BUCKET, 'data/b', self.data)
+        self.backend.put_object(BUCKET, 'other', b'other')
+
+        assert sorted(self.backend.list_keys(BUCKET, 'data/')) == ['data/a/bytes', 'data/a/small', 'data/b']
+        objects = self.backend.list_objects(BUCKET, 'data/a/')
+        assert sorted((obj['Key'], obj['Size']) for obj in objects) == \
+            [('data/a/bytes', len(self.data)), ('data/a/small', 5)]
+
+        self.backend.delete_object(BUCKET, 'data/b')
+        assert len(self.chunk_keys()) == 4
+        assert sorted(self.backend.list_keys(BUCKET, 'data/')) == ['data/a/bytes', 'data/a/small']
+
+        # The chunks of an interrupted put are deleted with the prefix
+        def interrupted_chunks():
+            for _ in range(redis_backend.CHUNKS_PER_PIPELINE):
+                yield self.data[:CHUNK_SIZE]
+            raise IOError('interrupted')
+
+        with pytest.raises(IOError):
+            self.backend._put_chunked(BUCKET, 'data/c', interrupted_chunks())
+        assert len(self.chunk_keys()) == 4 + redis_backend.CHUNKS_PER_PIPELINE
+        assert 'data/c' not in self.backend.list_keys(BUCKET, 'data/')
+
+        assert self.backend.delete_prefix(BUCKET, 'data/') == 2
+        assert self.chunk_keys() == []
+        assert self.backend.list_keys(BUCKET, 'data/') == []
+        assert self.backend.list_keys(BUCKET) == ['other']
+        assert self.backend.get_object(BUCKET, 'other') == b'other'
@@ -14,15 +14,23 @@
 # limitations under the License.
 #
 
+import os
 import pytest
+import asyncio
 import logging
 import lithops
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 from lithops.config import extract_storage_config
-from lithops.storage.utils import CloudObject, StorageNoSuchKeyError
+from lithops.storage.utils import CloudObject, StorageNoSuchKeyError, clean_bucket
+from lithops.storage.cache import StorageCache
+from lithops.storage.stats import StorageStats, set_call_stats, bind_call_stats, summarize_storage_stats
+from lithops.utils import ParallelRangeStreamingBody, MmapStreamingBody, WrappedStreamingBody, \
+    PrefetchedStreamingBody
+from lithops.constants import JOBS_PREFIX
 from lithops.tests.conftest import TESTS_PREFIX
 from lithops.tests.functions import my_map_function_storage, \
-    my_cloudobject_put, my_cloudobject_get, my_reduce_function
+    my_cloudobject_put, my_cloudobject_get, my_reduce_function, my_map_function_iter_lines
 
 
 logger = logging.getLogger(__name__)
@@ -57,6 +65,62 @@ class TestStorage:
         result = fexec.get_result()
         assert result == self.words_in_files
 
+    def test_storage_stats(self):
+        logger.info('Testing storage stats')
+        stats = self.storage.get_stats()
+        get_count = stats.get('get_object', {}).get('count', 0)
+        self.storage.get_object(self.bucket, STORAGE_PREFIX + '/test0')
+        with pytest.raises(StorageNoSuchKeyError):
+            self.storage.head_object(self.bucket, STORAGE_PREFIX + '/missing')
+
+        stats = self.storage.get_stats()
+        assert stats['get_object']['count'] == get_count + 1
+        assert stats['get_object']['bytes'] >= len(b'test storage handler')
+        assert sum(stats['get_object']['histogram']) == stats['get_object']['count']
+        assert stats['head_object']['not_found'] >= 1
+
+        keys = self.storage.list_keys(bucket=self.bucket, prefix=STORAGE_PREFIX + '/test')
+        iterdata = [(key, self.bucket) for key in keys]
+        with lithops.FunctionExecutor(config=pytest.lithops_config) as fexec:
+            futures = fexec.map(my_map_function_storage, iterdata)
+            fexec.get_result(futures)
+            worker_stats = fexec.get_storage_stats()['workers'][self.storage_backend]
+            assert worker_stats['get_object']['count'] >= len(keys)
+            assert all(f.stats['worker_storage_requests'] >= 1 for f in futures)
+
+    def test_call_storage_stats(self):
+        logger.info('Testing the storage stats of a call')
+        call_stats = StorageStats()
+        key = STORAGE_PREFIX + '/test0'
+        previous = set_call_stats(call_stats)
+        try:
+            self.storage.get_object(self.bucket, key)
+            # Only the threads of the call are counted
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                pool.submit(self.storage.get_object, self.bucket, key).result()
+                pool.submit(bind_call_stats(self.storage.get_object), self.bucket, key).result()
+            self.storage.get_objects(self.bucket, [key, key])
+        finally:
+            set_call_stats(previous)
+        self.storage.get_object(self.bucket, key)
+
+        # get_objects() makes one request per key in the backends without a native bulk get
+        stats = call_stats.get(self.storage_backend)
+        bulk_requests = stats['get_objects']['count'] if 'get_objects' in stats else 2
+        assert stats['get_object']['count'] == (2 if 'get_objects' in stats else 4)
+        assert summarize_storage_stats(call_stats.get())['requests'] == 2 + bulk_requests
+
+    def test_shared_storage_handler(self):
+        logger.info('Testing storage client reuse')
+        storage_config = extract_storage_config(pytest.lithops_config)
+        storage = lithops.Storage(storage_config=storage_config)
+        assert storage.storage_handler is self.storage.storage_handler
+
+        other_config = extract_storage_config(pytest.lithops_config)
+        other_config[self.storage_backend] = dict(other_config[self.storage_backend], user_agent='lithops/tests')
+        other_storage = lithops.Storage(storage_config=other_config)
+        assert other_storage.storage_handler is not self.storage.storage_handler
+
     def test_cloudobject(self):
         logger.info('Testing cloudobjects')
         data_prefix = self.storage_backend + '://' + self.bucket + '/' + STORAGE_PREFIX + '/'
@@ -68,6 +132,65 @@ class TestStorage:
             assert result == self.words_in_files
             fexec.clean(cs=cloudobjects)
 
+    def test_content_addressed_cloudobject(self):
+        logger.info('Testing content-addressed cloudobjects')
+        data = os.urandom(1024)
+        cobj1 = self.storage.put_cloudobject(data, content_addressed=True)
+        cobj2 = self.storage.put_cloudobject(BytesIO(data), content_addressed=True)
+        cobj3 = self.storage.put_cloudobject(data + b'0', content_addressed=True)
+        assert cobj1.key == cobj2.key != cobj3.key
+        assert not cobj1.key.startswith(JOBS_PREFIX)
+        assert self.storage.get_cloudobject(cobj2) == data
+
+        # Objects of the current period are not expired
+        assert self.storage.clean_cloudobjects() == 0
+        self.storage.delete_cloudobjects([cobj1, cobj3])
+        cobj4 = self.storage.put_cloudobject(data, content_addressed=True)
+        assert self.storage.get_cloudobject(cobj4) == data
+        self.storage.delete_cloudobject(cobj4)
+
+    def test_iter_lines(self):
+        logger.info('Testing batched line iteration over partitions')
+        data = b''.join(f'row {i} of the iter_lines test\n'.encode() for i in range(2000))
+        self.storage.put_object(self.bucket, STORAGE_PREFIX + '/iter/data', data)
+        data_prefix = self.storage_backend + '://' + self.bucket + '/' + STORAGE_PREFIX + '/iter/'
+        with lithops.FunctionExecutor(config=pytest.lithops_config) as fexec:
+            fexec.map(my_map_function_iter_lines, data_prefix, obj_chunk_number=7)
+            result = fexec.get_result()
+        assert sum(rows for rows, _ in result) == 2000
+        assert sum(words for _, words in result) == 2000 * 6
+
+        obj = CloudObject(self.storage_backend, self.bucket, STORAGE_PREFIX + '/iter/data')
+        obj.data_stream = BytesIO(b'first\nsecond\nlast')
+        assert sum(obj.iter_lines(batch_bytes=4, keepends=True), []) == [b'first\n', b'second\n', b'last']
+        obj.data_stream = BytesIO(b'first\nsecond\n')
+        assert sum(obj.iter_lines(keepends=False), []) == [b'first', b'second']
+
+    def test_balanced_chunks(self):
+        logger.info('Testing balanced partitioning across a prefix')
+        prefix = STORAGE_PREFIX + '/balanced/'
+        rows = [f'row {i} of the iter_lines test\n'.encode() for i in range(2000)]
+        self.storage.put_object(self.bucket, prefix + 'large', b''.join(rows))
+        for i in range(3):
+            self.storage.put_object(self.bucket, prefix + f'small{i}', b''.join(rows[:10]))
+        # A small object without a trailing newline keeps its last row
+        self.storage.put_object(self.bucket, prefix + 'small3', b''.join(rows[:10])[:-1])
+        data_prefix = self.storage_backend + '://' + self.bucket + '/' + prefix
+        with lithops.FunctionExecutor(config=pytest.lithops_config) as fexec:
+            fexec.map(my_map_function_iter_lines, data_prefix,
+                      obj_chunk_number=4, obj_balanced_chunks=True)
+            result = fexec.get_result()
+        # The large object is split in 4 partitions of about the dataset size / 4,
+        # and the small objects are grouped in a single shared partition
+        assert len(result) == 4 + 1
+        rows_per_partition = sorted(rows for rows, _ in result)
+        assert rows_per_partition[0] == 4 * 10
+        large_rows = rows_per_partition[1:]
+        # Rows are balanced by bytes, and the last rows are a few bytes longer
+        assert max(large_rows) - min(large_rows) <= 2000 / 4 * 0.05
+        assert sum(rows for rows, _ in result) == 2000 + 4 * 10
+        assert sum(words for _, words in result) == (2000 + 4 * 10) * 6
+
     def test_put_get_by_stream(self):
         logger.info('Testing Storage.put_object and get_object with streams')
 
@@ -88,6 +211,197 @@ class TestStorage:
 
         assert result == b'1234'
 
+    def test_parallel_range_read(self):
+        logger.info('Testing ParallelRangeStreamingBody over Storage.get_object')
+        key = STORAGE_PREFIX + '/lines'
+        data = b''.join(f'line {i}\n'.encode() for i in range(1000))
+        self.storage.put_object(self.bucket, key, data)
+
+        def fetch_range(first_byte, last_byte):
+            extra_get_args = {'Range': f'bytes={first_byte}-{last_byte}'}
+            return self.storage.get_object(self.bucket, key, extra_get_args=extra_get_args)
+
+        with ParallelRangeStreamingBody(fetch_range, 0, len(data) - 1, part_size=100, concurrency=4) as stream:
+            assert stream.read(10) == data[:10]
+            assert stream.readline() == data[10:data.index(b'\n', 10) + 1]
+            assert stream.read() == data[data.index(b'\n', 10) + 1:]
+
+        with ParallelRangeStreamingBody(fetch_range, 0, len(data) + 500, part_size=64, concurrency=3) as stream:
+            assert list(stream) == data.splitlines(keepends=True)
+
+        with ParallelRangeStreamingBody(fetch_range, 0, len(data) - 1, part_size=8) as stream:
+            assert stream.readline(3) == data[:3]
+            assert stream.readline(100) == data[3:data.index(b'\n') + 1]
+            assert stream.readline(0) == b''
+
+        buffer = bytearray(len(data))
+        with ParallelRangeStreamingBody(fetch_range, 0, len(data) - 1, part_size=128) as stream:
+            assert stream.readinto(buffer) == len(data)
+        assert bytes(buffer) == data
+
+        # The prefetched head ends in the middle of the second line
+        with PrefetchedStreamingBody(data[:10], lambda: BytesIO(data[10:])) as stream:
+            assert stream.readline(3) == data[:3]
+            assert stream.readline(0) == b''
+            assert stream.readline(5) == data[3:data.index(b'\n') + 1]
+            assert stream.readline(4) == data[7:11]
+            assert stream.readline() == data[11:data.index(b'\n', 11) + 1]
+            assert stream.read() == data[data.index(b'\n', 11) + 1:]
+
+    def test_parallel_transfers(self, tmp_path):
+        logger.info('Testing Storage multipart and concurrent range transfers')
+        storage_config = extract_storage_config(pytest.lithops_config)
+        storage_config['transfer_concurrency'] = 4
+        storage_config['transfer_part_size'] = 5 * 1024**2
+        storage = lithops.Storage(storage_config=storage_config)
+        data = os.urandom(12 * 1024**2 + 3)
+        key = STORAGE_PREFIX + '/multipart'
+
+        storage.put_object(self.bucket, key, data)
+        assert self.storage.get_object(self.bucket, key) == data
+        with storage.get_object(self.bucket, key, stream=True) as stream:
+            assert stream.read() == data
+
+        # The job objects are streamed without the head request of the concurrent download
+        job_key = JOBS_PREFIX + '/' + STORAGE_PREFIX + '/multipart'
+        storage.put_object(self.bucket, job_key, data)
+        storage.head_object = None
+        with storage.get_object(self.bucket, job_key, stream=True) as stream:
+            assert stream.read() == data
+        del storage.head_object
+        storage.delete_object(self.bucket, job_key)
+
+        storage.put_object(self.bucket, key, BytesIO(data[:7 * 1024**2]))
+        assert self.storage.get_object(self.bucket, key) == data[:7 * 1024**2]
+
+        file_path = tmp_path / 'upload'
+        file_path.write_bytes(data)
+        assert storage.upload_file(str(file_path), self.bucket, key)
+        assert storage.download_file(self.bucket, key, str(tmp_path / 'download'))
+        assert (tmp_path / 'download').read_bytes() == data
+
+    def test_storage_cache(self, tmp_path):
+        logger.info('Testing the read-through storage cache')
+        storage_config = extract_storage_config(pytest.lithops_config)
+        storage_config['storage_cache'] = True
+        storage = lithops.Storage(storage_config=storage_config)
+        key = STORAGE_PREFIX + '/cached'
+        data = b''.join(f'line {i}\n'.encode() for i in range(1000))
+
+        self.storage.put_object(self.bucket, key, data)
+        assert storage.get_object(self.bucket, key) == data
+        assert storage.get_object(self.bucket, key, extra_get_args={'Range': 'bytes=10-99'}) == data[10:100]
+        self.storage.put_object(self.bucket, key, data[::-1])
+        assert storage.get_object(self.bucket, key, stream=True).read() == data[::-1]
+
+        cache = StorageCache(self.storage.storage_handler, self.storage_backend,
+                             str(tmp_path), max_size=1000, ttl=60, block_size=100)
+        assert cache.get_object(self.bucket, key, extra_get_args={'Range': 'bytes=150-449'}) == data[::-1][150:450]
+        assert len(list((tmp_path / 'blocks').rglob('*'))) == 1 + 4
+        assert cache.get_object(self.bucket, key) == data[::-1]
+        # The cache size is checked every 10% of max_size written
+        assert sum(f.stat().st_size for f in (tmp_path / 'blocks').rglob('*') if f.is_file()) <= 1100
+
+        assert cache.get_object(self.bucket, key, extra_get_args={'Range': 'bytes=-250'}) == data[::-1][-250:]
+        stream = cache.get_object(self.bucket, key, stream=True, extra_get_args={'Range': 'bytes=150-449'})
+        assert stream.read(10) == data[::-1][150:160]
+        assert stream.read() == data[::-1][160:450]
+
+        assert len(list((tmp_path / 'meta').iterdir())) == 1
+        cache.invalidate_prefix(self.bucket, STORAGE_PREFIX + '/cache')
+        assert len(list((tmp_path / 'meta').iterdir())) == 0
+
+        # Without a validator, an overwrite with a same-size value can not be detected
+        class NoValidatorHandler:
+            def __init__(self, storage_handler):
+                self.storage_handler = storage_handler
+
+            def head_object(self, bucket, key):
+                return {'content-length': self.storage_handler.head_object(bucket, key)['content-length']}
+
+            def get_object(self, *args, **kwargs):
+                return self.storage_handler.get_object(*args, **kwargs)
+
+        cache = StorageCache(NoValidatorHandler(self.storage.storage_handler), self.storage_backend,
+                             str(tmp_path / 'no-validator'), max_size=1000, ttl=0, block_size=100)
+        assert cache.get_object(self.bucket, key) == data[::-1]
+        self.storage.put_object(self.bucket, key, data)
+        assert cache.get_object(self.bucket, key) == data
+        assert cache.get_object(self.bucket, key, stream=True).read() == data
+        assert list((tmp_path / 'no-validator' / 'blocks').iterdir()) == []
+
+    def test_mmap_range_read(self, tmp_path):
+        logger.info('Testing MmapStreamingBody and WrappedStreamingBody.readinto')
+        data = b''.join(f'line {i}\n'.encode() for i in range(5000))
+        file_path = tmp_path / 'lines'
+        file_path.write_bytes(data)
+
+        with MmapStreamingBody(str(file_path), 7000, 20000) as stream:
+            assert bytes(stream.getbuffer()) == data[7000:20001]
+            assert stream.readline() == data[7000:data.index(b'\n', 7000) + 1]
+            stream.seek(0)
+            buffer = bytearray(100)
+            wrapped = WrappedStreamingBody(stream, 13001)
+            assert wrapped.readinto(buffer) == 100
+            assert bytes(buffer) == data[7000:7100]
+            assert wrapped.read() == data[7100:20001]
+
+        with MmapStreamingBody(str(file_path), 0) as stream:
+            assert list(stream) == data.splitlines(keepends=True)
+
+    def test_bulk_operations(self):
+        logger.info('Testing Storage bulk operations')
+        objects = {STORAGE_PREFIX + f'/bulk/{i}': f'object {i}'.encode() for i in range(20)}
+        keys = list(objects)
+        self.storage.put_objects(self.bucket, objects)
+
+        assert self.storage.get_objects(self.bucket, keys) == list(objects.values())
+        assert dict(self.storage.get_objects(self.bucket, keys, ordered=False)) == objects
+        metadata = self.storage.head_objects(self.bucket, keys)
+        assert [int(meta['content-length']) for meta in metadata] == [len(data) for data in objects.values()]
+
+        ranges = [{'Range': 'bytes=0-5'}, {'Range': 'bytes=7-8'}]
+        assert self.storage.get_objects(self.bucket, keys[10:12], extra_get_args=ranges) == [b'object', b'11']
+
+        missing_keys = [keys[0], STORAGE_PREFIX + '/bulk/missing']
+        assert self.storage.get_objects(self.bucket, missing_keys, missing_ok=True) == [objects[keys[0]], None]
+        with pytest.raises(StorageNoSuchKeyError):
+            self.storage.get_objects(self.bucket, missing_keys)
+
+    def test_async_storage(self):
+        logger.info('Testing AsyncStorage')
+        storage_config = extract_storage_config(pytest.lithops_config)
+        objects = {STORAGE_PREFIX + f'/async/{i}': f'async object {i}'.encode() for i in range(10)}
+        keys = list(objects)
+
+        async def run():
+            async with lithops.AsyncStorage(storage_config=storage_config) as storage:
+                await storage.put_objects(self.bucket, objects)
+                data = await asyncio.gather(*[storage.get_object(self.bucket, key) for key in keys])
+                assert data == list(objects.values())
+                assert await storage.get_objects(self.bucket, keys) == list(objects.values())
+                assert sorted(await storage.list_keys(self.bucket, STORAGE_PREFIX + '/async/')) == sorted(keys)
+                meta = await storage.head_object(self.bucket, keys[0])
+                assert int(meta['content-length']) == len(objects[keys[0]])
+                await storage.delete_objects(self.bucket, keys)
+                with pytest.raises(StorageNoSuchKeyError):
+                    await storage.get_object(self.bucket, keys[0])
+
+        asyncio.run(run())
+
+    def test_clean_bucket(self):
+        logger.info('Testing clean_bucket')
+        prefix = STORAGE_PREFIX + '/clean/'
+        keys = [prefix + f'job{i % 3}/call{i}/output' for i in range(30)] + [prefix + 'job10/output']
+        self.storage.put_objects(self.bucket, {key: b'output' for key in keys})
+
+        self.storage.delete_prefix(self.bucket, prefix + 'job1')
+        assert sorted(self.storage.list_keys(self.bucket, prefix)) == sorted(k for k in keys if '/job1' not in k)
+
+        clean_bucket(self.storage, self.bucket, prefix, sleep=1)
+        assert self.storage.list_keys(self.bucket, prefix) == []
+        assert self.storage.list_keys(self.bucket, STORAGE_PREFIX + '/test0') == [STORAGE_PREFIX + '/test0']
+
     def test_list_keys(self):
         logger.info('Testing Storage.list_keys')
         test_keys = sorted([
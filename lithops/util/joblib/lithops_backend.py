@@ -151,7 +151,7 @@ def find_shared_objects(calls):
         if len(positions) > 1 and consider_sharing(obj):
             logger.debug('Proxying {}'.format(type(obj)))
             obj_bin = pickle.dumps(obj)
-            cloud_object = storage.put_cloudobject(obj_bin)
+            cloud_object = storage.put_cloudobject(obj_bin, content_addressed=True)
 
             for pos in positions:
                 call_n, idx_or_key = pos
@@ -0,0 +1,118 @@
+#
+# (C) Copyright Cloudlab URV 2021
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import sys
+import threading
+
+from lithops.constants import PROFILER_INTERVAL, PROFILER_MAX_STACKS, PROFILER_MAX_DEPTH
+
+TRUNCATED_STACK = '[truncated]'
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    module = frame.f_globals.get('__name__', '?')
+    name = getattr(code, 'co_qualname', code.co_name)
+    return f'{module}.{name}'.replace(';', ':')
+
+
+class SamplingProfiler:
+    """
+    Wall-clock sampling profiler of a thread. A background thread takes a
+    sample of the stack of the profiled thread every `interval` seconds, and
+    counts the samples of each stack. Only the frames called from the frame
+    that started the profiler are kept. The number of different stacks is
+    capped, and the samples of the new stacks beyond the cap are counted as
+    a single truncated stack.
+    """
+
+    def __init__(self, interval=PROFILER_INTERVAL, max_stacks=PROFILER_MAX_STACKS,
+                 max_depth=PROFILER_MAX_DEPTH):
+        self.interval = interval
+        self.max_stacks = max_stacks
+        self.max_depth = max_depth
+        self.samples = {}
+
+        self._thread_id = None
+        self._base_frame = None
+        self._stop_event = threading.Event()
+        self._sampler = None
+
+    def start(self):
+        """
+        Starts profiling the functions called by the caller of this method
+        """
+        self._start(sys._getframe(1))
+
+    def _start(self, base_frame):
+        self._thread_id = threading.get_ident()
+        self._base_frame = base_frame
+        self._stop_event.clear()
+        self._sampler = threading.Thread(target=self._run, daemon=True)
+        self._sampler.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._sampler is not None:
+            self._sampler.join()
+            self._sampler = None
+        self._base_frame = None
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is not None:
+                self._sample(frame)
+
+    def _sample(self, frame):
+        labels = []
+        while frame is not None and frame is not self._base_frame:
+            labels.append(_frame_label(frame))
+            frame = frame.f_back
+        if frame is None or not labels:
+            # The thread is not running the profiled code
+            return
+        stack = ';'.join(reversed(labels[-self.max_depth:]))
+        if stack not in self.samples and len(self.samples) >= self.max_stacks:
+            stack = TRUNCATED_STACK
+        self.samples[stack] = self.samples.get(stack, 0) + 1
+
+    def __enter__(self):
+        self._start(sys._getframe(1))
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+def merge_profiles(profiles):
+    """
+    Merges several profiles, as dicts of {stack: samples}, into one
+    """
+    merged = {}
+    for profile in profiles:
+        for stack, count in profile.items():
+            merged[stack] = merged.get(stack, 0) + count
+    return merged
+
+
+def to_collapsed(profile):
+    """
+    Formats a profile in the collapsed stacks format, one 'frame;frame;frame
+    samples' line per stack, read by flamegraph.pl, speedscope and similar tools
+    """
+    lines = [f'{stack} {count}' for stack, count in sorted(profile.items())]
+    return '\n'.join(lines) + '\n' if lines else ''
@@ -18,6 +18,8 @@
 
 import re
 import os
+import io
+import mmap
 import sys
 import uuid
 import json
@@ -30,6 +32,8 @@ import lithops
 import zipfile
 import platform
 import threading
+import collections
+import concurrent.futures
 import logging.config
 import subprocess as sp
 from enum import Enum
@@ -41,6 +45,9 @@ from lithops.version import __version__
 
 logger = logging.getLogger(__name__)
 
+HTTP_SESSION = None
+HTTP_SESSION_LOCK = threading.Lock()
+
 
 def uuid_str():
     return str(uuid.uuid4())
@@ -448,6 +455,40 @@ def find_free_port():
         return s.getsockname()[1]
 
 
+def get_http_session():
+    """
+    Returns a requests Session shared by all the threads of the current process.
+    It keeps connections alive across requests to the same host and retries
+    requests that fail with connection errors or transient server errors.
+    """
+    global HTTP_SESSION
+
+    with HTTP_SESSION_LOCK:
+        # Connections must not be shared with forked processes
+        if HTTP_SESSION is None or HTTP_SESSION[0] != os.getpid():
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+
+            retries = Retry(
+                total=constants.HTTP_RETRIES,
+                backoff_factor=0.2,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=['HEAD', 'GET']
+            )
+            adapter = HTTPAdapter(
+                pool_connections=constants.HTTP_POOL_SIZE,
+                pool_maxsize=constants.HTTP_POOL_SIZE,
+                max_retries=retries
+            )
+            session = requests.Session()
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            HTTP_SESSION = (os.getpid(), session)
+
+        return HTTP_SESSION[1]
+
+
 def split_object_url(obj_url):
     if '://' in obj_url:
         sb, path = obj_url.split('://')
@@ -586,6 +627,16 @@ class WrappedStreamingBody:
         self.pos += len(retval)
         return retval
 
+    def readinto(self, b):
+        if hasattr(self.sb, 'readinto'):
+            retval = self.sb.readinto(b)
+        else:
+            data = self.sb.read(len(b))
+            retval = len(data)
+            memoryview(b).cast('B')[:retval] = data
+        self.pos += retval
+        return retval
+
     def readline(self):
         try:
             retval = self.sb.readline()
@@ -630,6 +681,8 @@ class WrappedStreamingBody:
             return self.read
         elif attr == 'readline':
             return self.readline
+        elif attr == 'readinto':
+            return self.readinto
         elif attr == '__str__':
             return self.__str__
         elif attr == '__iter__':
@@ -659,37 +712,69 @@ class WrappedStreamingBodyPartition(WrappedStreamingBody):
         self._eof = False
         # special logic the first time the stream is read
         self._first_read = True
+        # boto3's StreamingBody only exposes readline() in its raw stream
+        self._raw_stream = getattr(sb, '_raw_stream', sb)
 
     def read(self, n=None):
-        if self._eof:
-            return b''
+        # Discarding a partial row can leave a read without data,
+        # but an empty result means the end of the partition
+        retval = b''
+        while not retval and not self._eof:
+            retval = self._read(n)
+        return retval
+
+    def _read(self, n=None):
         # Data always contain one byte from the previous chunk,
         # so l'ets check if it is a \n or not
         if not self._first_byte and self._plusbytes == 1:
             self._first_byte = self.sb.read(self._plusbytes)
 
         retval = self.sb.read(n)
+        if not retval:
+            self._eof = True
+            return b''
         last_row_end_pos = len(retval)
         self.pos += last_row_end_pos
         first_row_start_pos = 0
 
         if self._first_read and self._first_byte and \
            self._first_byte != self.newline_char:
-            logger.debug('Discarding first partial row')
             # Previous byte is not self.newline_char
             # This means that we have to discard first row because it is cut
-            first_row_start_pos = retval.find(self.newline_char) + 1
-            self._first_read = False
+            first_row_end = retval.find(self.newline_char)
+            if first_row_end == -1:
+                # The first row continues in the next read
+                first_row_start_pos = last_row_end_pos
+            else:
+                logger.debug('Discarding first partial row')
+                first_row_start_pos = first_row_end + len(self.newline_char)
+                self._first_read = False
 
         # Find end of the line in threshold
         if self.pos >= self.size:
             current_end_pos = last_row_end_pos - (self.pos - self.size)
-            last_byte_pos = retval[current_end_pos - 1:].find(self.newline_char)
-            last_row_end_pos = current_end_pos + last_byte_pos
+            last_row_end = retval.find(self.newline_char, max(current_end_pos - 1, first_row_start_pos))
+            while last_row_end == -1:
+                # The last row continues beyond the data read so far
+                extra = self.sb.read(64 * 1024)
+                if not extra:
+                    break
+                search_pos = max(len(retval) - len(self.newline_char) + 1, 0)
+                retval += extra
+                last_row_end = retval.find(self.newline_char, search_pos)
+            last_row_end_pos = len(retval) if last_row_end == -1 \
+                else last_row_end + len(self.newline_char)
             self._eof = True
 
         return retval[first_row_start_pos:last_row_end_pos]
 
+    def readinto(self, b):
+        # Partial rows must be discarded, so data can't be read
+        # directly into the provided buffer
+        data = self.read(len(b))
+        memoryview(b).cast('B')[:len(data)] = data
+        return len(data)
+
     def readline(self):
         if self._eof:
             return b''
@@ -698,9 +783,9 @@ class WrappedStreamingBodyPartition(WrappedStreamingBody):
             self._first_byte = self.sb.read(self._plusbytes)
             if self._first_byte != self.newline_char:
                 logger.debug('Discarding first partial row')
-                self.sb._raw_stream.readline()
+                self.pos += len(self._raw_stream.readline())
         try:
-            retval = self.sb._raw_stream.readline()
+            retval = self._raw_stream.readline()
         except struct.error:
             raise EOFError()
         self.pos += len(retval)
@@ -711,6 +796,384 @@ class WrappedStreamingBodyPartition(WrappedStreamingBody):
         return retval
 
 
+class MmapStreamingBody(io.BufferedIOBase):
+    """
+    Read-only file-like object over the byte range [first_byte, last_byte] of
+    a local file, backed by a memory map. getbuffer() returns a zero-copy
+    memoryview of the range, and readinto() copies the data only once.
+    """
+    def __init__(self, path, first_byte=0, last_byte=None):
+        super().__init__()
+        file_size = os.path.getsize(path)
+        if last_byte is None or last_byte >= file_size:
+            last_byte = file_size - 1
+        self.size = max(0, last_byte - first_byte + 1)
+        self.pos = 0
+
+        self._mmap = None
+        self._start = 0
+        if self.size > 0:
+            # The offset of a memory map must be a multiple of the allocation granularity
+            offset = first_byte - (first_byte % mmap.ALLOCATIONGRANULARITY)
+            self._start = first_byte - offset
+            with open(path, 'rb') as f:
+                self._mmap = mmap.mmap(f.fileno(), self._start + self.size,
+                                       access=mmap.ACCESS_READ, offset=offset)
+            self._view = memoryview(self._mmap)[self._start:self._start + self.size]
+        else:
+            self._view = memoryview(b'')
+
+    def getbuffer(self):
+        return self._view[:]
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset = self.pos + offset
+        elif whence == io.SEEK_END:
+            offset = self.size + offset
+        self.pos = min(max(0, offset), self.size)
+        return self.pos
+
+    def read(self, n=-1):
+        end = self.size if n is None or n < 0 else min(self.pos + n, self.size)
+        retval = self._view[self.pos:end].tobytes()
+        self.pos = end
+        return retval
+
+    read1 = read
+
+    def readinto(self, b):
+        out = memoryview(b).cast('B')
+        size = min(len(out), self.size - self.pos)
+        out[:size] = self._view[self.pos:self.pos + size]
+        self.pos += size
+        return size
+
+    readinto1 = readinto
+
+    def readline(self, size=-1):
+        if self.pos >= self.size:
+            return b''
+        end = self._mmap.find(b'\n', self._start + self.pos, self._start + self.size)
+        end = self.size if end == -1 else end - self._start + 1
+        if size is not None and size >= 0:
+            end = min(end, self.pos + size)
+        retval = self._view[self.pos:end].tobytes()
+        self.pos = end
+        return retval
+
+    def close(self):
+        if self._mmap is not None:
+            self._view.release()
+            try:
+                self._mmap.close()
+            except BufferError:
+                # memoryviews returned by getbuffer() are still alive
+                pass
+            self._mmap = None
+        super().close()
+
+
+class ParallelRangeStreamingBody:
+    """
+    Read-only file-like object over the byte range [first_byte, last_byte] of an
+    object. The range is split in sub-ranges of part_size bytes that are fetched
+    concurrently with fetch_range(first_byte, last_byte) -> bytes. At most
+    `concurrency` parts are buffered or in flight at the same time.
+    """
+    def __init__(self, fetch_range, first_byte, last_byte,
+                 part_size=constants.RANGE_READ_PART_SIZE,
+                 concurrency=constants.RANGE_READ_CONCURRENCY):
+        self.fetch_range = fetch_range
+        self.first_byte = first_byte
+        self.last_byte = last_byte
+        self.part_size = part_size
+        self.concurrency = max(1, concurrency)
+        self.pos = 0
+
+        self._next_part = first_byte
+        self._parts = collections.deque()
+        self._data = b''
+        self._offset = 0
+        self._eof = False
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=self.concurrency)
+        self._fill()
+
+    def _fill(self):
+        while (not self._eof and len(self._parts) < self.concurrency
+               and self._next_part <= self.last_byte):
+            part_first = self._next_part
+            part_last = min(part_first + self.part_size - 1, self.last_byte)
+            future = self._pool.submit(self.fetch_range, part_first, part_last)
+            self._parts.append((future, part_last - part_first + 1))
+            self._next_part = part_last + 1
+
+    def _available(self):
+        """
+        Returns the number of buffered bytes, moving to the next
+        downloaded part if the current one is exhausted
+        """
+        while self._offset >= len(self._data):
+            if not self._parts:
+                self._eof = True
+                return 0
+            future, expected_size = self._parts.popleft()
+            self._data = future.result()
+            self._offset = 0
+            if len(self._data) < expected_size:
+                # The object ends before last_byte
+                self._eof = True
+                self._discard_parts()
+            self._fill()
+        return len(self._data) - self._offset
+
+    def _discard_parts(self):
+        for future, _ in self._parts:
+            future.cancel()
+        self._parts.clear()
+
+    def _consume(self, size):
+        chunk = self._data[self._offset:self._offset + size]
+        self._offset += len(chunk)
+        self.pos += len(chunk)
+        return chunk
+
+    def tell(self):
+        return self.pos
+
+    def readable(self):
+        return True
+
+    def read(self, n=None):
+        chunks = []
+        remaining = -1 if n is None or n < 0 else n
+        while remaining != 0:
+            available = self._available()
+            if not available:
+                break
+            size = available if remaining < 0 else min(remaining, available)
+            chunks.append(self._consume(size))
+            if remaining > 0:
+                remaining -= size
+        return b''.join(chunks)
+
+    def readinto(self, b):
+        out = memoryview(b).cast('B')
+        total = 0
+        while total < len(out):
+            available = self._available()
+            if not available:
+                break
+            size = min(len(out) - total, available)
+            out[total:total + size] = memoryview(self._data)[self._offset:self._offset + size]
+            self._offset += size
+            total += size
+        self.pos += total
+        return total
+
+    def readline(self, size=-1):
+        chunks = []
+        remaining = -1 if size is None or size < 0 else size
+        while remaining != 0 and self._available():
+            end = self._data.find(b'\n', self._offset)
+            line_end = len(self._data) if end == -1 else end + 1
+            if remaining > 0:
+                line_end = min(line_end, self._offset + remaining)
+                remaining -= line_end - self._offset
+            chunks.append(self._consume(line_end - self._offset))
+            if chunks[-1].endswith(b'\n'):
+                break
+        return b''.join(chunks)
+
+    def close(self):
+        self._discard_parts()
+        self._pool.shutdown(wait=False)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class PrefetchedStreamingBody(io.RawIOBase):
+    """
+    Read-only file-like object that returns the already downloaded `head`
+    bytes first, and then the data of the stream returned by open_rest(),
+    which is only called once the head is consumed.
+    """
+    def __init__(self, head, open_rest=None):
+        self._head = head
+        self._offset = 0
+        self._open_rest = open_rest
+        self._rest = None
+        self.pos = 0
+
+    def _rest_stream(self):
+        if self._rest is None and self._open_rest is not None:
+            self._rest = self._open_rest()
+            self._open_rest = None
+        return self._rest
+
+    def tell(self):
+        return self.pos
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        out = memoryview(b).cast('B')
+        if self._offset < len(self._head):
+            size = min(len(out), len(self._head) - self._offset)
+            out[:size] = memoryview(self._head)[self._offset:self._offset + size]
+            self._offset += size
+        else:
+            rest = self._rest_stream()
+            if rest is None:
+                size = 0
+            elif hasattr(rest, 'readinto'):
+                size = rest.readinto(out) or 0
+            else:
+                data = rest.read(len(out))
+                size = len(data)
+                out[:size] = data
+        self.pos += size
+        return size
+
+    def read(self, n=None):
+        if n is None or n < 0:
+            return self.readall()
+        chunks = []
+        while n > 0:
+            chunk = bytearray(n)
+            size = self.readinto(chunk)
+            if not size:
+                break
+            chunks.append(bytes(chunk[:size]) if size < n else bytes(chunk))
+            n -= size
+        return b''.join(chunks)
+
+    def readline(self, size=-1):
+        if size is None or size < 0:
+            size = -1
+        line = b''
+        if self._offset < len(self._head):
+            end = self._head.find(b'\n', self._offset)
+            end = len(self._head) if end == -1 else end + 1
+            if size >= 0:
+                end = min(end, self._offset + size)
+            line = self._head[self._offset:end]
+            self._offset = end
+            self.pos += len(line)
+            if line.endswith(b'\n') or len(line) == size:
+                return line
+        rest = self._rest_stream() if len(line) != size else None
+        if rest is not None:
+            rest_line = rest.readline(size - len(line) if size >= 0 else -1)
+            self.pos += len(rest_line)
+            line += rest_line
+        return line
+
+    def close(self):
+        if self._rest is not None and hasattr(self._rest, 'close'):
+            self._rest.close()
+        self._open_rest = None
+        super().close()
+
+
+class ConcatStreamingBody(io.RawIOBase):
+    """
+    Read-only file-like object that returns the data of several streams one
+    after the other. Each stream is opened by calling its function in
+    `open_streams` once the previous one is consumed. If a separator is given,
+    it is added between two streams when the first does not end with it.
+    """
+    def __init__(self, open_streams, separator=None):
+        self._open_streams = list(open_streams)
+        self._separator = separator or b''
+        self._stream = None
+        self._tail = b''
+        self._pending = b''
+        self.pos = 0
+
+    def _current_stream(self):
+        if self._stream is None and self._open_streams:
+            self._stream = self._open_streams.pop(0)()
+        return self._stream
+
+    def _next_stream(self):
+        if hasattr(self._stream, 'close'):
+            self._stream.close()
+        self._stream = None
+        if self._separator and self._tail and self._open_streams \
+           and not self._tail.endswith(self._separator):
+            self._pending = self._separator
+        self._tail = b''
+
+    def tell(self):
+        return self.pos
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        out = memoryview(b).cast('B')
+        while not self._pending:
+            stream = self._current_stream()
+            if stream is None:
+                return 0
+            if hasattr(stream, 'readinto'):
+                size = stream.readinto(out) or 0
+            else:
+                data = stream.read(len(out))
+                size = len(data)
+                out[:size] = data
+            if size:
+                if self._separator:
+                    sep_size = len(self._separator)
+                    self._tail = (self._tail + bytes(out[max(0, size - sep_size):size]))[-sep_size:]
+                self.pos += size
+                return size
+            self._next_stream()
+
+        size = min(len(out), len(self._pending))
+        out[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        self.pos += size
+        return size
+
+    def close(self):
+        if self._stream is not None and hasattr(self._stream, 'close'):
+            self._stream.close()
+        self._stream = None
+        self._open_streams = []
+        super().close()
+
+
 def run_command(cmd, return_result=False, input=None):
     kwargs = {}
 
@@ -283,17 +283,41 @@ def _get_executor_data(fs, exec_data, download_results, throw_except, threadpool
         if (f.executor_id, f.job_id, f.call_id) in new_callids_done:
             fs_to_wait_on.append(f)
 
+    internal_storage = exec_data.internal_storage
+
+    # Download in bulk the status of the futures not tagged as ready by the monitor
+    fs_status = [f for f in fs_to_wait_on if f._call_status is None or f._call_status['type'] == '__init__']
+    if fs_status:
+        call_ids = [(f.executor_id, f.job_id, f.call_id) for f in fs_status]
+        for f, call_status in zip(fs_status, internal_storage.get_calls_status(call_ids, threadpool_size)):
+            f._status_query_count += 1
+            if call_status is not None:
+                f._call_status = call_status
+
+    # The futures whose status is not available yet are checked in the next round,
+    # instead of querying the storage for their status one by one
+    fs_to_wait_on = [f for f in fs_to_wait_on if f._call_status is not None and f._call_status['type'] != '__init__']
+
     def get_result(f):
-        f.result(throw_except=throw_except, internal_storage=exec_data.internal_storage)
+        f.result(throw_except=throw_except, internal_storage=internal_storage)
 
     def get_status(f):
-        f.status(throw_except=throw_except, internal_storage=exec_data.internal_storage)
+        f.status(throw_except=throw_except, internal_storage=internal_storage)
 
     pool = cf.ThreadPoolExecutor(max_workers=threadpool_size)
+    list(pool.map(get_status, fs_to_wait_on))
+
     if download_results:
+        # Download in bulk the outputs of the futures that produced one
+        fs_output = [f for f in fs_to_wait_on if f.success and f._call_output is None]
+        if fs_output:
+            call_ids = [(f.executor_id, f.job_id, f.call_id) for f in fs_output]
+            for f, call_output in zip(fs_output, internal_storage.get_calls_output(call_ids, threadpool_size)):
+                f._output_query_count += 1
+                if call_output is not None:
+                    f._set_call_output(call_output)
+
         list(pool.map(get_result, fs_to_wait_on))
-    else:
-        list(pool.map(get_status, fs_to_wait_on))
     pool.shutdown()
 
     if pbar:
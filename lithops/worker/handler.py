@@ -17,29 +17,37 @@
 
 import os
 import sys
+import copy
+import atexit
 import zlib
 import time
 import json
 import uuid
-import base64
 import pickle
+import signal
 import logging
+import threading
 import traceback
 import multiprocessing as mp
 from queue import Queue, Empty
 from threading import Thread
 from multiprocessing import Process, Pipe
+from multiprocessing.connection import wait as wait_connections
 from tblib import pickling_support
 from types import SimpleNamespace
 from multiprocessing.managers import SyncManager
 
+from lithops import serializers
 from lithops.version import __version__
 from lithops.config import extract_storage_config
 from lithops.storage import InternalStorage
 from lithops.worker.jobrunner import JobRunner
 from lithops.worker.utils import LogStream, custom_redirection, \
     get_function_and_modules, get_function_data
-from lithops.constants import JOBS_PREFIX, LITHOPS_TEMP_DIR, MODULES_DIR
+from lithops.worker.prefetch import InputPrefetcher
+from lithops.storage.utils import create_logs_key
+from lithops.constants import JOBS_PREFIX, LITHOPS_TEMP_DIR, MODULES_DIR, WORKER_PREFETCH_SIZE, \
+    WORKER_LOGS_MAX_SIZE
 from lithops.utils import setup_lithops_logger, is_unix_system
 from lithops.worker.status import create_call_status
 from lithops.worker.utils import SystemMonitor
@@ -49,16 +57,29 @@ pickling_support.install()
 logger = logging.getLogger(__name__)
 
 
+class ExecutionTimeout(BaseException):
+    """
+    Raised in the function code when it exceeds the execution timeout in fast
+    mode. It does not inherit from Exception, so the JobRunner does not report
+    it as a function exception.
+    """
+    pass
+
+
+WORKER_POOL = None
+
+
 class ShutdownSentinel:
     """Put an instance of this class on the queue to shut it down"""
     pass
 
 
-def create_job(payload: dict) -> SimpleNamespace:
+def create_job(payload: dict, load_function: bool = True) -> SimpleNamespace:
     job = SimpleNamespace(**payload)
     storage_config = extract_storage_config(job.config)
     internal_storage = InternalStorage(storage_config)
-    job.func = get_function_and_modules(job, internal_storage)
+    if load_function:
+        job.func = get_function_and_modules(job, internal_storage)
     job.data = get_function_data(job, internal_storage)
 
     return job
@@ -68,19 +89,42 @@ def function_handler(payload):
     """
     Default function entry point called from Serverless backends
     """
-    job = create_job(payload)
+    global WORKER_POOL
+
+    worker_processes = min(payload['worker_processes'], len(payload['call_ids']))
+    use_pool = worker_processes > 1 and is_unix_system()
+    reuse_pool = use_pool and WORKER_POOL is not None and \
+        WORKER_POOL.is_reusable(payload['job_key'], worker_processes)
+
+    if WORKER_POOL is not None and not reuse_pool:
+        WORKER_POOL.shutdown()
+        WORKER_POOL = None
+
+    job = create_job(payload, load_function=not reuse_pool)
     setup_lithops_logger(job.log_level)
 
-    worker_processes = min(job.worker_processes, len(job.call_ids))
     logger.info(f'Tasks received: {len(job.call_ids)} - Worker processes: {worker_processes}')
 
     if worker_processes == 1:
+        prefetcher = None
+        prefetch_calls = job.config['lithops'].get('worker_prefetch_calls', 0)
+        if prefetch_calls > 0 and len(job.call_ids) > 1:
+            prefetch_size = job.config['lithops'].get('worker_prefetch_size', WORKER_PREFETCH_SIZE)
+            prefetcher = InputPrefetcher(job.config, zip(job.call_ids, job.data), prefetch_calls, prefetch_size)
         work_queue = Queue()
         for call_id in job.call_ids:
             data = job.data.pop(0)
             work_queue.put((job, call_id, data))
         work_queue.put(ShutdownSentinel())
-        python_queue_consumer(0, work_queue, )
+        python_queue_consumer(0, work_queue, prefetcher=prefetcher)
+        if prefetcher is not None:
+            prefetcher.close()
+    elif use_pool:
+        if not reuse_pool:
+            WORKER_POOL = WorkerPool(job, worker_processes)
+        else:
+            logger.debug('Reusing the worker processes of the previous invocation')
+        WORKER_POOL.run(payload, job.call_ids, job.data)
     else:
         manager = SyncManager()
         manager.start()
@@ -110,9 +154,161 @@ def function_handler(payload):
     os.environ.pop('__LITHOPS_TOTAL_EXECUTORS', None)
 
 
-def python_queue_consumer(pid, work_queue, initializer=None, callback=None):
+class WorkerPool:
+    """
+    Pool of worker processes forked from the handler process. The workers
+    inherit the job, with the function already deserialized, so only the
+    call id and the data of each call are sent to them through a pipe, and
+    they run the calls in their own process. The pool is kept for the next
+    invocations of the same job in warm containers.
+    """
+
+    def __init__(self, job, worker_processes):
+        self.job = job
+        self.job_key = job.job_key
+        self.workers = {}
+
+        try:
+            job.loaded_func = serializers.loads(job.func)
+        except Exception:
+            # The JobRunner reports the error of each call
+            job.loaded_func = None
+
+        for pid in range(worker_processes):
+            self._start_worker(pid)
+        atexit.register(self.shutdown)
+
+    def _start_worker(self, pid):
+        ctx = mp.get_context('fork')
+        handler_conn, worker_conn = ctx.Pipe()
+        process = ctx.Process(target=pool_worker, args=(pid, self.job, worker_conn))
+        process.start()
+        worker_conn.close()
+        self.workers[pid] = (process, handler_conn)
+
+    def _restart_worker(self, pid):
+        process, handler_conn = self.workers[pid]
+        process.join()
+        handler_conn.close()
+        self._start_worker(pid)
+
+    def is_reusable(self, job_key, worker_processes):
+        return job_key == self.job_key and len(self.workers) == worker_processes \
+            and all(process.is_alive() for process, _ in self.workers.values())
+
+    def run(self, payload, call_ids, data):
+        """
+        Sends each call to the next idle worker, and waits until all of them finish
+        """
+        self.invocation_attrs = {k: v for k, v in payload.items()
+                                 if k not in ('call_ids', 'data_byte_ranges', 'data_byte_strs')}
+        pending_calls = list(zip(call_ids, data))
+        idle_workers = list(self.workers)
+        running_calls = {}
+
+        while pending_calls or running_calls:
+            while pending_calls and idle_workers:
+                pid = idle_workers.pop()
+                call_id, call_data = pending_calls.pop(0)
+                if not self.workers[pid][0].is_alive():
+                    self._restart_worker(pid)
+                self.workers[pid][1].send((self.invocation_attrs, call_id, call_data))
+                running_calls[pid] = (call_id, time.time())
+
+            conns = {self.workers[pid][1]: pid for pid in running_calls}
+            sentinels = {self.workers[pid][0].sentinel: pid for pid in running_calls}
+            for ready in wait_connections(list(conns) + list(sentinels)):
+                pid = conns.get(ready, sentinels.get(ready))
+                if pid not in running_calls:
+                    continue
+                process, handler_conn = self.workers[pid]
+                call_id, start_tstamp = running_calls.pop(pid)
+                try:
+                    handler_conn.recv()
+                except (EOFError, OSError):
+                    logger.error(f'Worker process {pid} died while running call {call_id}')
+                    self._restart_worker(pid)
+                    self._send_killed_status(call_id, start_tstamp)
+                idle_workers.append(pid)
+
+    def _send_killed_status(self, call_id, start_tstamp):
+        """
+        Sends the finish status of a call whose worker process was killed, so
+        that the client does not wait for it. The worker process is only
+        killed by the system when it exceeds the maximum memory.
+        """
+        task = create_task(self.job, self.invocation_attrs, call_id, None)
+        task.start_tstamp = start_tstamp
+        try:
+            storage_config = extract_storage_config(task.config)
+            call_status = create_call_status(task, InternalStorage(storage_config))
+            try:
+                raise MemoryError('HANDLER', 'Function exceeded maximum memory and was killed')
+            except MemoryError:
+                call_status.add('exception', True)
+                call_status.add('exc_info', pickle.dumps(sys.exc_info()))
+            call_status.add('worker_end_tstamp', time.time())
+            call_status.send_finish_event()
+        except Exception as e:
+            logger.error(f'Could not send the status of call {call_id}: {e}')
+
+    def shutdown(self):
+        """
+        Stops the worker processes
+        """
+        for process, handler_conn in self.workers.values():
+            try:
+                handler_conn.send(ShutdownSentinel())
+            except OSError:
+                pass
+        for process, handler_conn in self.workers.values():
+            process.join(5)
+            if process.is_alive():
+                process.terminate()
+            handler_conn.close()
+        self.workers = {}
+        atexit.unregister(self.shutdown)
+
+
+def pool_worker(pid, job, worker_conn):
+    """
+    Receives calls from the handler process and runs them
+    """
+    logger.info(f'Worker process {pid} started')
+    while True:
+        try:
+            event = worker_conn.recv()
+        except EOFError:
+            break
+
+        if isinstance(event, ShutdownSentinel):
+            break
+
+        invocation_attrs, call_id, data = event
+        task = create_task(job, invocation_attrs, call_id, data)
+        # The worker process already isolates the calls from the handler
+        prepare_and_run_task(task, in_process=True)
+
+        worker_conn.send(call_id)
+
+    logger.info(f'Worker process {pid} finished')
+
+
+def create_task(job, invocation_attrs, call_id, data):
+    """
+    Creates the task of a call of the job run by the worker pool
+    """
+    task = copy.copy(job)
+    task.__dict__.update(invocation_attrs)
+    task.call_id = call_id
+    task.data = data
+    return task
+
+
+def python_queue_consumer(pid, work_queue, initializer=None, callback=None, prefetcher=None):
     """
-    Listens to the job_queue and executes the individual job tasks
+    Listens to the job_queue and executes the individual job tasks. If an
+    InputPrefetcher is provided, the tasks receive its prefetched data.
     """
     logger.info(f'Worker process {pid} started')
     while True:
@@ -129,6 +325,7 @@ def python_queue_consumer(pid, work_queue, initializer=None, callback=None):
         task, call_id, data = event
         task.call_id = call_id
         task.data = data
+        task.prefetched_input = prefetcher.get(call_id) if prefetcher is not None else None
 
         initializer(pid, task) if initializer is not None else None
 
@@ -139,7 +336,7 @@ def python_queue_consumer(pid, work_queue, initializer=None, callback=None):
     logger.info(f'Worker process {pid} finished')
 
 
-def prepare_and_run_task(task):
+def prepare_and_run_task(task, in_process=False):
     task.start_tstamp = time.time()
 
     if '__LITHOPS_ACTIVATION_ID' not in os.environ:
@@ -154,7 +351,11 @@ def prepare_and_run_task(task):
     bucket = task.config[storage_backend]['storage_bucket']
     task.task_dir = os.path.join(LITHOPS_TEMP_DIR, bucket, JOBS_PREFIX, task.job_key, task.call_id)
     task.log_file = os.path.join(task.task_dir, 'execution.log')
-    task.stats_file = os.path.join(task.task_dir, 'job_stats.txt')
+    # The timeout of the fast mode is enforced with SIGALRM, so otherwise
+    # the call runs in a separate process that can be killed
+    task.fast_mode = (in_process or task.config['lithops'].get('worker_fast_mode', False)) \
+        and is_unix_system() and threading.current_thread() is threading.main_thread()
+    task.stats_file = None if task.fast_mode else os.path.join(task.task_dir, 'job_stats.pickle')
     os.makedirs(task.task_dir, exist_ok=True)
 
     with open(task.log_file, 'a') as log_strem:
@@ -167,6 +368,132 @@ def prepare_and_run_task(task):
         os.environ.pop(key, None)
 
 
+def run_jobrunner_process(task, internal_storage, call_status):
+    """
+    Runs the JobRunner in a separate process, and adds its
+    stats and the resources it used to the call status
+    """
+    handler_conn, jobrunner_conn = Pipe()
+    jobrunner = JobRunner(task, jobrunner_conn, internal_storage)
+    logger.debug('Starting JobRunner process')
+    jrp = Process(target=jobrunner.run) if is_unix_system() else Thread(target=jobrunner.run)
+
+    process_id = os.getpid() if is_unix_system() else mp.current_process().pid
+    sys_monitor = SystemMonitor(process_id)
+    sys_monitor.start()
+
+    jrp.start()
+    jrp.join(task.execution_timeout)
+
+    sys_monitor.stop()
+    logger.debug('JobRunner process finished')
+
+    cpu_info = sys_monitor.get_cpu_info()
+    call_status.add('worker_func_cpu_usage', cpu_info['usage'])
+    call_status.add('worker_func_cpu_system_time', round(cpu_info['system'], 8))
+    call_status.add('worker_func_cpu_user_time', round(cpu_info['user'], 8))
+
+    net_io = sys_monitor.get_network_io()
+    call_status.add('worker_func_sent_net_io', net_io['sent'])
+    call_status.add('worker_func_recv_net_io', net_io['recv'])
+
+    mem_info = sys_monitor.get_memory_info()
+    call_status.add('worker_func_rss', mem_info['rss'])
+    call_status.add('worker_func_vms', mem_info['vms'])
+    call_status.add('worker_func_uss', mem_info['uss'])
+
+    if jrp.is_alive():
+        # If process is still alive after jr.join(job_max_runtime), kill it
+        try:
+            jrp.terminate()
+        except Exception:
+            # thread does not have terminate method
+            pass
+        msg = ('Function exceeded maximum time of {} seconds and was '
+               'killed'.format(task.execution_timeout))
+        raise TimeoutError('HANDLER', msg)
+
+    if not handler_conn.poll():
+        logger.error('No completion message received from JobRunner process')
+        logger.debug('Assuming memory overflow...')
+        # Only 1 message is returned by jobrunner when it finishes.
+        # If no message, this means that the jobrunner process was killed.
+        # 99% of times the jobrunner is killed due an OOM, so we assume here an OOM.
+        msg = 'Function exceeded maximum memory and was killed'
+        raise MemoryError('HANDLER', msg)
+
+    if os.path.exists(task.stats_file):
+        with open(task.stats_file, 'rb') as fid:
+            while True:
+                try:
+                    key, value = pickle.load(fid)
+                except (EOFError, pickle.UnpicklingError):
+                    # The JobRunner process can be killed while writing a stat
+                    break
+                add_job_stat(call_status, key, value)
+
+
+def run_jobrunner_in_process(jobrunner, timeout):
+    """
+    Runs the JobRunner in the handler process. The timeout is enforced with
+    SIGALRM, which interrupts the function code, so it must be called from
+    the main thread of unix systems
+    """
+    msg = f'Function exceeded maximum time of {timeout} seconds and was killed'
+
+    def on_timeout(signum, frame):
+        raise ExecutionTimeout()
+
+    previous_handler = signal.signal(signal.SIGALRM, on_timeout)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        jobrunner.run()
+    except ExecutionTimeout:
+        raise TimeoutError('HANDLER', msg)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
+
+
+def add_job_stat(call_status, key, value):
+    """
+    Adds a stat written by the JobRunner to the call status
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        value = float(value)
+    call_status.add(key, value)
+
+
+def upload_logs(task, internal_storage, call_status):
+    """
+    Uploads the logs of a call to a separate object, keeping only the first
+    and last bytes of the logs larger than worker_logs_max_size. With
+    worker_logs_sampling, only the logs of a fraction of the calls and of
+    the failed calls are uploaded.
+    """
+    sampling = task.config['lithops'].get('worker_logs_sampling', 1)
+    call_hash = zlib.crc32(f'{task.job_key}/{task.call_id}'.encode())
+    if not call_status.status['exception'] and call_hash >= sampling * 2**32:
+        return
+
+    max_size = task.config['lithops'].get('worker_logs_max_size', WORKER_LOGS_MAX_SIZE)
+    with open(task.log_file, 'rb') as lf:
+        size = os.fstat(lf.fileno()).st_size
+        if size > max_size:
+            head = lf.read(max_size // 2)
+            lf.seek(size - max_size // 2)
+            tail = lf.read()
+            truncated = size - len(head) - len(tail)
+            logs = head + f'\n[... {truncated} bytes truncated ...]\n'.encode() + tail
+        else:
+            logs = lf.read()
+
+    if logs:
+        logs_key = create_logs_key(task.executor_id, task.job_id, task.call_id)
+        internal_storage.put_data(logs_key, zlib.compress(logs))
+        call_status.add('worker_logs_size', len(logs))
+
+
 def run_task(task):
     """
     Runs a single job within a separate process
@@ -201,65 +528,16 @@ def run_task(task):
         # send init status event
         call_status.send_init_event()
 
-        handler_conn, jobrunner_conn = Pipe()
-        jobrunner = JobRunner(task, jobrunner_conn, internal_storage)
-        logger.debug('Starting JobRunner process')
-        jrp = Process(target=jobrunner.run) if is_unix_system() else Thread(target=jobrunner.run)
-
-        process_id = os.getpid() if is_unix_system() else mp.current_process().pid
-        sys_monitor = SystemMonitor(process_id)
-        sys_monitor.start()
-
-        jrp.start()
-        jrp.join(task.execution_timeout)
-
-        sys_monitor.stop()
-        logger.debug('JobRunner process finished')
-
-        cpu_info = sys_monitor.get_cpu_info()
-        call_status.add('worker_func_cpu_usage', cpu_info['usage'])
-        call_status.add('worker_func_cpu_system_time', round(cpu_info['system'], 8))
-        call_status.add('worker_func_cpu_user_time', round(cpu_info['user'], 8))
+        if task.fast_mode:
+            jobrunner = JobRunner(task, None, internal_storage)
+            logger.debug('Starting JobRunner in the handler process')
+            run_jobrunner_in_process(jobrunner, task.execution_timeout)
+            logger.debug('JobRunner finished')
 
-        net_io = sys_monitor.get_network_io()
-        call_status.add('worker_func_sent_net_io', net_io['sent'])
-        call_status.add('worker_func_recv_net_io', net_io['recv'])
-
-        mem_info = sys_monitor.get_memory_info()
-        call_status.add('worker_func_rss', mem_info['rss'])
-        call_status.add('worker_func_vms', mem_info['vms'])
-        call_status.add('worker_func_uss', mem_info['uss'])
-
-        if jrp.is_alive():
-            # If process is still alive after jr.join(job_max_runtime), kill it
-            try:
-                jrp.terminate()
-            except Exception:
-                # thread does not have terminate method
-                pass
-            msg = ('Function exceeded maximum time of {} seconds and was '
-                   'killed'.format(task.execution_timeout))
-            raise TimeoutError('HANDLER', msg)
-
-        if not handler_conn.poll():
-            logger.error('No completion message received from JobRunner process')
-            logger.debug('Assuming memory overflow...')
-            # Only 1 message is returned by jobrunner when it finishes.
-            # If no message, this means that the jobrunner process was killed.
-            # 99% of times the jobrunner is killed due an OOM, so we assume here an OOM.
-            msg = 'Function exceeded maximum memory and was killed'
-            raise MemoryError('HANDLER', msg)
-
-        if os.path.exists(task.stats_file):
-            with open(task.stats_file, 'r') as fid:
-                for line in fid.readlines():
-                    key, value = line.strip().split(" ", 1)
-                    try:
-                        call_status.add(key, float(value))
-                    except Exception:
-                        call_status.add(key, value)
-                    if key in ['exception', 'exc_pickle_fail']:
-                        call_status.add(key, eval(value))
+            for key, value in jobrunner.stats.stats:
+                add_job_stat(call_status, key, value)
+        else:
+            run_jobrunner_process(task, internal_storage, call_status)
 
     except KeyboardInterrupt:
         job_interruped = True
@@ -274,18 +552,19 @@ def run_task(task):
 
         pickled_exc = pickle.dumps(sys.exc_info())
         pickle.loads(pickled_exc)  # this is just to make sure they can be unpickled
-        call_status.add('exc_info', str(pickled_exc))
+        call_status.add('exc_info', pickled_exc)
 
     finally:
         if not job_interruped:
             call_status.add('worker_end_tstamp', time.time())
 
-            # Flush log stream and save it to the call status
+            # Flush log stream and upload it next to the call status
             task.log_stream.flush()
             if os.path.isfile(task.log_file):
-                with open(task.log_file, 'rb') as lf:
-                    log_str = base64.b64encode(zlib.compress(lf.read())).decode()
-                    call_status.add('logs', log_str)
+                try:
+                    upload_logs(task, internal_storage, call_status)
+                except Exception as e:
+                    logger.error(f'Could not upload the logs: {e}')
 
             call_status.send_finish_event()
 
@@ -24,11 +24,12 @@ import time
 import pickle
 import logging
 import inspect
-import requests
+import functools
 import traceback
 from pydoc import locate
+from concurrent.futures import ThreadPoolExecutor
 
-from lithops.worker.utils import peak_memory
+from lithops.worker.utils import peak_memory, reset_peak_memory
 
 try:
     import numpy as np
@@ -36,30 +37,45 @@ try:
 except ModuleNotFoundError:
     pass
 
+from lithops import serializers
 from lithops.storage import Storage
 from lithops.wait import wait
 from lithops.future import ResponseFuture
 from lithops.utils import WrappedStreamingBody, sizeof_fmt, \
     is_object_processing_function, FuturesList, verify_args
-from lithops.utils import WrappedStreamingBodyPartition
+from lithops.utils import WrappedStreamingBodyPartition, ParallelRangeStreamingBody, \
+    MmapStreamingBody, PrefetchedStreamingBody, ConcatStreamingBody, is_unix_system, get_http_session
 from lithops.util.metrics import PrometheusExporter
-from lithops.storage.utils import create_output_key
+from lithops.util.profiler import SamplingProfiler
+from lithops.storage.utils import create_output_key, create_output_chunk_key, create_storage_stats_key, \
+    create_profile_key
+from lithops.storage.stats import StorageStats, set_call_stats, bind_call_stats, summarize_storage_stats
+from lithops.constants import RANGE_READ_PART_SIZE, OUTPUT_CHUNK_SIZE
 
 logger = logging.getLogger(__name__)
 
 
 class JobStats:
 
-    def __init__(self, stats_filename):
+    def __init__(self, stats_filename=None):
+        """
+        Stats are pickled to stats_filename, or kept in memory
+        if the job runs in the same process as the handler
+        """
         self.stats_filename = stats_filename
-        self.stats_fid = open(stats_filename, 'w')
+        self.stats_fid = open(stats_filename, 'wb') if stats_filename else None
+        self.stats = []
 
     def write(self, key, value):
-        self.stats_fid.write("{} {}\n".format(key, value))
-        self.stats_fid.flush()
+        if self.stats_fid:
+            pickle.dump((key, value), self.stats_fid)
+            self.stats_fid.flush()
+        else:
+            self.stats.append((key, value))
 
     def __del__(self):
-        self.stats_fid.close()
+        if self.stats_fid:
+            self.stats_fid.close()
 
 
 class JobRunner:
@@ -71,6 +87,7 @@ class JobRunner:
         self.lithops_config = job.config
 
         self.output_key = create_output_key(job.executor_id, job.job_id, job.call_id)
+        self.prefetched_input = getattr(job, 'prefetched_input', None)
 
         # Setup stats class
         self.stats = JobStats(self.job.stats_file)
@@ -124,12 +141,23 @@ class JobRunner:
         fut_list.clear()
         data[next(iter(data))] = results
 
-    def _load_object(self, data):
+    def _open_object(self, obj, prefetched_input=None):
         """
-        Loads the object in case of object processing
+        Opens the stream of the byte range of the object to process
         """
-        extra_get_args = {}
-        obj = data['obj']
+        read_concurrency = self.lithops_config['lithops'].get('obj_read_concurrency', 1)
+        read_part_size = self.lithops_config['lithops'].get('obj_read_part_size', RANGE_READ_PART_SIZE)
+
+        if obj.data_byte_range is not None:
+            first_byte, last_byte = obj.data_byte_range
+        else:
+            first_byte, last_byte = 0, obj.chunk_size - 1
+
+        def open_stream(fetch_range, open_range, range_first, range_last, ranged):
+            if read_concurrency > 1 and range_last - range_first + 1 > read_part_size:
+                return ParallelRangeStreamingBody(bind_call_stats(fetch_range), range_first, range_last,
+                                                  read_part_size, read_concurrency)
+            return open_range(range_first, range_last, ranged)
 
         if hasattr(obj, 'bucket') and not hasattr(obj, 'path'):
             logger.info(f'Getting dataset from {obj.backend}://{obj.bucket}/{obj.key}')
@@ -137,29 +165,90 @@ class JobRunner:
                 storage = self.internal_storage.storage
             else:
                 storage = Storage(config=self.lithops_config, backend=obj.backend)
-            if obj.data_byte_range is not None:
-                extra_get_args['Range'] = 'bytes={}-{}'.format(*obj.data_byte_range)
-            stream = storage.get_object(obj.bucket, obj.key, stream=True, extra_get_args=extra_get_args)
-            stream_body = stream
+
+            def fetch_range(range_first, range_last):
+                range_args = {'Range': f'bytes={range_first}-{range_last}'}
+                return storage.get_object(obj.bucket, obj.key, extra_get_args=range_args)
+
+            def open_range(range_first, range_last, ranged):
+                range_args = {'Range': f'bytes={range_first}-{range_last}'} if ranged else {}
+                return storage.get_object(obj.bucket, obj.key, stream=True, extra_get_args=range_args)
 
         elif hasattr(obj, 'url'):
             logger.info(f'Getting dataset from {obj.url}')
-            if obj.data_byte_range is not None:
-                extra_get_args['Range'] = 'bytes={}-{}'.format(*obj.data_byte_range)
-            stream = requests.get(obj.url, headers=extra_get_args, stream=True).raw
-            stream_body = stream
 
-        elif hasattr(obj, 'path'):
+            def fetch_range(range_first, range_last):
+                range_headers = {'Range': f'bytes={range_first}-{range_last}'}
+                resp = get_http_session().get(obj.url, headers=range_headers)
+                if resp.status_code != 206:
+                    raise IOError(f'Range request to {obj.url} failed with status code {resp.status_code}')
+                return resp.content
+
+            def open_range(range_first, range_last, ranged):
+                range_headers = {'Range': f'bytes={range_first}-{range_last}'} if ranged else {}
+                resp = get_http_session().get(obj.url, headers=range_headers, stream=True)
+                resp.raise_for_status()
+                if ranged and resp.status_code != 206:
+                    # The server ignored the range and sends the whole object
+                    logger.debug(f'{obj.url} does not support range requests, skipping {range_first} bytes')
+                    remaining = range_first
+                    while remaining > 0:
+                        skipped = len(resp.raw.read(min(remaining, RANGE_READ_PART_SIZE)))
+                        if not skipped:
+                            break
+                        remaining -= skipped
+                return resp.raw
+
+            if obj.data_byte_range is None:
+                # Without a byte range the server may not support range requests
+                read_concurrency = 1
+
+        if hasattr(obj, 'path'):
             logger.info(f'Getting dataset from {obj.path}')
-            with open(obj.path, "rb") as f:
-                if obj.data_byte_range is not None:
-                    first_byte, last_byte = obj.data_byte_range
+            if is_unix_system():
+                stream = MmapStreamingBody(obj.path, first_byte, last_byte)
+            else:
+                with open(obj.path, "rb") as f:
                     f.seek(first_byte)
                     stream = io.BytesIO(f.read(last_byte - first_byte + 1))
-                else:
-                    stream = io.BytesIO(f.read())
-            stream_body = stream
 
+        elif prefetched_input is not None:
+            # The first bytes of the partition were downloaded by the worker
+            # handler while the previous call was running
+            head, complete = prefetched_input
+            logger.info(f'Using {sizeof_fmt(len(head))} of prefetched data')
+            self.stats.write('worker_func_prefetched_bytes', len(head))
+            rest_first = first_byte + len(head)
+            open_rest = None
+            if not complete and rest_first <= last_byte:
+                open_rest = functools.partial(open_stream, fetch_range, open_range, rest_first, last_byte, True)
+            stream = PrefetchedStreamingBody(head, open_rest)
+
+        else:
+            stream = open_stream(fetch_range, open_range, first_byte, last_byte,
+                                 obj.data_byte_range is not None)
+
+        return stream
+
+    def _load_object(self, data):
+        """
+        Loads the object in case of object processing
+        """
+        obj = data['obj']
+        stream = self._open_object(obj, self.prefetched_input)
+
+        grouped_objects = getattr(obj, 'grouped_objects', None)
+        if grouped_objects:
+            # Small objects of a balanced partitioning share the partition,
+            # and are read one after the other
+            logger.info(f'Partition made of {len(grouped_objects) + 1} objects')
+            first_stream = stream
+            open_streams = [lambda: first_stream] + [functools.partial(self._open_object, grouped_obj)
+                                                     for grouped_obj in grouped_objects]
+            separator = obj.newline.encode() if obj.newline else None
+            stream = io.BufferedReader(ConcatStreamingBody(open_streams, separator))
+
+        stream_body = stream
         if obj.data_byte_range is not None:
             if obj.newline is None:
                 stream_body = WrappedStreamingBody(stream, obj.chunk_size)
@@ -180,6 +269,80 @@ class JobRunner:
 
         logger.info(f'Chunk: {obj.part}/{obj.total_parts} - Size: {obj.chunk_size} - Range: {first_byte}-{last_byte}')
 
+    def _write_storage_stats(self, storage_stats):
+        """
+        Writes the totals of the storage operations of the call in its status,
+        and uploads the stats of each operation, with their latency
+        histograms, to a separate object
+        """
+        summary = summarize_storage_stats(storage_stats)
+        for key, value in summary.items():
+            self.stats.write(f'worker_storage_{key}', value)
+        if not summary['requests']:
+            return
+        try:
+            stats_key = create_storage_stats_key(self.job.executor_id, self.job.job_id, self.job.call_id)
+            self.internal_storage.put_data(stats_key, pickle.dumps(storage_stats))
+        except Exception as e:
+            logger.debug(f'Could not upload the storage stats: {e}')
+
+    def _write_profile(self, samples):
+        """
+        Uploads the samples of the profiler to a separate object, and
+        writes the number of sampled stacks in the status of the call
+        """
+        try:
+            profile_key = create_profile_key(self.job.executor_id, self.job.job_id, self.job.call_id)
+            self.internal_storage.put_data(profile_key, pickle.dumps(samples))
+            self.stats.write('worker_func_profile_stacks', len(samples))
+        except Exception as e:
+            logger.debug(f'Could not upload the profile: {e}')
+
+    def _upload_output_chunks(self, generator):
+        """
+        Pickles the items yielded by a generator function into chunks of about
+        OUTPUT_CHUNK_SIZE bytes. Each chunk is uploaded while the next one is
+        produced, so at most two chunks are kept in memory.
+
+        :return: (number of chunks, total size, time waiting for the uploads) tuple
+        """
+        def upload_chunk(chunk, data):
+            chunk_key = create_output_chunk_key(self.job.executor_id, self.job.job_id, self.job.call_id, chunk)
+            self.internal_storage.put_data(chunk_key, data)
+
+        logger.info('Streaming the items of the function generator')
+        chunks = output_size = 0
+        upload_time = 0.0
+        upload = None
+        buffer = io.BytesIO()
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            for item in generator:
+                pickle.dump(item, buffer)
+                if buffer.tell() >= OUTPUT_CHUNK_SIZE:
+                    if upload is not None:
+                        wait_start = time.time()
+                        upload.result()
+                        upload_time += time.time() - wait_start
+                    data = buffer.getvalue()
+                    upload = executor.submit(upload_chunk, chunks, data)
+                    chunks += 1
+                    output_size += len(data)
+                    buffer = io.BytesIO()
+
+            wait_start = time.time()
+            if upload is not None:
+                upload.result()
+            if buffer.tell():
+                data = buffer.getvalue()
+                upload_chunk(chunks, data)
+                chunks += 1
+                output_size += len(data)
+            upload_time += time.time() - wait_start
+
+        logger.info(f'Stored function result in {chunks} chunks - Size: {sizeof_fmt(output_size)}')
+        return chunks, output_size, upload_time
+
     # Decorator to execute pre-run and post-run functions provided via environment variables
     def prepost(func):
         def call(envVar):
@@ -200,15 +363,26 @@ class JobRunner:
         Runs the function
         """
         # self.stats.write('worker_jobrunner_start_tstamp', time.time())
+        if getattr(self.job, 'fast_mode', False) and not reset_peak_memory():
+            # The handler process runs many calls, and its peak memory
+            # also covers the previous calls
+            self.stats.write('worker_peak_memory_process', True)
         self.stats.write('worker_peak_memory_start', peak_memory())
         logger.debug("Process started")
+        # Only the storage operations made by the threads of this call are reported
+        call_storage_stats = StorageStats()
+        previous_storage_stats = set_call_stats(call_storage_stats)
         result = None
         exception = False
         fn_name = None
+        profiler = SamplingProfiler() if getattr(self.job, 'profile', False) else None
+        streamed_output = None
 
         try:
-            func = pickle.loads(self.job.func)
-            data = pickle.loads(self.job.data)
+            func = getattr(self.job, 'loaded_func', None)
+            if func is None:
+                func = serializers.loads(self.job.func)
+            data = serializers.loads(self.job.data)
 
             if ast.literal_eval(os.environ.get('__LITHOPS_REDUCE_JOB', 'False')):
                 self._wait_futures(data)
@@ -234,7 +408,16 @@ class JobRunner:
             logger.info(f"Going to execute '{str(fn_name)}()'")
             print('---------------------- FUNCTION LOG ----------------------')
             function_start_tstamp = time.time()
-            result = func(**data)
+            if profiler is not None:
+                profiler.start()
+            try:
+                result = func(**data)
+                if inspect.isgenerator(result):
+                    streamed_output = self._upload_output_chunks(result)
+                    result = None
+            finally:
+                if profiler is not None:
+                    profiler.stop()
             function_end_tstamp = time.time()
             print('----------------------------------------------------------')
             logger.info("Success function execution")
@@ -244,6 +427,12 @@ class JobRunner:
             self.stats.write('worker_func_exec_time', round(function_end_tstamp - function_start_tstamp, 8))
             self.stats.write('func_result_size', 0)
 
+            if streamed_output is not None:
+                chunks, output_size, upload_time = streamed_output
+                self.stats.write('func_result_size', output_size)
+                self.stats.write('func_result_chunks', chunks)
+                self.stats.write('worker_result_upload_time', round(upload_time, 8))
+
             if result is not None:
                 # Check for new futures
                 if isinstance(result, ResponseFuture) or isinstance(result, FuturesList) \
@@ -252,7 +441,7 @@ class JobRunner:
                     result = None
                 else:
                     logger.debug("Pickling result")
-                    pickled_output = pickle.dumps(result)
+                    pickled_output = serializers.dumps(result, **getattr(self.job, 'serializer', {}))
                     pickled_output_size = len(pickled_output)
                     self.stats.write('func_result_size', pickled_output_size)
                     if pickled_output_size < 8 * 1024:  # 8KB
@@ -272,7 +461,7 @@ class JobRunner:
                 logger.debug("Pickling exception")
                 pickled_exc = pickle.dumps((exc_type, exc_value, exc_traceback))
                 pickle.loads(pickled_exc)  # this is just to make sure they can be unpickled
-                self.stats.write("exc_info", str(pickled_exc))
+                self.stats.write("exc_info", pickled_exc)
 
             except Exception as pickle_exception:
                 # Shockingly often, modules like subprocess don't properly
@@ -286,7 +475,7 @@ class JobRunner:
                                             'exc_traceback': exc_traceback,
                                             'pickle_exception': pickle_exception})
                 pickle.loads(pickled_exc)  # this is just to make sure it can be unpickled
-                self.stats.write("exc_info", str(pickled_exc))
+                self.stats.write("exc_info", pickled_exc)
 
         finally:
             # self.stats.write('worker_jobrunner_end_tstamp', time.time())
@@ -308,5 +497,10 @@ class JobRunner:
                 self.internal_storage.put_data(self.output_key, pickled_output)
                 output_upload_end_tstamp = time.time()
                 self.stats.write("worker_result_upload_time", round(output_upload_end_tstamp - output_upload_start_tstamp, 8))
-            self.jobrunner_conn.send("Finished")
+            set_call_stats(previous_storage_stats)
+            self._write_storage_stats(call_storage_stats.get())
+            if profiler is not None:
+                self._write_profile(profiler.samples)
+            if self.jobrunner_conn:
+                self.jobrunner_conn.send("Finished")
             logger.info("Process finished")
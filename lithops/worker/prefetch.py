@@ -0,0 +1,129 @@
+#
+# (C) Copyright Cloudlab URV 2021
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from lithops import serializers
+from lithops.storage import Storage
+from lithops.utils import get_http_session
+from lithops.constants import WORKER_PREFETCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+class InputPrefetcher:
+    """
+    Downloads the object partitions of the next calls of a worker while the
+    current call runs. The calls must be requested with get() in the same
+    order they are given. At most `depth` calls are prefetched ahead, and
+    only the first `max_size` bytes of each partition are kept in memory.
+    """
+
+    def __init__(self, config, calls, depth, max_size=WORKER_PREFETCH_SIZE):
+        """
+        :param config: lithops configuration dict
+        :param calls: list of (call_id, pickled call data) tuples
+        :param depth: max number of calls prefetched ahead
+        :param max_size: max number of bytes prefetched of each partition
+        """
+        self.config = config
+        self.calls = list(calls)
+        self.depth = depth
+        self.max_size = max_size
+
+        self._storages = {}
+        self._futures = {}
+        self._next_call = 0
+        self._executor = ThreadPoolExecutor(max_workers=depth)
+        self._submit()
+
+    def _submit(self):
+        while len(self._futures) < self.depth and self._next_call < len(self.calls):
+            call_id, data = self.calls[self._next_call]
+            self._futures[call_id] = self._executor.submit(self._prefetch, data)
+            self._next_call += 1
+
+    def _get_storage(self, backend):
+        if backend not in self._storages:
+            self._storages[backend] = Storage(config=self.config, backend=backend)
+        return self._storages[backend]
+
+    def _prefetch(self, data):
+        """
+        Downloads the first bytes of the partition of a call
+
+        :return: (data, complete) tuple, or None if the call does not process an object
+        """
+        data = serializers.loads(data)
+        obj = data.get('obj') if isinstance(data, dict) else None
+        if obj is None or hasattr(obj, 'path'):
+            # Local files are already read through mmap
+            return None
+
+        if obj.data_byte_range is not None:
+            first_byte, last_byte = obj.data_byte_range
+        else:
+            first_byte, last_byte = 0, obj.chunk_size - 1
+        head_last = min(last_byte, first_byte + self.max_size - 1)
+        range_header = {'Range': f'bytes={first_byte}-{head_last}'}
+
+        if hasattr(obj, 'bucket'):
+            storage = self._get_storage(obj.backend)
+            head = storage.get_object(obj.bucket, obj.key, extra_get_args=range_header)
+        elif hasattr(obj, 'url') and obj.data_byte_range is not None:
+            resp = get_http_session().get(obj.url, headers=range_header)
+            if resp.status_code != 206:
+                return None
+            head = resp.content
+        else:
+            return None
+
+        expected_size = head_last - first_byte + 1
+        if len(head) > expected_size:
+            return None
+
+        logger.debug(f'Prefetched {len(head)} bytes of {obj.key if hasattr(obj, "key") else obj.url}')
+        return head, head_last == last_byte or len(head) < expected_size
+
+    def get(self, call_id):
+        """
+        Waits for the prefetched data of a call, and starts
+        prefetching the data of the next calls
+
+        :param call_id: the call id
+
+        :return: (data, complete) tuple, where complete is False if only the
+         first bytes of the partition were prefetched, or None
+        """
+        future = self._futures.pop(call_id, None)
+        self._submit()
+        if future is None:
+            return None
+        try:
+            return future.result()
+        except Exception as e:
+            logger.debug(f'Could not prefetch the input of call {call_id}: {e}')
+            return None
+
+    def close(self):
+        """
+        Cancels the pending downloads
+        """
+        for future in self._futures.values():
+            future.cancel()
+        self._futures = {}
+        self._executor.shutdown(wait=False)
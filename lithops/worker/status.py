@@ -1,7 +1,6 @@
 import os
 import ast
 import pika
-import json
 import time
 import logging
 from tblib import pickling_support
@@ -9,6 +8,7 @@ from contextlib import contextmanager
 
 import lithops.worker
 from lithops.utils import sizeof_fmt
+from lithops.serializers import dumps_status
 from lithops.storage.utils import create_status_key, \
     create_init_key
 
@@ -83,7 +83,7 @@ class StorageCallStatus(CallStatus):
 
         elif self.status['type'] == '__end__':
             status_key = create_status_key(executor_id, job_id, call_id)
-            dmpd_response_status = json.dumps(self.status)
+            dmpd_response_status = dumps_status(self.status)
             drs = sizeof_fmt(len(dmpd_response_status))
             logger.info("Storing execution stats - Size: {}".format(drs))
             self.internal_storage.put_data(status_key, dmpd_response_status)
@@ -114,7 +114,7 @@ class RabbitmqCallStatus(StorageCallStatus):
         """
         Send the status event to RabbitMQ
         """
-        dmpd_response_status = json.dumps(self.status)
+        dmpd_response_status = dumps_status(self.status)
         drs = sizeof_fmt(len(dmpd_response_status))
 
         status_sent = False
@@ -156,6 +156,21 @@ def peak_memory():
     return ru_maxrss * 1024 if platform.system() == "Linux" else ru_maxrss
 
 
+def reset_peak_memory():
+    """
+    Resets the peak memory usage of the process, so that it only covers the
+    next call run in the same process. Only supported in Linux.
+
+    :return: True if the peak memory usage was reset
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
 def free_disk_space(dirname):
     """
     Returns the number of free bytes on the mount point containing DIRNAME
@@ -82,8 +82,15 @@ extras_require = {
     'oracle': [
         'oci',
     ],
+    'serializers': [
+        'msgpack',
+        'pyarrow',
+        'zstandard',
+        'lz4'
+    ],
     'tests': [
         'pytest',
+        'fakeredis',
     ]
 }
 